@@ -0,0 +1,369 @@
+"""
+Activity Log Retention
+Keeps user_activity small: whole months older than the retention period
+are archived to gzip JSON-lines files and then removed from the table
+
+On MySQL the table can be partitioned by month (`partition` command), so
+expired months are removed by dropping their partition instead of
+deleting rows; future partitions are added on every run. Rows that are
+not in a droppable partition are deleted in id batches, which also
+covers an unpartitioned table or the SQLite stand-in database.
+
+A month's archive file is written completely (temp file + rename)
+before any of its rows are removed. An existing month file is never
+replaced by a new one: its bytes are kept and the rows it does not hold
+yet are appended as another gzip member, so a run interrupted between
+archiving and deleting only archives rows that are new on the next one.
+Runs hold an exclusive lock file in the archive directory, so processes
+sharing that directory never archive or delete at the same time.
+
+Pruning is destructive and runs in one place: the command below (from
+cron, say) or the background thread of one process with
+ACTIVITY_PRUNE_INTERVAL set. The thread is off by default, since every
+web worker importing the app would start one.
+
+Usage:
+    python activity_retention.py partition    # partition user_activity by month (MySQL)
+    python activity_retention.py prune [--retention-days 90]
+
+Educational Purpose Only
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from config import ACTIVITY_LOG_CONFIG, EXPORT_CONFIG
+from metrics import activity_log_retention
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+# ==========================================
+# ARCHIVE
+# ==========================================
+
+class MonthArchiveWriter:
+    """
+    Gzip JSON-lines files per month, renamed into place on commit
+
+    A month that already has a file starts from a copy of its bytes and
+    gets only rows with ids the file does not hold, as a new gzip member
+    (gzip readers read concatenated members as one stream).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.id_ranges = {}  # month -> [first id, last id] of the rows seen
+        self._files = {}
+        self._archived = {}  # month -> ids already in its existing file
+
+    def file_path(self, month):
+        return os.path.join(self.path, f"user_activity-{month:%Y-%m}.jsonl.gz")
+
+    def _open(self, month):
+        os.makedirs(self.path, exist_ok=True)
+        path = self.file_path(month)
+        raw = open(f"{path}.{os.getpid()}.tmp", 'wb')
+        archived = set()
+        if os.path.exists(path):
+            with gzip.open(path, 'rt', encoding='utf-8') as existing:
+                archived = {json.loads(line)['id'] for line in existing}
+            with open(path, 'rb') as existing:
+                shutil.copyfileobj(existing, raw)
+        self._archived[month] = archived
+        self._files[month] = (raw, gzip.GzipFile(fileobj=raw, mode='wb'))
+
+    def write(self, row):
+        """Add a row to its month's file; False when that file already holds it"""
+        created = row['created_at']
+        if isinstance(created, str):
+            created = datetime.fromisoformat(created)
+        month = date(created.year, created.month, 1)
+        if month not in self._files:
+            self._open(month)
+            self.id_ranges[month] = [row['id'], row['id']]
+        ids = self.id_ranges[month]
+        ids[0], ids[1] = min(ids[0], row['id']), max(ids[1], row['id'])
+        if row['id'] in self._archived[month]:
+            return False
+        details = row.get('details')
+        self._files[month][1].write((json.dumps({
+            'id': row['id'],
+            'activity_type': row['activity_type'],
+            'crop_type': row['crop_type'],
+            'details': json.loads(details) if details else None,
+            'created_at': created.isoformat()
+        }, separators=(',', ':')) + '\n').encode('utf-8'))
+        return True
+
+    def commit(self):
+        """Close and publish every month file; returns the months written"""
+        months = sorted(self._files)
+        for month in months:
+            raw, f = self._files.pop(month)
+            f.close()
+            raw.close()
+            os.replace(raw.name, self.file_path(month))
+        return months
+
+    def abort(self):
+        for raw, f in self._files.values():
+            f.close()
+            raw.close()
+            os.unlink(raw.name)
+        self._files.clear()
+
+
+class RunLock:
+    """Exclusive lock on a file, shared by every process on the host; released on exit at the latest"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def acquire(self):
+        """True when the lock was taken, False when another holder has it (never waits)"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        f = open(self.path, 'a+b')
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self):
+        f, self._file = self._file, None
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        f.close()
+
+
+# ==========================================
+# RETENTION
+# ==========================================
+
+def _partition_end(name):
+    """pYYYYMM -> first day after the partition's month"""
+    return add_months(date(int(name[1:5]), int(name[5:7]), 1), 1)
+
+
+class ActivityRetention:
+    """
+    Archive-then-prune job for user_activity, optionally on a background
+    thread every `interval` seconds
+
+    get_db returns the app's DatabaseManager (or None while it is down);
+    each run works on its own connection from DatabaseManager.clone().
+    """
+
+    def __init__(self, get_db, retention_days, archive_path, interval=0, delete_batch=5000,
+                 months_ahead=3, fetch_size=2000):
+        self.get_db = get_db
+        self.retention_days = retention_days
+        self.archive_path = archive_path
+        self.interval = interval
+        self.delete_batch = delete_batch
+        self.months_ahead = months_ahead
+        self.fetch_size = fetch_size
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._run_lock = RunLock(os.path.join(archive_path, '.retention.lock'))
+
+    def cutoff(self, today=None):
+        """Start of the oldest month that is kept"""
+        return month_start((today or date.today()) - timedelta(days=self.retention_days))
+
+    def run_once(self, db=None, today=None):
+        """
+        Archive and remove every month before the cutoff
+
+        Returns:
+            dict with cutoff, archived and deleted row counts, dropped
+            partitions; None when skipped (database down, or another
+            process is running)
+        """
+        with self._lock:
+            if not self._run_lock.acquire():
+                logger.info("Activity retention skipped: another process is running it")
+                return None
+            try:
+                owned = db is None
+                if owned:
+                    shared = self.get_db()
+                    db = shared.clone() if shared is not None and shared.connection else None
+                    if db is None:
+                        logger.info("Activity retention skipped: database unavailable")
+                        return None
+                try:
+                    return self._run(db, today)
+                finally:
+                    if owned:
+                        db.disconnect()
+            finally:
+                self._run_lock.release()
+
+    def _run(self, db, today):
+        start = time.perf_counter()
+        cutoff = self.cutoff(today)
+        cutoff_ts = f"{cutoff.isoformat()} 00:00:00"
+
+        # Archive first: every row before the cutoff, grouped by month
+        writer = MonthArchiveWriter(self.archive_path)
+        archived = 0
+        try:
+            for row in db.stream_activity_before(cutoff_ts, self.fetch_size):
+                archived += writer.write(row)
+        except BaseException:
+            writer.abort()
+            raise
+        months = writer.commit()
+        activity_log_retention.inc(archived, action='archived')
+
+        # Then remove: whole partitions where possible, the rest in id batches
+        partitions = db.activity_partitions()
+        expired = [name for name in partitions if _partition_end(name) <= cutoff]
+        # Never drop the last partition before pmax: new months are added after it
+        expired = expired[:len(partitions) - 1] if expired == partitions else expired
+        db.drop_activity_partitions(expired)
+        dropped_until = _partition_end(expired[-1]) if expired else date.min
+
+        remaining = [writer.id_ranges[month] for month in months if month >= dropped_until]
+        deleted = 0
+        if remaining:
+            first_id, last_id = min(r[0] for r in remaining), max(r[1] for r in remaining)
+            for low in range(first_id, last_id + 1, self.delete_batch):
+                deleted += max(db.delete_activity_range(low, min(low + self.delete_batch - 1, last_id), cutoff_ts), 0)
+        activity_log_retention.inc(deleted, action='deleted')
+
+        if partitions:
+            this_month = month_start(today or date.today())
+            db.add_activity_partitions([add_months(this_month, i) for i in range(self.months_ahead + 1)])
+
+        result = {
+            'cutoff': cutoff.isoformat(),
+            'archived': archived,
+            'archiveMonths': [f"{month:%Y-%m}" for month in months],
+            'droppedPartitions': expired,
+            'deleted': deleted,
+            'durationMs': round((time.perf_counter() - start) * 1000, 1)
+        }
+        if archived or deleted or expired:
+            logger.info("Activity retention: %s", result)
+        return result
+
+    # ==================== BACKGROUND THREAD ====================
+
+    def start(self):
+        """
+        Run every `interval` seconds on a daemon thread (no-op when interval
+        is 0, the default); enable it in one process only
+        """
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name='activity-retention', daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        # First run after one interval, so startup stays fast
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Activity retention run failed")
+
+    def stop(self):
+        self._stop.set()
+
+
+def _app_db():
+    import database
+    return database.db_manager
+
+
+activity_retention = ActivityRetention(
+    _app_db,
+    retention_days=ACTIVITY_LOG_CONFIG['retention_days'],
+    archive_path=os.path.join(BASE_DIR, ACTIVITY_LOG_CONFIG['archive_path']),
+    interval=ACTIVITY_LOG_CONFIG['prune_interval'],
+    delete_batch=ACTIVITY_LOG_CONFIG['delete_batch'],
+    months_ahead=ACTIVITY_LOG_CONFIG['partition_months_ahead'],
+    fetch_size=EXPORT_CONFIG['fetch_size']
+)
+
+
+# ==========================================
+# COMMAND LINE
+# ==========================================
+
+def main(argv=None):
+    from database import get_db, init_database
+
+    parser = argparse.ArgumentParser(description='Partition and prune the activity log')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('partition', help='partition user_activity by month (MySQL)')
+    pruner = sub.add_parser('prune', help='archive and remove expired months now')
+    pruner.add_argument('--retention-days', type=int, default=ACTIVITY_LOG_CONFIG['retention_days'])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+    load_dotenv()
+    if not init_database(host=os.getenv('DB_HOST', 'localhost'), user=os.getenv('DB_USER', 'root'),
+                         password=os.getenv('DB_PASSWORD', ''),
+                         database=os.getenv('DB_NAME', 'ai_agriculture_assistant')):
+        raise SystemExit("Could not connect to the database")
+    db = get_db()
+
+    if args.command == 'partition':
+        this_month = month_start(date.today())
+        first = add_months(activity_retention.cutoff(), -1)
+        months = []
+        while first <= add_months(this_month, activity_retention.months_ahead):
+            months.append(first)
+            first = add_months(first, 1)
+        print(f"Added {db.add_activity_partitions(months)} partitions")
+        return 0
+
+    activity_retention.retention_days = args.retention_days
+    print(json.dumps(activity_retention.run_once(db), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
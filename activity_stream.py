@@ -0,0 +1,142 @@
+"""
+Activity Stream
+In-process fan-out of log_activity events to Server-Sent Events
+subscribers, so dashboards get pushed updates instead of polling
+/api/activity
+
+Recent events are kept in a ring buffer for Last-Event-ID resume. Each
+subscriber has a bounded queue; a subscriber that falls behind is
+dropped rather than slowing down publishers.
+
+Educational Purpose Only
+"""
+
+import collections
+import logging
+import queue
+import threading
+from datetime import datetime
+
+from config import ACTIVITY_STREAM_CONFIG
+from json_provider import dumps_bytes
+from metrics import sse_dropped, sse_subscribers
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    """One SSE connection"""
+
+    def __init__(self, queue_size, activity_type=None):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.activity_type = activity_type
+        self.dropped = False
+
+    def wants(self, event):
+        return self.activity_type is None or event['activity_type'] == self.activity_type
+
+
+class ActivityBroadcaster:
+    """Ring buffer of recent events plus the set of live subscribers"""
+
+    def __init__(self, buffer_size=1000, queue_size=100, max_subscribers=100):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._buffer = collections.deque(maxlen=buffer_size)
+        self._subscribers = set()
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+        sse_subscribers.set_function(lambda: len(self._subscribers), stream='activity')
+
+    def publish(self, activity_type, crop_type=None, details=None):
+        """Record an event and hand it to every subscriber without blocking"""
+        with self._lock:
+            self._last_id += 1
+            event = {
+                'id': self._last_id,
+                'activity_type': activity_type,
+                'crop_type': crop_type,
+                'details': details,
+                'created_at': datetime.now().isoformat()
+            }
+            self._buffer.append(event)
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            if not subscriber.wants(event):
+                continue
+            try:
+                subscriber.queue.put_nowait(event)
+            except queue.Full:
+                self._drop(subscriber)
+        return event
+
+    def subscribe(self, last_event_id=None, activity_type=None):
+        """
+        Register a subscriber, replaying buffered events after last_event_id
+
+        Returns:
+            Subscriber, or None if max_subscribers are already connected
+        """
+        subscriber = Subscriber(self.queue_size, activity_type)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            if last_event_id is not None:
+                # An id from before a restart replays the whole buffer
+                if last_event_id > self._last_id:
+                    last_event_id = 0
+                missed = [e for e in self._buffer if e['id'] > last_event_id and subscriber.wants(e)]
+                for event in missed[-self.queue_size:]:
+                    subscriber.queue.put_nowait(event)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _drop(self, subscriber):
+        with self._lock:
+            if subscriber not in self._subscribers:
+                return
+            self._subscribers.discard(subscriber)
+        subscriber.dropped = True
+        sse_dropped.inc(stream='activity')
+        logger.info("Dropped slow activity stream subscriber")
+
+    def recent(self, limit=20):
+        """Newest buffered events first"""
+        with self._lock:
+            return list(self._buffer)[-limit:][::-1]
+
+
+def sse_events(broadcaster, subscriber, heartbeat=15.0, retry_ms=3000):
+    """
+    Generate the SSE wire format for one subscriber
+
+    Sends a comment line as heartbeat when idle and unsubscribes when the
+    client disconnects (the generator is closed). A generator that never
+    started cannot unsubscribe, so the response must also call
+    broadcaster.unsubscribe when it closes.
+    """
+    try:
+        yield f"retry: {retry_ms}\n\n".encode('utf-8')
+        while not subscriber.dropped:
+            try:
+                event = subscriber.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield b": heartbeat\n\n"
+                continue
+            yield b"id: %d\nevent: activity\ndata: %s\n\n" % (event['id'], dumps_bytes(event))
+        yield b"event: dropped\ndata: {\"reason\": \"slow consumer\"}\n\n"
+    finally:
+        broadcaster.unsubscribe(subscriber)
+
+
+activity_events = ActivityBroadcaster(
+    buffer_size=ACTIVITY_STREAM_CONFIG['buffer_size'],
+    queue_size=ACTIVITY_STREAM_CONFIG['queue_size'],
+    max_subscribers=ACTIVITY_STREAM_CONFIG['max_subscribers']
+)
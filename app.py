@@ -5,20 +5,66 @@ Main Application Entry Point
 Educational Purpose Only
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from datetime import datetime
+import csv
+import io
+import logging
+import math
 import os
+import time
 from dotenv import load_dotenv
-from database import init_database, get_db
-from ml_disease_detection import detect_disease_ml, detect_disease_mock, format_result
+from logging_setup import configure_logging, init_request_ids
 
-# Load environment variables
+# Load environment variables and start logging before other modules log
 load_dotenv()
+configure_logging()
+
+from database import DatabaseManager, init_database, get_db
+from disease_catalog import disease_catalog
+from ml_disease_detection import detect_disease_ml, detect_disease_mock, format_result
+from compression import init_compression
+from json_provider import init_json, static_payloads
+from rate_limit import init_rate_limiting
+from metrics import init_metrics
+from profiling import init_profiling
+from price_index import parse_search_request, price_index
+from price_history import downsample, price_history, to_day
+from price_forecast import forecast_cache, truncate as truncate_forecast
+from market_locator import market_locator
+from scheme_search import scheme_search
+from scheme_eligibility import parse_profile, scheme_eligibility
+from reference_data import (db_guard, gov_schemes, market_prices, preload as preload_reference_data,
+                            prices_from_database, schemes_from_database)
+from yield_model import REQUIRED_FIELDS as YIELD_REQUIRED_FIELDS, columns_from_records, yield_predictor
+from streaming import requested_format, stream_rows
+from image_archive import image_archive
+from jobs import QueueFullError, detection_jobs
+from activity_stream import activity_events, sse_events
+from activity_retention import activity_retention
+from config import (ACTIVITY_STREAM_CONFIG, CURRENT_CONFIG, EXPORT_CONFIG, FEATURES, IMAGE_ARCHIVE_CONFIG,
+                    JOB_QUEUE_CONFIG, MARKET_LOCATOR_CONFIG, PRICE_HISTORY_CONFIG, REFERENCE_DATA_CONFIG,
+                    SCHEME_SEARCH_CONFIG, YIELD_BATCH_CONFIG, YIELD_SENSITIVITY_CONFIG)
+
+logger = logging.getLogger('app')
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config['JSON_SORT_KEYS'] = False
+init_json(app)
+init_metrics(app)
+init_request_ids(app)
+init_profiling(app)
+init_rate_limiting(app)
+
+# Load market prices and schemes into memory before the first request
+preload_reference_data()
+if FEATURES['price_forecasting_enabled']:
+    forecast_cache.get()  # load saved forecasts or start the first fit
+
+# Archive and prune old activity log months in the background (when ACTIVITY_PRUNE_INTERVAL is set)
+activity_retention.start()
 
 # Initialize database
 @app.before_request
@@ -34,9 +80,9 @@ def before_request():
             
             if init_database(host=db_host, user=db_user, password=db_password, database=db_name):
                 app.db = get_db()
-                print("[OK] Database initialized for this request")
+                logger.info("Database initialized for this request")
         except Exception as e:
-            print(f"[WARNING] Database initialization warning: {e}")
+            logger.warning("Database initialization warning: %s", e)
             app.db = None
 
 # Configure CORS
@@ -52,6 +98,76 @@ CORS(app, resources={
     }
 })
 
+# Configure response compression
+init_compression(app)
+
+# ==========================================
+# STATIC PAYLOADS (serialized once at startup)
+# ==========================================
+SUPPORTED_CROPS = [
+    "Potato",
+    "Tomato"
+]
+
+API_ENDPOINTS = {
+    "Health": {
+        "GET /api/health": "Server health check",
+        "GET /api/metrics": "Prometheus metrics"
+    },
+    "Market Prices": {
+        "GET /api/prices": "Get market prices",
+        "POST /api/prices/search": "Advanced price search",
+        "GET /api/prices/history": "Daily price history for a crop and state, downsampled for charts",
+        "GET /api/prices/forecast": "Weekly price forecast with 80%/95% bands for a crop and state",
+        "GET /api/prices/nearest": "Nearest markets with prices for a crop (?lat=, ?lon=, ?crop=, ?k=)"
+    },
+    "Yield Prediction": {
+        "POST /api/predict-yield": "Predict crop yield",
+        "POST /api/predict-yield/batch": "Predict yields for many fields (JSON array or CSV)",
+        "POST /api/predict-yield/sensitivity": "What-if yield grid over soil, water and sunlight",
+        "GET /api/crops": "Get supported crops"
+    },
+    "Disease Detection": {
+        "POST /api/detect-disease": "Analyze leaf image",
+        "POST /api/detect-disease/jobs": "Queue a leaf image for analysis, returns a job id",
+        "GET /api/detect-disease/jobs/<id>": "Poll a detection job (?wait=<seconds> to long-poll)",
+        "GET /api/diseases": "Get disease database (?crop= for one crop)",
+        "GET /api/diseases/<id>": "Get one disease"
+    },
+    "Government Schemes": {
+        "GET /api/schemes": "Get schemes",
+        "GET /api/schemes/search": "Ranked free-text scheme search (?q=, ?type=, ?level=, ?limit=)",
+        "POST /api/schemes/eligible": "Schemes matching a farmer profile (state, crops, landHectares, ...)",
+        "GET /api/schemes/<id>": "Get scheme details"
+    },
+    "Export": {
+        "GET /api/export/predictions": "Download all yield predictions (CSV or NDJSON)",
+        "GET /api/export/detections": "Download all disease detections (CSV or NDJSON)"
+    }
+}
+
+static_payloads.register('crops', {
+    "crops": SUPPORTED_CROPS,
+    "total": len(SUPPORTED_CROPS),
+    "scope": "Educational Mini Project - Potato & Tomato Only",
+    "futureScope": ["Rice", "Wheat", "Corn", "Cotton", "Sugarcane", "Onion"]
+})
+
+# All diseases, and the diseases of each crop, joined from the catalog's entry bytes
+for _crop in (None,) + disease_catalog.crops:
+    static_payloads.register_body(
+        'diseases' if _crop is None else f'diseases:{_crop}',
+        disease_catalog.list_json(_crop, crops=disease_catalog.crops, **disease_catalog.metadata))
+
+static_payloads.register('info', {
+    "apiName": "AI Agriculture Assistant",
+    "version": "1.0.0",
+    "status": "Development",
+    "disclaimer": "Educational and demonstration purposes only",
+    "endpoints": API_ENDPOINTS,
+    "baseUrl": "http://localhost:5000/api"
+})
+
 # ==========================================
 # HEALTH CHECK ENDPOINT
 # ==========================================
@@ -65,6 +181,30 @@ def health_check():
         "version": "1.0.0"
     }), 200
 
+# ==========================================
+# REFERENCE DATA
+# ==========================================
+def _read_reference(db_read, reference_read):
+    """
+    Read reference rows from the database, or from the in-memory store
+    when it is the primary path or the database is down, failing or slow
+    
+    db_read must raise on query errors (raise_errors=True) so a failing
+    database trips db_guard, and return rows in the reference shape.
+    
+    Returns:
+        (rows, source) where source is 'database' or 'reference'
+    """
+    if not REFERENCE_DATA_CONFIG['primary'] and not db_guard.bypassed:
+        try:
+            db = get_db()
+            if db and db.connection:
+                return db_guard.call(db_read, db), 'database'
+            db_guard.trip()
+        except Exception as e:
+            logger.warning("Database read failed, serving reference data: %s", e)
+    return reference_read(), 'reference'
+
 # ==========================================
 # MARKET PRICES ENDPOINTS
 # ==========================================
@@ -75,25 +215,27 @@ def get_prices():
     state = request.args.get('state')
     
     try:
-        db = get_db()
-        if db and db.connection:
-            prices = db.get_market_prices(crop=crop)
-            
-            # Filter by state if provided
-            if state:
-                prices = [p for p in prices if p['state'].lower() == state.lower()]
-            
-            return jsonify({
-                "data": prices,
-                "filters": {
-                    "crop": crop,
-                    "state": state
-                },
-                "total": len(prices),
-                "status": "success"
-            }), 200
+        prices, source = _read_reference(
+            lambda db: prices_from_database(db.get_market_prices(crop=crop, raise_errors=True)),
+            lambda: market_prices.get().find(crop=crop, state=state)
+        )
+        
+        # Filter by state if provided
+        if state and source == 'database':
+            prices = [p for p in prices if p['state'].lower() == state.lower()]
+        
+        return jsonify({
+            "data": prices,
+            "filters": {
+                "crop": crop,
+                "state": state
+            },
+            "total": len(prices),
+            "status": "success",
+            "source": source
+        }), 200
     except Exception as e:
-        print(f"Error fetching prices: {e}")
+        logger.warning("Error fetching prices: %s", e)
     
     # Fallback response
     return jsonify({
@@ -106,18 +248,162 @@ def get_prices():
         "status": "fallback"
     }), 200
 
+@app.route('/api/prices/history', methods=['GET'])
+def get_price_history():
+    """Price time series for one crop x state (?crop=, ?state=, ?from=, ?to=, ?points=)"""
+    crop = request.args.get('crop')
+    state = request.args.get('state')
+    store = price_history.get()
+    
+    if not crop or not state:
+        return jsonify({
+            "error": "crop and state are required",
+            "available": store.available()
+        }), 400
+    
+    series = store.get(crop, state)
+    if series is None:
+        return jsonify({
+            "error": f"No price history for {crop} in {state}",
+            "available": store.available()
+        }), 404
+    
+    try:
+        end = to_day(request.args['to']) if request.args.get('to') else None
+        if request.args.get('from'):
+            start = to_day(request.args['from'])
+        else:
+            last = int(series.dates[-1]) if len(series.dates) else 0
+            start = (end if end is not None else last) - PRICE_HISTORY_CONFIG['default_days'] + 1
+        points = int(request.args.get('points', PRICE_HISTORY_CONFIG['default_points']))
+    except ValueError:
+        return jsonify({"error": "from/to must be ISO dates and points an integer"}), 400
+    if not 1 <= points <= PRICE_HISTORY_CONFIG['max_points']:
+        return jsonify({"error": f"points must be between 1 and {PRICE_HISTORY_CONFIG['max_points']}"}), 400
+    
+    dates, prices = series.range(start, end)
+    return jsonify({
+        "crop": series.crop,
+        "state": series.state,
+        "unit": store.unit,
+        "rawPoints": len(dates),
+        "series": downsample(dates, prices, points),
+        "sample": store.sample
+    }), 200
+
+@app.route('/api/prices/forecast', methods=['GET'])
+def get_price_forecast():
+    """Precomputed price forecast for one crop x state (?crop=, ?state=, ?horizon=<weeks>)"""
+    if not FEATURES['price_forecasting_enabled']:
+        return jsonify({"error": "Price forecasting is not enabled"}), 404
+    
+    data = forecast_cache.get()
+    if data is None:
+        response = jsonify({"error": "Forecasts are being computed, try again shortly"})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    crop = request.args.get('crop')
+    state = request.args.get('state')
+    available = [{"crop": f['crop'], "state": f['state']} for f in data['forecasts'].values()]
+    if not crop or not state:
+        return jsonify({"error": "crop and state are required", "available": available}), 400
+    
+    forecast = data['forecasts'].get((crop.lower(), state.lower()))
+    if forecast is None:
+        return jsonify({"error": f"No forecast for {crop} in {state}", "available": available}), 404
+    
+    try:
+        horizon = int(request.args.get('horizon', data['horizonWeeks']))
+    except ValueError:
+        return jsonify({"error": "horizon must be an integer number of weeks"}), 400
+    if not 1 <= horizon <= data['horizonWeeks']:
+        return jsonify({"error": f"horizon must be between 1 and {data['horizonWeeks']} weeks"}), 400
+    if horizon < data['horizonWeeks']:
+        forecast = truncate_forecast(forecast, horizon)
+    
+    return jsonify({
+        **forecast,
+        "unit": "per quintal",
+        "horizonWeeks": horizon,
+        "generatedAt": data['generatedAt'],
+        "sample": data['sample']
+    }), 200
+
+@app.route('/api/prices/nearest', methods=['GET'])
+def get_nearest_markets():
+    """k nearest markets with prices for a crop (?lat=, ?lon=, ?crop=, ?k=, ?maxKm=)"""
+    index = market_locator.get()
+    crop = request.args.get('crop')
+    if not crop:
+        return jsonify({"error": "crop is required", "available": index.crops}), 400
+    
+    try:
+        lat = float(request.args['lat'])
+        lon = float(request.args['lon'])
+        k = int(request.args.get('k', MARKET_LOCATOR_CONFIG['default_k']))
+        max_km = float(request.args['maxKm']) if request.args.get('maxKm') else None
+    except (KeyError, ValueError):
+        return jsonify({"error": "lat and lon are required numbers, k an integer and maxKm a number"}), 400
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return jsonify({"error": "lat must be within [-90, 90] and lon within [-180, 180]"}), 400
+    if not 1 <= k <= MARKET_LOCATOR_CONFIG['max_k']:
+        return jsonify({"error": f"k must be between 1 and {MARKET_LOCATOR_CONFIG['max_k']}"}), 400
+    if max_km is not None and not (math.isfinite(max_km) and max_km > 0):
+        return jsonify({"error": "maxKm must be a finite number greater than 0"}), 400
+    
+    start = time.perf_counter()
+    markets = index.nearest(lat, lon, crop, k=k, max_km=max_km)
+    query_ms = (time.perf_counter() - start) * 1000
+    if markets is None:
+        return jsonify({"error": f"No markets with prices for {crop}", "available": index.crops}), 404
+    
+    return jsonify({
+        "data": markets,
+        "query": {"lat": lat, "lon": lon, "crop": crop, "k": k, "maxKm": max_km},
+        "total": len(markets),
+        "unit": "per quintal",
+        "queryMs": round(query_ms, 3),
+        "status": "success"
+    }), 200
+
 @app.route('/api/prices/search', methods=['POST'])
 def search_prices():
     """Advanced price search with multiple criteria"""
-    data = request.get_json()
+    data = request.get_json(silent=True)
     
-    if not data:
+    if not data or not isinstance(data, dict):
         return jsonify({"error": "No data provided"}), 400
     
-    # TODO: Implement advanced search logic
+    try:
+        query, page = parse_search_request(
+            data,
+            default_page_size=CURRENT_CONFIG.ITEMS_PER_PAGE,
+            max_page_size=CURRENT_CONFIG.MAX_ITEMS_PER_PAGE
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        start = time.perf_counter()
+        total, results = price_index.get().search(**query)
+        query_ms = (time.perf_counter() - start) * 1000
+    except Exception as e:
+        logger.warning("Error searching prices: %s", e)
+        return jsonify({
+            "error": "Price search not available",
+            "status": "fallback"
+        }), 503
+    
     return jsonify({
-        "message": "Search functionality under development",
-        "received": data
+        "success": True,
+        "results": results,
+        "total": total,
+        "page": page,
+        "pageSize": query['limit'],
+        "offset": query['offset'],
+        "filters": data,
+        "queryTimeMs": round(query_ms, 3)
     }), 200
 
 # ==========================================
@@ -151,33 +437,14 @@ def predict_yield():
     water_availability = data.get('waterAvailability', 'moderate')
     sunlight_hours = float(data.get('sunlight', 6))
     
-    # Simple prediction model (educational purposes)
-    base_yield = {
-        'potato': 20,
-        'tomato': 15
-    }
-    
-    # Calculate predicted yield with simple formula
-    predicted_yield = base_yield[crop] * area
-    
-    # Adjust based on soil quality
-    soil_multipliers = {'poor': 0.7, 'moderate': 1.0, 'good': 1.3}
-    soil_multiplier = soil_multipliers.get(soil_quality.lower(), 1.0)
-    predicted_yield *= soil_multiplier
-    
-    # Adjust based on water
-    water_multipliers = {'low': 0.8, 'moderate': 1.0, 'high': 1.2}
-    water_multiplier = water_multipliers.get(water_availability.lower(), 1.0)
-    predicted_yield *= water_multiplier
-    
-    # Adjust based on sunlight
-    sunlight_multiplier = min(sunlight_hours / 8, 1.2)  # Optimal at 8 hours
-    predicted_yield *= sunlight_multiplier
-    
-    # Round to 2 decimal places
-    predicted_yield = round(predicted_yield, 2)
-    yield_per_hectare = round(predicted_yield / area, 2) if area > 0 else 0
-    confidence = min(85 + int(sunlight_hours * 2), 95)
+    # Trained model when available, else the educational formula (see yield_model.py)
+    result = yield_predictor.predict_one(crop, area, soil_quality, water_availability, sunlight_hours)
+    predicted_yield = result['predicted_yield']
+    yield_per_hectare = result['yield_per_hectare']
+    confidence = result['confidence']
+    soil_multiplier = result['soil_multiplier']
+    water_multiplier = result['water_multiplier']
+    sunlight_multiplier = result['sunlight_multiplier']
     
     # Try to save to database
     try:
@@ -196,7 +463,7 @@ def predict_yield():
             # Log activity
             db.log_activity('predict_yield', crop_type=crop, details=data)
     except Exception as e:
-        print(f"Database save warning: {e}")
+        logger.warning("Database save warning: %s", e)
     
     return jsonify({
         "success": True,
@@ -208,13 +475,172 @@ def predict_yield():
             "soil_modifier": soil_multiplier,
             "water_modifier": water_multiplier,
             "sunlight_modifier": sunlight_multiplier,
-            "description": f"Estimated {predicted_yield} tons yield for {area} hectares of {crop}"
+            "description": f"Estimated {predicted_yield} tons yield for {area} hectares of {crop}",
+            "model": result['model'],
+            "inferenceMs": result['inference_ms']
         },
         "input": data,
         "timestamp": datetime.now().isoformat(),
         "saved": True
     }), 200
 
+BATCH_OUTPUT_FIELDS = [
+    'row', 'cropType', 'area', 'soilQuality', 'waterAvailability', 'sunlight',
+    'predictedYield', 'yieldPerHectare', 'confidence', 'error'
+]
+
+def _read_batch_records():
+    """Read batch rows from a CSV upload, a CSV body or a JSON array"""
+    upload = request.files.get('file')
+    if upload is not None:
+        text = upload.read().decode('utf-8-sig')
+        return list(csv.DictReader(io.StringIO(text)))
+    
+    if request.mimetype == 'text/csv':
+        return list(csv.DictReader(io.StringIO(request.get_data(as_text=True))))
+    
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('fields')
+    if not isinstance(data, list):
+        raise ValueError("Provide a JSON array of fields, {\"fields\": [...]} or a CSV file")
+    return data
+
+@app.route('/api/predict-yield/batch', methods=['POST'])
+def predict_yield_batch():
+    """Predict yields for many fields in one vectorized pass (Potato & Tomato only)"""
+    try:
+        records = _read_batch_records()
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({"error": str(e), "required": list(YIELD_REQUIRED_FIELDS)}), 400
+    
+    if len(records) > YIELD_BATCH_CONFIG['max_rows']:
+        return jsonify({
+            "error": "Too many rows",
+            "maxRows": YIELD_BATCH_CONFIG['max_rows']
+        }), 413
+    
+    columns, errors = columns_from_records(records)
+    result = yield_predictor.predict_batch(columns['crop'], columns['area'], columns['soil'],
+                                           columns['water'], columns['sunlight'])
+    
+    predicted = result['predicted_yield'].tolist()
+    per_hectare = result['yield_per_hectare'].tolist()
+    confidence = result['confidence'].tolist()
+    
+    # Persist all predictions in one bulk insert
+    saved = False
+    try:
+        db = get_db()
+        if db and db.connection and predicted:
+            saved = db.save_yield_predictions_bulk(list(zip(
+                (crop.capitalize() for crop in columns['crop']),
+                columns['area'], columns['soil'], columns['water'], columns['sunlight'],
+                predicted, per_hectare, confidence
+            )))
+            db.log_activity('predict_yield_batch', details={'rows': len(predicted), 'errors': len(errors)})
+    except Exception as e:
+        logger.warning("Database save warning: %s", e)
+    
+    def rows():
+        for i, row in enumerate(columns['row']):
+            yield {
+                "row": row,
+                "cropType": columns['crop'][i].capitalize(),
+                "area": columns['area'][i],
+                "soilQuality": columns['soil'][i],
+                "waterAvailability": columns['water'][i],
+                "sunlight": columns['sunlight'][i],
+                "predictedYield": predicted[i],
+                "yieldPerHectare": per_hectare[i],
+                "confidence": confidence[i]
+            }
+        yield from errors
+    
+    return stream_rows(
+        rows(),
+        requested_format(),
+        BATCH_OUTPUT_FIELDS,
+        chunk_size=YIELD_BATCH_CONFIG['chunk_size'],
+        headers={
+            "X-Row-Count": str(len(predicted)),
+            "X-Error-Count": str(len(errors)),
+            "X-Yield-Model": result['model'],
+            "X-Inference-Ms": str(result['inference_ms']),
+            "X-Saved": str(saved).lower()
+        }
+    )
+
+@app.route('/api/predict-yield/sensitivity', methods=['POST'])
+def predict_yield_sensitivity():
+    """What-if yield grid over soil quality x water availability x sunlight hours"""
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    
+    crop = str(data.get('cropType', '')).lower()
+    if crop not in ['potato', 'tomato']:
+        return jsonify({
+            "error": "Crop not supported in this educational version",
+            "supportedCrops": ["Potato", "Tomato"]
+        }), 400
+    
+    try:
+        area = float(data.get('area', 1))
+    except (TypeError, ValueError):
+        return jsonify({"error": "area must be a number"}), 400
+    if not 0 < area <= YIELD_SENSITIVITY_CONFIG['max_area']:
+        return jsonify({
+            "error": f"area must be between 0 and {YIELD_SENSITIVITY_CONFIG['max_area']} hectares"
+        }), 400
+    
+    grid = yield_predictor.sensitivity(crop, area, YIELD_SENSITIVITY_CONFIG['sunlight_hours'])
+    model, inference_ms = grid.pop('model'), grid.pop('inference_ms')
+    
+    # Best cell of the grid; ties go to the first (least demanding) cell
+    best_value, best = max(
+        ((value, (s, w, h))
+         for s, by_water in enumerate(grid['predictedYield'])
+         for w, by_sun in enumerate(by_water)
+         for h, value in enumerate(by_sun)),
+        key=lambda cell: cell[0]
+    )
+    response = {
+        "success": True,
+        "cropType": crop.capitalize(),
+        "area": area,
+        "unit": "tons",
+        "grid": grid,
+        "best": {
+            "soilQuality": grid['soilQuality'][best[0]],
+            "waterAvailability": grid['waterAvailability'][best[1]],
+            "sunlight": grid['sunlight'][best[2]],
+            "predictedYield": best_value
+        },
+        "model": model,
+        "inferenceMs": inference_ms,
+        "timestamp": datetime.now().isoformat()
+    }
+    
+    # Optional current conditions to compare against
+    if all(data.get(field) is not None for field in ('soilQuality', 'waterAvailability', 'sunlight')):
+        try:
+            current = yield_predictor.predict_one(crop, area, data['soilQuality'], data['waterAvailability'],
+                                                  float(data['sunlight']))
+        except (TypeError, ValueError):
+            return jsonify({"error": "sunlight must be a number"}), 400
+        response["current"] = {
+            "soilQuality": data['soilQuality'],
+            "waterAvailability": data['waterAvailability'],
+            "sunlight": float(data['sunlight']),
+            "predictedYield": current['predicted_yield'],
+            "potentialGain": round(best_value - current['predicted_yield'], 2)
+        }
+    
+    return jsonify(response), 200
+
 @app.route('/api/crops', methods=['GET'])
 def get_supported_crops():
     """
@@ -224,131 +650,186 @@ def get_supported_crops():
     This backend currently supports only Potato and Tomato.
     Other crops are marked as future scope for production.
     """
-    crops = [
-        "Potato",
-        "Tomato"
-    ]
-    
-    return jsonify({
-        "crops": crops,
-        "total": len(crops),
-        "scope": "Educational Mini Project - Potato & Tomato Only",
-        "futureScope": ["Rice", "Wheat", "Corn", "Cotton", "Sugarcane", "Onion"]
-    }), 200
+    return static_payloads.response('crops'), 200
 
 # ==========================================
 # DISEASE DETECTION ENDPOINTS
 # ==========================================
+def _read_detection_upload():
+    """
+    Validate the uploaded leaf image and crop type
+    
+    Returns:
+        (file, crop_type, None) or (None, None, error response)
+    """
+    # Check if image file is provided
+    if 'image' not in request.files:
+        logger.info("[detect-disease] No image file in request")
+        return None, None, (jsonify({
+            "error": "No image provided",
+            "success": False
+        }), 400)
+    
+    file = request.files['image']
+    
+    if file.filename == '':
+        logger.info("[detect-disease] Empty filename")
+        return None, None, (jsonify({
+            "error": "No selected file",
+            "success": False
+        }), 400)
+    
+    # Get crop type from form data
+    crop_type = request.form.get('cropType', 'potato').lower()
+    
+    logger.debug("[detect-disease] Received file: %s, Crop: %s", file.filename, crop_type)
+    
+    # Validate crop type (educational scope: Potato & Tomato only)
+    if crop_type not in ['potato', 'tomato']:
+        logger.info("[detect-disease] Unsupported crop type: %s. Using 'potato' as default", crop_type)
+        crop_type = 'potato'
+    
+    return file, crop_type, None
+
+def _run_detection(image_file, filename, crop_type):
+    """
+    Detect disease in an image, save the result and return the API response body
+    
+    The body has success False (and nothing is saved) when the image fails
+    the quality gate.
+    """
+    data = image_file.read()
+    
+    # Use ML-based detection
+    detection_result = detect_disease_ml(io.BytesIO(data), crop_type)
+    if detection_result.get('rejected'):
+        return {
+            "success": False,
+            "error": "Image rejected by the quality check, please retake the photo",
+            "retake": True,
+            "quality": detection_result['quality'],
+            "filename": filename,
+            "cropType": detection_result['crop']
+        }
+    
+    # Keep a content-addressed copy so the detection can be re-scored later
+    image_sha256 = image_archive.put(data) if IMAGE_ARCHIVE_CONFIG['enabled'] else None
+    
+    # Format result for API response
+    response = format_result(detection_result, filename=filename)
+    
+    # Try to save to database
+    try:
+        db = get_db()
+        if db and db.connection:
+            db.save_disease_detection(
+                crop_type=crop_type.capitalize(),
+                disease_name=detection_result['name'],
+                confidence=detection_result['confidence'],
+                severity=detection_result['severity'],
+                pesticide=detection_result['pesticide'],
+                image_filename=filename,
+                image_sha256=image_sha256
+            )
+            # Log activity
+            db.log_activity('detect_disease', crop_type=crop_type, details={
+                'disease': detection_result['name'],
+                'confidence': detection_result['confidence'],
+                'method': detection_result.get('method', 'Unknown')
+            })
+    except Exception as e:
+        logger.warning("[detect-disease] Database save warning: %s", e)
+    
+    logger.debug("[detect-disease] Detection method: %s", detection_result.get('method', 'Unknown'))
+    return response
+
 @app.route('/api/detect-disease', methods=['POST'])
 def detect_disease():
     """Analyze leaf image for disease detection using ML"""
     
     try:
-        # Check if image file is provided
-        if 'image' not in request.files:
-            print("❌ [detect-disease] No image file in request")
-            return jsonify({
-                "error": "No image provided",
-                "success": False
-            }), 400
+        file, crop_type, error = _read_detection_upload()
+        if error:
+            return error
         
-        file = request.files['image']
-        
-        if file.filename == '':
-            print("❌ [detect-disease] Empty filename")
-            return jsonify({
-                "error": "No selected file",
-                "success": False
-            }), 400
-        
-        # Get crop type from form data
-        crop_type = request.form.get('cropType', 'potato').lower()
-        
-        print(f"📌 [detect-disease] Received file: {file.filename}, Crop: {crop_type}")
-        
-        # Validate crop type (educational scope: Potato & Tomato only)
-        if crop_type not in ['potato', 'tomato']:
-            print(f"⚠️  [detect-disease] Unsupported crop type: {crop_type}. Using 'potato' as default")
-            crop_type = 'potato'
-        
-        # Use ML-based detection
-        print("🤖 [detect-disease] Starting ML disease detection...")
-        detection_result = detect_disease_ml(file, crop_type)
-        
-        # Format result for API response
-        response = format_result(detection_result, filename=file.filename)
-        
-        # Try to save to database
-        try:
-            db = get_db()
-            if db and db.connection:
-                db.save_disease_detection(
-                    crop_type=crop_type.capitalize(),
-                    disease_name=detection_result['name'],
-                    confidence=detection_result['confidence'],
-                    severity=detection_result['severity'],
-                    pesticide=detection_result['pesticide'],
-                    image_filename=file.filename
-                )
-                # Log activity
-                db.log_activity('detect_disease', crop_type=crop_type, details={
-                    'disease': detection_result['name'],
-                    'confidence': detection_result['confidence'],
-                    'method': detection_result.get('method', 'Unknown')
-                })
-                print(f"📊 [detect-disease] Saved to database")
-        except Exception as e:
-            print(f"⚠️  [detect-disease] Database save warning: {e}")
-        
-        print(f"📤 [detect-disease] Sending response with detection method: {detection_result.get('method', 'Unknown')}")
-        return jsonify(response), 200
+        body = _run_detection(file, file.filename, crop_type)
+        return jsonify(body), 200 if body['success'] else 422
         
     except Exception as e:
         # Catch any unexpected errors and return proper error response
         error_msg = str(e)
-        print(f"❌ [detect-disease] Unexpected error: {error_msg}")
+        logger.exception("[detect-disease] Unexpected error: %s", error_msg)
         return jsonify({
             "error": f"Unexpected error: {error_msg}",
             "success": False
         }), 500
 
+@app.route('/api/detect-disease/jobs', methods=['POST'])
+def submit_detection_job():
+    """Queue a leaf image for disease detection and return a job id at once"""
+    file, crop_type, error = _read_detection_upload()
+    if error:
+        return error
+    
+    # The upload is gone once the request ends, so the job gets the bytes
+    image = io.BytesIO(file.read())
+    try:
+        job = detection_jobs.submit(_run_detection, image, file.filename, crop_type)
+    except QueueFullError as e:
+        logger.warning("[detect-disease] %s", e)
+        response = jsonify({
+            "error": "Detection queue is full, try again shortly",
+            "success": False
+        })
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    status_url = f"/api/detect-disease/jobs/{job.id}"
+    response = jsonify({
+        "success": True,
+        **job.to_dict(),
+        "queueDepth": detection_jobs.depth(),
+        "statusUrl": status_url
+    })
+    response.headers['Location'] = status_url
+    return response, 202
+
+@app.route('/api/detect-disease/jobs/<job_id>', methods=['GET'])
+def get_detection_job(job_id):
+    """Poll a detection job; ?wait=<seconds> blocks until it finishes"""
+    job = detection_jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            "error": "Job not found or expired",
+            "success": False
+        }), 404
+    
+    try:
+        wait = min(float(request.args.get('wait', 0)), JOB_QUEUE_CONFIG['max_wait'])
+    except ValueError:
+        return jsonify({"error": "wait must be a number of seconds", "success": False}), 400
+    if wait > 0:
+        job.wait(wait)
+    
+    return jsonify({"success": True, **job.to_dict()}), 200
+
 @app.route('/api/diseases', methods=['GET'])
 def get_disease_database():
-    """Get disease database - Potato & Tomato only"""
-    # === EDUCATIONAL SCOPE: Only diseases affecting Potato & Tomato ===
-    diseases = [
-        {
-            "id": 1,
-            "name": "Early Blight",
-            "crops": ["Tomato", "Potato"],
-            "description": "Fungal disease with circular spots and yellow halos on leaves"
-        },
-        {
-            "id": 2,
-            "name": "Late Blight",
-            "crops": ["Potato", "Tomato"],
-            "description": "Serious fungal disease causing dark water-soaked spots"
-        },
-        {
-            "id": 3,
-            "name": "Septoria Leaf Spot",
-            "crops": ["Tomato"],
-            "description": "Fungal disease affecting tomato leaves with circular lesions"
-        },
-        {
-            "id": 4,
-            "name": "Bacterial Wilt",
-            "crops": ["Potato"],
-            "description": "Bacterial disease causing wilting of potato plants"
-        }
-    ]
-    
-    return jsonify({
-        "diseases": diseases,
-        "total": len(diseases),
-        "scope": "Educational Mini Project - Potato & Tomato Diseases Only",
-        "lastUpdated": datetime.now().isoformat()
-    }), 200
+    """Get disease database - Potato & Tomato only (?crop= for one crop)"""
+    crop = request.args.get('crop')
+    if not crop:
+        return static_payloads.response('diseases'), 200
+    if f'diseases:{crop.lower()}' not in static_payloads:
+        return jsonify({"error": f"Unknown crop: {crop}", "crops": disease_catalog.crops}), 404
+    return static_payloads.response(f'diseases:{crop.lower()}'), 200
+
+@app.route('/api/diseases/<int:disease_id>', methods=['GET'])
+def get_disease(disease_id):
+    """Get one disease from the catalog"""
+    disease = disease_catalog.get(disease_id)
+    if disease is None:
+        return jsonify({"error": "Disease not found", "disease_id": disease_id}), 404
+    return app.response_class(disease.json, mimetype='application/json'), 200
 
 # ==========================================
 # GOVERNMENT SCHEMES ENDPOINTS
@@ -360,21 +841,24 @@ def get_schemes():
     level = request.args.get('level')
     
     try:
-        db = get_db()
-        if db and db.connection:
-            schemes = db.get_government_schemes(scheme_type=scheme_type, level=level)
-            
-            return jsonify({
-                "schemes": schemes,
-                "filters": {
-                    "type": scheme_type,
-                    "level": level
-                },
-                "total": len(schemes),
-                "status": "success"
-            }), 200
+        schemes, source = _read_reference(
+            lambda db: schemes_from_database(
+                db.get_government_schemes(scheme_type=scheme_type, level=level, raise_errors=True)),
+            lambda: gov_schemes.get().find(type=scheme_type, level=level)
+        )
+        
+        return jsonify({
+            "schemes": schemes,
+            "filters": {
+                "type": scheme_type,
+                "level": level
+            },
+            "total": len(schemes),
+            "status": "success",
+            "source": source
+        }), 200
     except Exception as e:
-        print(f"Error fetching schemes: {e}")
+        logger.warning("Error fetching schemes: %s", e)
     
     # Fallback response
     return jsonify({
@@ -387,22 +871,81 @@ def get_schemes():
         "status": "fallback"
     }), 200
 
+@app.route('/api/schemes/search', methods=['GET'])
+def search_schemes():
+    """Ranked free-text search over schemes (?q=, ?type=, ?level=, ?limit=)"""
+    query = (request.args.get('q') or '').strip()
+    scheme_type = request.args.get('type')
+    level = request.args.get('level')
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+    
+    try:
+        limit = int(request.args.get('limit', SCHEME_SEARCH_CONFIG['default_limit']))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if not 1 <= limit <= SCHEME_SEARCH_CONFIG['max_limit']:
+        return jsonify({"error": f"limit must be between 1 and {SCHEME_SEARCH_CONFIG['max_limit']}"}), 400
+    
+    start = time.perf_counter()
+    results = scheme_search.search(query, scheme_type=scheme_type, level=level)
+    query_ms = (time.perf_counter() - start) * 1000
+    
+    return jsonify({
+        "schemes": [{**row, "score": round(score, 3), "matched": matched}
+                    for row, score, matched in results[:limit]],
+        "query": {
+            "q": query,
+            "type": scheme_type,
+            "level": level,
+            "limit": limit
+        },
+        "total": len(results),
+        "queryMs": round(query_ms, 3),
+        "status": "success",
+        "source": "reference"
+    }), 200
+
+@app.route('/api/schemes/eligible', methods=['POST'])
+def eligible_schemes():
+    """Schemes whose eligibility criteria match a farmer profile"""
+    try:
+        profile = parse_profile(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    start = time.perf_counter()
+    matches = scheme_eligibility.get().match(profile)
+    query_ms = (time.perf_counter() - start) * 1000
+    
+    return jsonify({
+        "schemes": [{**row, "unverified": unverified} for row, unverified in matches],
+        "profile": profile,
+        "total": len(matches),
+        "eligible": sum(1 for _, unverified in matches if not unverified),
+        "queryMs": round(query_ms, 3),
+        "status": "success",
+        "source": "reference"
+    }), 200
+
 @app.route('/api/schemes/<int:scheme_id>', methods=['GET'])
 def get_scheme_details(scheme_id):
     """Get detailed information for a specific scheme"""
     
     try:
-        db = get_db()
-        if db and db.connection:
-            schemes = db.get_government_schemes()
-            for scheme in schemes:
-                if scheme['id'] == scheme_id:
-                    return jsonify({
-                        "success": True,
-                        "scheme": scheme
-                    }), 200
+        schemes, source = _read_reference(
+            lambda db: schemes_from_database(
+                [s for s in db.get_government_schemes(raise_errors=True) if s['id'] == scheme_id]),
+            lambda: [s for s in [gov_schemes.get().get(scheme_id)] if s is not None]
+        )
+        if schemes:
+            return jsonify({
+                "success": True,
+                "scheme": schemes[0],
+                "source": source
+            }), 200
     except Exception as e:
-        print(f"Error fetching scheme details: {e}")
+        logger.warning("Error fetching scheme details: %s", e)
     
     return jsonify({
         "error": "Scheme not found",
@@ -429,7 +972,7 @@ def get_prediction_history():
                 "total": len(predictions)
             }), 200
     except Exception as e:
-        print(f"Error fetching prediction history: {e}")
+        logger.warning("Error fetching prediction history: %s", e)
     
     return jsonify({
         "success": False,
@@ -454,7 +997,7 @@ def get_detection_history():
                 "total": len(detections)
             }), 200
     except Exception as e:
-        print(f"Error fetching detection history: {e}")
+        logger.warning("Error fetching detection history: %s", e)
     
     return jsonify({
         "success": False,
@@ -462,6 +1005,68 @@ def get_detection_history():
         "message": "Could not fetch detection history"
     }), 200
 
+# ==========================================
+# EXPORT ENDPOINTS
+# ==========================================
+def _export_date_range():
+    """Parse ?from= (inclusive) and ?to= (exclusive) ISO dates; raises ValueError"""
+    since = request.args.get('from')
+    until = request.args.get('to')
+    return (datetime.fromisoformat(since) if since else None,
+            datetime.fromisoformat(until) if until else None)
+
+def _stream_export(name, export, fieldnames):
+    """Stream rows from a DatabaseManager export method as CSV or NDJSON"""
+    try:
+        since, until = _export_date_range()
+    except ValueError:
+        return jsonify({"error": "from and to must be ISO dates (YYYY-MM-DD)", "success": False}), 400
+    
+    db = get_db()
+    if not (db and db.connection):
+        return jsonify({"error": "Database unavailable", "success": False}), 503
+    try:
+        rows = export(db, since, until)
+    except Exception as e:
+        logger.warning("Error starting %s export: %s", name, e)
+        return jsonify({"error": "Could not start export", "success": False}), 503
+    
+    try:
+        return stream_rows(
+            rows,
+            requested_format(default='csv'),
+            fieldnames,
+            chunk_size=EXPORT_CONFIG['chunk_size'],
+            filename=f"{name}_{datetime.now().strftime('%Y%m%d')}"
+        )
+    except Exception:
+        rows.close()
+        raise
+
+@app.route('/api/export/predictions', methods=['GET'])
+def export_predictions():
+    """Stream the full yield prediction history (?crop=, ?from=, ?to= exclusive, ?format=csv|ndjson)"""
+    crop_type = request.args.get('crop')
+    return _stream_export(
+        'prediction_history',
+        lambda db, since, until: db.export_yield_predictions(
+            crop_type=crop_type, since=since, until=until, fetch_size=EXPORT_CONFIG['fetch_size']),
+        DatabaseManager.PREDICTION_EXPORT_COLUMNS
+    )
+
+@app.route('/api/export/detections', methods=['GET'])
+def export_detections():
+    """Stream the full disease detection history (?crop=, ?disease=, ?from=, ?to= exclusive, ?format=csv|ndjson)"""
+    crop_type = request.args.get('crop')
+    disease_name = request.args.get('disease')
+    return _stream_export(
+        'detection_history',
+        lambda db, since, until: db.export_disease_detections(
+            crop_type=crop_type, disease_name=disease_name, since=since, until=until,
+            fetch_size=EXPORT_CONFIG['fetch_size']),
+        DatabaseManager.DETECTION_EXPORT_COLUMNS
+    )
+
 @app.route('/api/analytics/yield/<crop>', methods=['GET'])
 def get_yield_analytics(crop):
     """Get yield prediction analytics for a crop"""
@@ -476,7 +1081,7 @@ def get_yield_analytics(crop):
                     "statistics": stats
                 }), 200
     except Exception as e:
-        print(f"Error fetching yield analytics: {e}")
+        logger.warning("Error fetching yield analytics: %s", e)
     
     return jsonify({
         "success": False,
@@ -499,7 +1104,7 @@ def get_disease_analytics(crop):
                 "total": len(diseases)
             }), 200
     except Exception as e:
-        print(f"Error fetching disease analytics: {e}")
+        logger.warning("Error fetching disease analytics: %s", e)
     
     return jsonify({
         "success": False,
@@ -524,7 +1129,7 @@ def get_activity():
                 "total": len(logs)
             }), 200
     except Exception as e:
-        print(f"Error fetching activity log: {e}")
+        logger.warning("Error fetching activity log: %s", e)
     
     return jsonify({
         "success": False,
@@ -532,6 +1137,36 @@ def get_activity():
         "message": "Could not fetch activity log"
     }), 200
 
+@app.route('/api/activity/stream', methods=['GET'])
+def stream_activity():
+    """Push new activity events over Server-Sent Events"""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    subscriber = activity_events.subscribe(last_event_id, activity_type=request.args.get('type'))
+    if subscriber is None:
+        response = jsonify({
+            "success": False,
+            "message": "Too many activity stream subscribers"
+        })
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    
+    response = Response(
+        sse_events(activity_events, subscriber, heartbeat=ACTIVITY_STREAM_CONFIG['heartbeat_seconds']),
+        mimetype='text/event-stream',
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # disable proxy buffering (nginx)
+        }
+    )
+    # Also when the body is never iterated (client gone before the first byte)
+    response.call_on_close(lambda: activity_events.unsubscribe(subscriber))
+    return response
+
 # ==========================================
 # ERROR HANDLERS
 # ==========================================
@@ -567,36 +1202,7 @@ def method_not_allowed(error):
 @app.route('/api/info', methods=['GET'])
 def api_info():
     """API information and available endpoints"""
-    endpoints = {
-        "Health": {
-            "GET /api/health": "Server health check"
-        },
-        "Market Prices": {
-            "GET /api/prices": "Get market prices",
-            "POST /api/prices/search": "Advanced price search"
-        },
-        "Yield Prediction": {
-            "POST /api/predict-yield": "Predict crop yield",
-            "GET /api/crops": "Get supported crops"
-        },
-        "Disease Detection": {
-            "POST /api/detect-disease": "Analyze leaf image",
-            "GET /api/diseases": "Get disease database"
-        },
-        "Government Schemes": {
-            "GET /api/schemes": "Get schemes",
-            "GET /api/schemes/<id>": "Get scheme details"
-        }
-    }
-    
-    return jsonify({
-        "apiName": "AI Agriculture Assistant",
-        "version": "1.0.0",
-        "status": "Development",
-        "disclaimer": "Educational and demonstration purposes only",
-        "endpoints": endpoints,
-        "baseUrl": "http://localhost:5000/api"
-    }), 200
+    return static_payloads.response('info'), 200
 
 # ==========================================
 # MAIN ENTRY POINT
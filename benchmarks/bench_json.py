@@ -0,0 +1,82 @@
+"""
+JSON Serialization Microbenchmark
+Compares per-endpoint serialization time of stdlib json (Flask default),
+the fast JSON provider and the preserialized static payloads
+
+Usage:
+    python benchmarks/bench_json.py [--iterations 20000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as backend  # noqa: E402
+from json_provider import ORJSON_AVAILABLE, dumps_bytes, loads, static_payloads  # noqa: E402
+
+
+def _reference_payloads():
+    """Dynamic payloads shaped like the reference endpoints"""
+    base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(base, 'market_prices.json'), encoding='utf-8') as f:
+        prices = json.load(f)['prices']
+    with open(os.path.join(base, 'gov_schemes.json'), encoding='utf-8') as f:
+        schemes = json.load(f)['schemes']
+
+    return {
+        'prices': {"data": prices, "total": len(prices), "status": "success"},
+        'schemes': {"schemes": schemes, "total": len(schemes), "status": "success"}
+    }
+
+
+def _time_per_call(func, iterations):
+    """Average seconds per call of func"""
+    return timeit.timeit(func, number=iterations) / iterations
+
+
+def run(iterations):
+    payloads = {name: loads(static_payloads.body(name)) for name in static_payloads.names()}
+    payloads.update(_reference_payloads())
+
+    results = {}
+    for name, payload in payloads.items():
+        stdlib = _time_per_call(lambda: json.dumps(payload, indent=2).encode('utf-8'), iterations)
+        fast = _time_per_call(lambda: dumps_bytes(payload), iterations)
+        row = {
+            'stdlib_pretty_us': round(stdlib * 1e6, 2),
+            'fast_provider_us': round(fast * 1e6, 2),
+            'speedup': round(stdlib / fast, 1) if fast else None,
+            'bytes_pretty': len(json.dumps(payload, indent=2).encode('utf-8')),
+            'bytes_compact': len(dumps_bytes(payload))
+        }
+        if name in static_payloads.names():
+            cached = _time_per_call(lambda: static_payloads.body(name), iterations)
+            row['preserialized_us'] = round(cached * 1e6, 3)
+        results[name] = row
+
+    # End-to-end request time through the Flask test client
+    # (mark the database as unavailable so requests skip connection attempts)
+    backend.app.db = False
+    client = backend.app.test_client()
+    for name, path in (('crops', '/api/crops'), ('diseases', '/api/diseases'), ('info', '/api/info')):
+        per_request = _time_per_call(lambda: client.get(path), max(1, iterations // 20))
+        results[name]['request_us'] = round(per_request * 1e6, 1)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"orjson available: {ORJSON_AVAILABLE}")
+    print(json.dumps(run(args.iterations), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Price Search Benchmark
+Times PriceIndex queries over a large synthetic set of mandi rows, and
+checks that walking every page of a sort over tied keys returns each
+matching row exactly once (exit status 1 when it does not)
+
+Usage:
+    python benchmarks/bench_price_search.py [--rows 500000] [--repeat 200]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_index import PriceIndex  # noqa: E402
+
+CROPS = ['Potato', 'Tomato', 'Onion', 'Rice', 'Wheat', 'Cotton', 'Maize', 'Soybean']
+STATES = ['Uttar Pradesh', 'Punjab', 'West Bengal', 'Karnataka', 'Maharashtra', 'Andhra Pradesh',
+          'Telangana', 'Gujarat', 'Bihar', 'Madhya Pradesh', 'Rajasthan', 'Tamil Nadu']
+MONTHS = ['January 2026', 'February 2026', 'March 2026', 'April 2026']
+
+
+def generate_rows(count, seed=42):
+    rng = np.random.default_rng(seed)
+    current = rng.integers(800, 6000, count)
+    spread = rng.integers(100, 800, count)
+    trend = np.round(rng.normal(0, 4, count), 1)
+    crops = rng.integers(0, len(CROPS), count)
+    states = rng.integers(0, len(STATES), count)
+    months = rng.integers(0, len(MONTHS), count)
+    return [
+        {
+            "id": i + 1,
+            "crop": CROPS[crops[i]],
+            "state": STATES[states[i]],
+            "currentPrice": int(current[i]),
+            "averagePrice": int(current[i] - spread[i] // 3),
+            "minPrice": int(current[i] - spread[i]),
+            "maxPrice": int(current[i] + spread[i]),
+            "trend": float(trend[i]),
+            "month": MONTHS[months[i]]
+        }
+        for i in range(count)
+    ]
+
+
+QUERIES = {
+    'crop_state_top10': dict(keywords={'crop': ['Tomato'], 'state': ['Karnataka']},
+                             sort_by='currentPrice', descending=True, limit=10),
+    'price_range_page': dict(ranges={'currentPrice': (2000, 2100)}, sort_by='trend', limit=20, offset=40),
+    'crop_rising_range': dict(keywords={'crop': ['Onion']}, ranges={'trend': (2.0, None), 'maxPrice': (None, 3000)},
+                              sort_by='maxPrice', limit=20),
+    'global_top5_trend': dict(sort_by='trend', descending=True, limit=5),
+    'narrow_range_unsorted': dict(ranges={'minPrice': (1500, 1501)}, limit=20)
+}
+
+
+# Sorts over heavily tied keys, walked page by page
+PAGED_QUERIES = {
+    'state_by_trend_sign': dict(keywords={'state': ['Punjab']}, sort_by='trend'),
+    'state_by_crop_desc': dict(keywords={'state': ['Bihar']}, sort_by='crop', descending=True),
+    'trend_band_desc': dict(sort_by='trend', descending=True, ranges={'trend': (-1.0, 1.0)}),
+    'presorted_desc': dict(sort_by='currentPrice', descending=True)
+}
+
+
+def page_errors(index, query, page_size):
+    """(missing, repeated) row counts over every page of a query"""
+    total, _ = index.search(**query, limit=0)
+    seen = []
+    for offset in range(0, total, page_size):
+        _, page = index.search(**query, limit=page_size, offset=offset)
+        seen.extend(row['id'] for row in page)
+    return total - len(set(seen)), len(seen) - len(set(seen))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    rows = generate_rows(args.rows)
+    start = time.perf_counter()
+    index = PriceIndex(rows)
+    build_s = time.perf_counter() - start
+
+    results = {'rows': args.rows, 'build_seconds': round(build_s, 3), 'queries': {}}
+    for name, query in QUERIES.items():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            total, _ = index.search(**query)
+            timings.append(time.perf_counter() - start)
+        timings = np.array(timings) * 1000
+        results['queries'][name] = {
+            'matches': total,
+            'p50_ms': round(float(np.percentile(timings, 50)), 3),
+            'p99_ms': round(float(np.percentile(timings, 99)), 3)
+        }
+
+    # Few distinct keys, so most rows tie
+    tied = [dict(row, currentPrice=row['currentPrice'] % 3 + 1, trend=float(np.sign(row['trend'])))
+            for row in rows[:20000]]
+    tied_index = PriceIndex(tied)
+    failures = 0
+    results['pagination'] = {}
+    for name, query in PAGED_QUERIES.items():
+        missing, repeated = page_errors(tied_index, query, page_size=100)
+        results['pagination'][name] = {'missing': missing, 'repeated': repeated}
+        failures += missing + repeated
+
+    print(json.dumps(results, indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
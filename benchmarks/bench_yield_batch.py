@@ -0,0 +1,86 @@
+"""
+Batch Yield Prediction Benchmark
+Measures rows/second of the vectorized batch path against the scalar
+per-field formula, and end-to-end through /api/predict-yield/batch
+
+Usage:
+    python benchmarks/bench_yield_batch.py [--rows 10000 100000]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as backend  # noqa: E402
+from yield_model import columns_from_records, predict_batch, predict_one  # noqa: E402
+
+
+def generate_records(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "cropType": rng.choice(['Potato', 'Tomato']),
+            "area": round(rng.uniform(0.2, 20), 2),
+            "soilQuality": rng.choice(['poor', 'moderate', 'good']),
+            "waterAvailability": rng.choice(['low', 'moderate', 'high']),
+            "sunlight": round(rng.uniform(3, 12), 1)
+        }
+        for _ in range(count)
+    ]
+
+
+def _rate(count, seconds):
+    return round(count / seconds) if seconds else None
+
+
+def run(count):
+    records = generate_records(count)
+
+    start = time.perf_counter()
+    for r in records:
+        predict_one(r['cropType'].lower(), r['area'], r['soilQuality'], r['waterAvailability'], r['sunlight'])
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns, _ = columns_from_records(records)
+    parse_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predict_batch(columns['crop'], columns['area'], columns['soil'], columns['water'], columns['sunlight'])
+    vector_s = time.perf_counter() - start
+
+    # End to end: JSON in, streamed NDJSON out (database marked unavailable)
+    backend.app.db = False
+    backend.app.extensions['rate_limiter'].enabled = False
+    client = backend.app.test_client()
+    start = time.perf_counter()
+    response = client.post('/api/predict-yield/batch', json=records)
+    body = response.get_data()
+    e2e_s = time.perf_counter() - start
+
+    return {
+        'rows': count,
+        'scalar_rows_per_s': _rate(count, scalar_s),
+        'validate_rows_per_s': _rate(count, parse_s),
+        'vectorized_rows_per_s': _rate(count, vector_s),
+        'endpoint_rows_per_s': _rate(count, e2e_s),
+        'endpoint_seconds': round(e2e_s, 3),
+        'response_bytes': len(body)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(json.dumps([run(count) for count in args.rows], indent=2))
+
+
+if __name__ == '__main__':
+    main()
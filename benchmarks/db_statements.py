@@ -0,0 +1,152 @@
+"""
+Prepared Statement Benchmark
+Replays the per-request writes of /api/detect-disease (save_disease_detection
+plus log_activity) with and without the prepared statement cache and
+reports throughput, client CPU per operation, protocol round trips per
+operation and the server's statement counters as JSON
+
+Runs against the MySQL server configured by DB_HOST, DB_USER,
+DB_PASSWORD and DB_NAME. With --sqlite it uses the stand-in database,
+which only shows the client-side cost of the cursor handling. Rows
+written by the benchmark are deleted afterwards.
+
+Usage:
+    python benchmarks/db_statements.py [--ops 5000] [--repeat 3] [--sqlite]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv  # noqa: E402
+
+import config  # noqa: E402
+import database  # noqa: E402
+
+MARKER = 'bench-prepared-statements'
+SERVER_COUNTERS = ('Com_insert', 'Com_stmt_prepare', 'Com_stmt_execute', 'Com_stmt_reset', 'Com_stmt_close')
+
+
+def connect(use_sqlite):
+    if use_sqlite:
+        from sqlite_database import SQLiteDatabaseManager
+
+        db = SQLiteDatabaseManager()
+        db.connect()
+        return db
+    db = database.DatabaseManager(os.getenv('DB_HOST', 'localhost'), os.getenv('DB_USER', 'root'),
+                                  os.getenv('DB_PASSWORD', ''), os.getenv('DB_NAME', 'ai_agriculture_assistant'))
+    if not db.connect():
+        raise SystemExit("Could not connect to MySQL (use --sqlite for the stand-in database)")
+    return db
+
+
+class RoundTrips:
+    """Counts protocol commands sent by a pure-Python mysql-connector connection"""
+
+    def __init__(self, connection):
+        self.count = 0
+        self.supported = hasattr(connection, '_send_cmd')
+        if self.supported:
+            send = connection._send_cmd
+
+            def counted(*args, **kwargs):
+                self.count += 1
+                return send(*args, **kwargs)
+
+            connection._send_cmd = counted
+
+
+def server_counters(db):
+    if not hasattr(db.connection, '_send_cmd'):
+        return None
+    cursor = db.connection.cursor()
+    try:
+        cursor.execute("SHOW SESSION STATUS WHERE Variable_name IN (%s)" % ', '.join(['%s'] * len(SERVER_COUNTERS)),
+                       SERVER_COUNTERS)
+        return {name: int(value) for name, value in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def detection_writes(db, i):
+    """What _run_detection writes for one request"""
+    db.save_disease_detection('Potato', 'Early Blight', 80 + i % 15, 'Moderate', 'Mancozeb 75% WP', MARKER)
+    db.log_activity('bench_detect_disease', crop_type='potato',
+                    details={'disease': 'Early Blight', 'confidence': 80 + i % 15, 'method': 'Feature Analysis'})
+
+
+def run(db, trips, prepared, ops, warmup):
+    config.STATEMENT_CACHE_CONFIG['enabled'] = prepared
+    for i in range(warmup):
+        detection_writes(db, i)
+
+    before = server_counters(db)
+    trips.count = 0
+    wall, cpu = time.perf_counter(), time.process_time()
+    for i in range(ops):
+        detection_writes(db, i)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    trips_used = trips.count
+    after = server_counters(db)
+
+    return {
+        'ops_per_s': round(ops / wall, 1),
+        'wall_us_per_op': round(wall / ops * 1e6, 1),
+        'cpu_us_per_op': round(cpu / ops * 1e6, 1),
+        'round_trips_per_op': round(trips_used / ops, 2) if trips.supported else None,
+        'server_counters_per_op': {name: round((after[name] - before[name]) / ops, 2) for name in after}
+        if before else None
+    }
+
+
+def cleanup(db):
+    config.STATEMENT_CACHE_CONFIG['enabled'] = False
+    cursor = db.connection.cursor()
+    cursor.execute("DELETE FROM disease_detections WHERE image_filename = %s", (MARKER,))
+    cursor.execute("DELETE FROM user_activity WHERE activity_type = %s", ('bench_detect_disease',))
+    db.connection.commit()
+    cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--ops', type=int, default=5000, help='detection writes per measurement')
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3, help='alternating rounds per mode; the best is reported')
+    parser.add_argument('--sqlite', action='store_true', help='use the SQLite stand-in database')
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.getLogger('database').setLevel(logging.WARNING)
+    config.ACTIVITY_LOG_CONFIG['sample_rates'].pop('bench_detect_disease', None)
+    db = connect(args.sqlite)
+    trips = RoundTrips(db.connection)
+
+    results = {'text': [], 'prepared': []}
+    try:
+        for _ in range(args.repeat):
+            for mode in ('text', 'prepared'):
+                results[mode].append(run(db, trips, mode == 'prepared', args.ops, args.warmup))
+    finally:
+        cleanup(db)
+
+    best = {mode: min(rounds, key=lambda r: r['wall_us_per_op']) for mode, rounds in results.items()}
+    report = {
+        'database': 'sqlite-stand-in' if args.sqlite else f"mysql://{db.host}/{db.database}",
+        'ops': args.ops,
+        'repeat': args.repeat,
+        **best,
+        'speedup': round(best['text']['wall_us_per_op'] / best['prepared']['wall_us_per_op'], 2),
+        'cpu_saving_pct': round((1 - best['prepared']['cpu_us_per_op'] / best['text']['cpu_us_per_op']) * 100, 1)
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Scheme Eligibility Benchmark
+Times EligibilityIndex on a synthetic catalog of central and state
+schemes (default 5,000) against evaluating every scheme's criteria in a
+Python loop, and checks both return the same schemes
+
+Usage:
+    python benchmarks/eligibility_matching.py [--schemes 5000] [--profiles 2000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheme_eligibility import CHOICES, EligibilityIndex  # noqa: E402
+
+STATES = [f'state {i}' for i in range(36)]
+CROPS = ['rice', 'wheat', 'maize', 'potato', 'tomato', 'onion', 'cotton', 'sugarcane', 'pulses', 'millets']
+CHOICE_CRITERIA = {'irrigation': 'irrigation', 'categories': 'category', 'landOwnership': 'landOwnership',
+                   'farmerTypes': 'farmerType'}
+
+
+def synthetic_schemes(count, rng):
+    schemes = []
+    for i in range(count):
+        criteria = {}
+        if rng.random() < 0.8:  # most schemes are state schemes
+            criteria['states'] = [STATES[i % len(STATES)]]
+        if rng.random() < 0.4:
+            criteria['crops'] = list(rng.choice(CROPS, size=rng.integers(1, 4), replace=False))
+        for key, field in CHOICE_CRITERIA.items():
+            if rng.random() < 0.3:
+                criteria[key] = [str(rng.choice(CHOICES[field]))]
+        if rng.random() < 0.3:
+            low = float(rng.choice([0, 0.5, 1, 2, 4]))
+            criteria['landHectares'] = {'min': low, 'max': low + float(rng.choice([1, 2, 5, 10]))}
+        schemes.append({'id': i + 1, 'eligibilityCriteria': criteria})
+    return schemes
+
+
+def synthetic_profile(rng):
+    profile = {'state': str(rng.choice(STATES)), 'crops': list(rng.choice(CROPS, size=2, replace=False)),
+               'landHectares': float(rng.choice([0.5, 1, 1.5, 2, 3, 6, 12]))}
+    for field in CHOICES:
+        profile[field] = str(rng.choice(CHOICES[field]))
+    return profile
+
+
+def loop_match(schemes, profile):
+    """Reference: every criterion of every scheme checked in Python"""
+    matched = []
+    for i, scheme in enumerate(schemes):
+        c = scheme['eligibilityCriteria']
+        if c.get('states') and profile['state'] not in c['states']:
+            continue
+        if c.get('crops') and not set(profile['crops']) & set(c['crops']):
+            continue
+        if any(c.get(key) and profile[field] not in c[key] for key, field in CHOICE_CRITERIA.items()):
+            continue
+        land = c.get('landHectares')
+        if land and not land.get('min', -np.inf) <= profile['landHectares'] <= land.get('max', np.inf):
+            continue
+        matched.append(i)
+    return matched
+
+
+def percentiles(seconds):
+    us = np.asarray(seconds) * 1e6
+    return {'p50_us': round(float(np.percentile(us, 50)), 1), 'p99_us': round(float(np.percentile(us, 99)), 1),
+            'mean_us': round(float(us.mean()), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--schemes', type=int, default=5000)
+    parser.add_argument('--profiles', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(11)
+    schemes = synthetic_schemes(args.schemes, rng)
+    start = time.perf_counter()
+    index = EligibilityIndex(schemes)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    bitset_times, loop_times, mismatches, matched = [], [], 0, 0
+    for _ in range(args.profiles):
+        profile = synthetic_profile(rng)
+
+        start = time.perf_counter()
+        result = index.match(profile)
+        bitset_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        expected = loop_match(schemes, profile)
+        loop_times.append(time.perf_counter() - start)
+
+        matched += len(result)
+        if sorted(row['id'] - 1 for row, _ in result) != expected:
+            mismatches += 1
+
+    print(json.dumps({
+        'schemes': args.schemes,
+        'profiles': args.profiles,
+        'compile_ms': round(compile_ms, 1),
+        'mean_matches': round(matched / args.profiles, 1),
+        'bitset': percentiles(bitset_times),
+        'python_loop': percentiles(loop_times),
+        'mismatches': mismatches
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,304 @@
+"""
+Load Test Harness
+Drives a realistic endpoint mix against the Flask app (in process, with
+the SQLite stand-in database) or a running server, and reports
+throughput, latency percentiles and error rates per endpoint as JSON
+
+With --rate > 0 arrivals follow a Poisson process (open loop) and
+latency is measured from each request's scheduled start, so queueing
+shows up in the percentiles instead of slowing the client down. With
+--rate 0 every worker sends requests back to back (closed loop).
+
+A server given with --url must run with RATELIMIT_ENABLED=False: the
+default limits answer most of the load with 429. The harness stops when
+a warm-up request is rate limited and prints no report when more than
+--max-rate-limited of the measured requests got 429.
+
+Usage:
+    python benchmarks/load_test.py [--duration 30] [--concurrency 16] [--rate 100]
+        [--mix prices=35,schemes=25,predict=30,detect=10] [--url http://localhost:5000]
+        [--max-rate-limited 0.05]
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_MIX = 'prices=35,schemes=25,predict=30,detect=10'
+CROPS = ['Potato', 'Tomato']
+PRICE_CROPS = [None, 'Potato', 'Tomato', 'Onion', 'Rice', 'Wheat']
+SCHEME_FILTERS = [{}, {'level': 'central'}, {'type': 'subsidy'}, {'type': 'insurance', 'level': 'central'}]
+
+
+# ==========================================
+# REQUEST MIX
+# ==========================================
+
+def generate_images(count, size=(640, 480), seed=11):
+    """JPEG leaf-like images: green noise with a few brown lesions"""
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        pixels = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        pixels[..., 0] = rng.integers(20, 90, pixels.shape[:2])
+        pixels[..., 1] = rng.integers(100, 200, pixels.shape[:2])
+        pixels[..., 2] = rng.integers(20, 80, pixels.shape[:2])
+        for _ in range(rng.integers(0, 12)):
+            y, x = rng.integers(0, size[1] - 40), rng.integers(0, size[0] - 40)
+            r = rng.integers(5, 40)
+            pixels[y:y + r, x:x + r] = (110, 70, 30)
+        buf = io.BytesIO()
+        Image.fromarray(pixels).save(buf, format='JPEG', quality=85)
+        images.append(buf.getvalue())
+    return images
+
+
+def build_request(name, rng, images):
+    """(method, path, options) for one request of the named scenario"""
+    if name == 'prices':
+        crop = rng.choice(PRICE_CROPS)
+        return 'GET', '/api/prices' + (f'?crop={crop}' if crop else ''), {}
+    if name == 'schemes':
+        query = '&'.join(f'{k}={v}' for k, v in rng.choice(SCHEME_FILTERS).items())
+        return 'GET', '/api/schemes' + (f'?{query}' if query else ''), {}
+    if name == 'predict':
+        return 'POST', '/api/predict-yield', {'json': {
+            'cropType': rng.choice(CROPS),
+            'area': round(rng.uniform(0.2, 20), 2),
+            'soilQuality': rng.choice(['poor', 'moderate', 'good']),
+            'waterAvailability': rng.choice(['low', 'moderate', 'high']),
+            'sunlight': round(rng.uniform(3, 12), 1)
+        }}
+    if name == 'detect':
+        return 'POST', '/api/detect-disease', {
+            'files': {'image': ('leaf.jpg', rng.choice(images))},
+            'data': {'cropType': rng.choice(CROPS).lower()}
+        }
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+def parse_mix(spec):
+    """'prices=35,detect=10' -> (names, weights)"""
+    names, weights = [], []
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        names.append(name.strip())
+        weights.append(float(weight or 1))
+    return names, weights
+
+
+# ==========================================
+# CLIENTS
+# ==========================================
+
+class InProcessClient:
+    """Flask test client per thread, against the app with a stand-in database"""
+
+    def __init__(self, db_path=None):
+        import app as backend
+        from sqlite_database import install
+
+        install(backend.app, db_path)
+        backend.app.extensions['rate_limiter'].enabled = False
+        for name in ('app', 'database', 'ml_disease_detection', 'jobs'):
+            logging.getLogger(name).setLevel(logging.WARNING)
+        self.app = backend.app
+        self._local = threading.local()
+
+    def request(self, method, path, json=None, files=None, data=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        if files:
+            form = dict(data or {})
+            for field, (filename, content) in files.items():
+                form[field] = (io.BytesIO(content), filename)
+            response = client.open(path, method=method, data=form, content_type='multipart/form-data')
+        else:
+            response = client.open(path, method=method, json=json)
+        response.get_data()
+        return response.status_code
+
+
+class HttpClient:
+    """requests.Session per thread against a running server"""
+
+    def __init__(self, base_url):
+        import requests
+
+        self._requests = requests
+        self.base_url = base_url.rstrip('/')
+        self._local = threading.local()
+
+    def request(self, method, path, json=None, files=None, data=None):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self._requests.Session()
+        response = session.request(method, self.base_url + path, json=json, files=files, data=data, timeout=60)
+        response.content
+        return response.status_code
+
+
+# ==========================================
+# RUNNER
+# ==========================================
+
+class Recorder:
+    """Latencies and status codes per scenario"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+
+    def record(self, name, seconds, status):
+        with self._lock:
+            self.latencies.setdefault(name, []).append(seconds)
+            counts = self.statuses.setdefault(name, {})
+            counts[status] = counts.get(status, 0) + 1
+
+
+def _send(client, recorder, name, request, started):
+    method, path, options = request
+    try:
+        status = client.request(method, path, **options)
+    except Exception as e:
+        status = type(e).__name__
+    recorder.record(name, time.perf_counter() - started, status)
+
+
+def run_closed_loop(client, recorder, names, weights, duration, concurrency, images, seed):
+    deadline = time.perf_counter() + duration
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            _send(client, recorder, name, build_request(name, rng, images), time.perf_counter())
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_open_loop(client, recorder, names, weights, duration, concurrency, rate, images, seed):
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    next_arrival = start
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while True:
+            next_arrival += rng.expovariate(rate)
+            if next_arrival - start >= duration:
+                break
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            name = rng.choices(names, weights)[0]
+            pool.submit(_send, client, recorder, name, build_request(name, rng, images), next_arrival)
+
+
+def summarize(recorder, elapsed):
+    def stats(latencies, statuses):
+        ms = np.asarray(latencies) * 1000
+        total = int(ms.size)
+        errors = sum(count for status, count in statuses.items()
+                     if not isinstance(status, int) or status >= 400)
+        return {
+            'requests': total,
+            'throughput_rps': round(total / elapsed, 1),
+            'errors': errors,
+            'error_rate': round(errors / total, 4) if total else 0.0,
+            'status_counts': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+            'latency_ms': {
+                'mean': round(float(ms.mean()), 2),
+                'p50': round(float(np.percentile(ms, 50)), 2),
+                'p90': round(float(np.percentile(ms, 90)), 2),
+                'p99': round(float(np.percentile(ms, 99)), 2),
+                'max': round(float(ms.max()), 2)
+            } if total else {}
+        }
+
+    endpoints = {name: stats(recorder.latencies[name], recorder.statuses[name])
+                 for name in sorted(recorder.latencies)}
+    all_statuses = {}
+    for statuses in recorder.statuses.values():
+        for status, count in statuses.items():
+            all_statuses[status] = all_statuses.get(status, 0) + count
+    overall = stats([s for values in recorder.latencies.values() for s in values], all_statuses)
+    return endpoints, overall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--duration', type=float, default=30, help='seconds of load')
+    parser.add_argument('--concurrency', type=int, default=16, help='worker threads')
+    parser.add_argument('--rate', type=float, default=0, help='arrivals per second (0 = closed loop)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='scenario weights')
+    parser.add_argument('--url', help='base URL of a running server (default: in process)')
+    parser.add_argument('--db-path', help='SQLite file for the in-process stand-in database')
+    parser.add_argument('--images', type=int, default=8, help='distinct generated leaf images')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    parser.add_argument('--max-rate-limited', type=float, default=0.05,
+                        help='largest share of 429 responses that still gives a report')
+    args = parser.parse_args()
+
+    names, weights = parse_mix(args.mix)
+    images = generate_images(args.images)
+    client = HttpClient(args.url) if args.url else InProcessClient(args.db_path)
+
+    # Warm caches and lazily built state outside the measurement
+    warm_rng = random.Random(0)
+    for name in names:
+        method, path, options = build_request(name, warm_rng, images)
+        if client.request(method, path, **options) == 429:
+            raise SystemExit(f"Warm-up request to {path} was rate limited; "
+                             "run the server with RATELIMIT_ENABLED=False")
+
+    recorder = Recorder()
+    start = time.perf_counter()
+    if args.rate > 0:
+        run_open_loop(client, recorder, names, weights, args.duration, args.concurrency, args.rate, images, args.seed)
+    else:
+        run_closed_loop(client, recorder, names, weights, args.duration, args.concurrency, images, args.seed)
+    elapsed = time.perf_counter() - start
+
+    endpoints, overall = summarize(recorder, elapsed)
+    limited = overall['status_counts'].get('429', 0)
+    if overall['requests'] and limited / overall['requests'] > args.max_rate_limited:
+        raise SystemExit(f"{limited} of {overall['requests']} requests were rate limited (429), so the "
+                         "numbers measure the limiter; run the server with RATELIMIT_ENABLED=False")
+    report = {
+        'target': args.url or 'in-process',
+        'mode': 'open' if args.rate > 0 else 'closed',
+        'duration_s': round(elapsed, 2),
+        'concurrency': args.concurrency,
+        'rate': args.rate or None,
+        'mix': dict(zip(names, weights)),
+        'overall': overall,
+        'endpoints': endpoints
+    }
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
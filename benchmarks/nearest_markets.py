@@ -0,0 +1,95 @@
+"""
+Nearest Market Benchmark
+Times MarketIndex.nearest on a synthetic national-scale market set
+(default 7,000 mandis spread over India's bounding box) against a
+brute-force haversine scan, and checks both return the same markets
+
+Usage:
+    python benchmarks/nearest_markets.py [--markets 7000] [--queries 5000] [--k 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_locator import MarketIndex, haversine_km  # noqa: E402
+
+CROPS = ['Potato', 'Tomato', 'Onion', 'Rice', 'Wheat']
+STATES = [f'State {i}' for i in range(30)]
+LAT_RANGE = (8.0, 35.0)
+LON_RANGE = (68.0, 97.0)
+
+
+def synthetic_markets(count, seed=7):
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(*LAT_RANGE, count)
+    lons = rng.uniform(*LON_RANGE, count)
+    markets = []
+    for i in range(count):
+        crops = [crop for crop in CROPS if rng.random() < 0.5] or [CROPS[0]]
+        markets.append({'id': i + 1, 'name': f'Mandi {i + 1}', 'state': STATES[i % len(STATES)],
+                        'latitude': float(lats[i]), 'longitude': float(lons[i]), 'crops': crops})
+    prices = [{'crop': crop, 'state': state, 'currentPrice': 1000 + 100 * j}
+              for j, crop in enumerate(CROPS) for state in STATES]
+    return markets, prices
+
+
+def percentiles(seconds):
+    us = np.asarray(seconds) * 1e6
+    return {'p50_us': round(float(np.percentile(us, 50)), 1), 'p99_us': round(float(np.percentile(us, 99)), 1),
+            'mean_us': round(float(us.mean()), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--markets', type=int, default=7000)
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--cell', type=float, default=0.5, help='grid cell size in degrees')
+    args = parser.parse_args()
+
+    markets, prices = synthetic_markets(args.markets)
+    start = time.perf_counter()
+    index = MarketIndex(markets, prices, args.cell)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rng = np.random.default_rng(1)
+    queries = [(float(rng.uniform(*LAT_RANGE)), float(rng.uniform(*LON_RANGE)), CROPS[i % len(CROPS)])
+               for i in range(args.queries)]
+
+    grid_times, scan_times, mismatches = [], [], 0
+    for lat, lon, crop in queries:
+        grid = index.grids[crop.lower()]
+
+        start = time.perf_counter()
+        members, _ = grid.nearest(lat, lon, args.k)
+        grid_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        distances = haversine_km(lat, lon, grid.lats, grid.lons)
+        expected = np.argsort(distances, kind='stable')[:args.k]
+        scan_times.append(time.perf_counter() - start)
+
+        if not np.array_equal(np.sort(members), np.sort(expected)):
+            mismatches += 1
+
+    print(json.dumps({
+        'markets': args.markets,
+        'queries': args.queries,
+        'k': args.k,
+        'cell_degrees': args.cell,
+        'build_ms': round(build_ms, 1),
+        'grid': percentiles(grid_times),
+        'brute_force': percentiles(scan_times),
+        'mismatches': mismatches
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
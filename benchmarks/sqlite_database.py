@@ -0,0 +1,221 @@
+"""
+SQLite Stand-in Database
+DatabaseManager subclass backed by a local SQLite file so benchmarks
+and load tests run the real query methods without a MySQL server
+
+The adapter only rewrites %s placeholders; MySQL-only statements
+(save_market_price's ON DUPLICATE KEY) are not supported.
+
+Usage:
+    from sqlite_database import install
+    db = install(backend.app)
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from disease_catalog import disease_catalog  # noqa: E402
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS yield_predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    crop_type TEXT, area REAL, soil_quality TEXT, water_availability TEXT, sunlight_hours REAL,
+    predicted_yield REAL, yield_per_hectare REAL, confidence INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_yield_crop ON yield_predictions (crop_type, created_at);
+CREATE TABLE IF NOT EXISTS disease_detections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    crop_type TEXT, disease_name TEXT, confidence REAL, severity TEXT, pesticide TEXT, image_filename TEXT,
+    image_sha256 TEXT, model_version TEXT, rescored_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_detection_disease ON disease_detections (disease_name, created_at);
+CREATE TABLE IF NOT EXISTS market_prices (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    state TEXT, crop TEXT, price REAL, unit TEXT, recorded_date DATE DEFAULT CURRENT_DATE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS user_activity (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    activity_type TEXT, crop_type TEXT, details TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_activity_created ON user_activity (created_at);
+CREATE TABLE IF NOT EXISTS diseases_reference (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    crop_type TEXT, disease_name TEXT, severity TEXT, description TEXT, pesticide TEXT,
+    treatment TEXT, recommendation TEXT
+);
+CREATE TABLE IF NOT EXISTS government_schemes (
+    id INTEGER PRIMARY KEY,
+    name TEXT, scheme_type TEXT, level TEXT, description TEXT, eligibility TEXT, benefit TEXT,
+    deadline TEXT, website TEXT
+);
+"""
+
+
+class _Cursor:
+    """Just enough of a mysql-connector cursor for DatabaseManager"""
+
+    def __init__(self, connection, lock, dictionary=False):
+        self._connection = connection
+        self._lock = lock
+        self._dictionary = dictionary
+        self._rows = []
+        self.lastrowid = None
+        self.rowcount = -1
+
+    def _convert(self, cursor):
+        rows = cursor.fetchall()
+        if self._dictionary and cursor.description:
+            columns = [d[0] for d in cursor.description]
+            rows = [dict(zip(columns, row)) for row in rows]
+        return rows
+
+    def execute(self, query, values=None):
+        # One shared connection, as in the app: serialize statement + fetch
+        with self._lock:
+            cursor = self._connection.execute(query.replace('%s', '?'), tuple(values or ()))
+            self._rows = self._convert(cursor)
+            self.lastrowid = cursor.lastrowid
+            self.rowcount = cursor.rowcount
+
+    def executemany(self, query, rows):
+        with self._lock:
+            cursor = self._connection.executemany(query.replace('%s', '?'), [tuple(r) for r in rows])
+            self.rowcount = cursor.rowcount
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        self._rows = []
+
+
+class _Connection:
+    """Thread-shared SQLite connection with the mysql-connector surface used here"""
+
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._lock = threading.Lock()
+
+    def cursor(self, dictionary=False, buffered=None, prepared=None):
+        return _Cursor(self._connection, self._lock, dictionary)
+
+    def commit(self):
+        pass  # autocommit
+
+    def rollback(self):
+        pass
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        self._connection.close()
+
+    def executescript(self, script):
+        with self._lock:
+            self._connection.executescript(script)
+
+
+class SQLiteDatabaseManager(database.DatabaseManager):
+    """DatabaseManager running its queries against SQLite"""
+
+    def __init__(self, path=None):
+        super().__init__(database=path or os.path.join(tempfile.mkdtemp(prefix='agri-db-'), 'app.sqlite3'))
+        self.path = self.database
+
+    def connect(self):
+        self.connection = _Connection(self.path)
+        self.connection.executescript(SCHEMA)
+        self._seed()
+        return True
+
+    def _seed(self):
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM market_prices")
+        if cursor.fetchone()[0]:
+            return
+
+        with open(os.path.join(BASE_DIR, 'market_prices.json'), encoding='utf-8') as f:
+            prices = json.load(f)['prices']
+        cursor.executemany(
+            "INSERT INTO market_prices (state, crop, price, unit) VALUES (%s, %s, %s, %s)",
+            [(p['state'], p['crop'], p['currentPrice'], 'per quintal') for p in prices])
+
+        with open(os.path.join(BASE_DIR, 'gov_schemes.json'), encoding='utf-8') as f:
+            schemes = json.load(f)['schemes']
+        cursor.executemany(
+            "INSERT INTO government_schemes VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            [(s['id'], s['name'], s['type'], s['level'], s['description'], s['eligibility'],
+              s['benefit'], s.get('deadline'), s.get('website')) for s in schemes])
+
+        cursor.executemany(
+            "INSERT INTO diseases_reference (crop_type, disease_name, severity, description, pesticide, "
+            "treatment, recommendation) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            [(d.crop.capitalize(), d.name, d.severity, d.description, d.pesticide, d.treatment, d.recommendation)
+             for d in disease_catalog.diseases])
+
+    def clone(self):
+        db = SQLiteDatabaseManager(self.path)
+        db.connect()
+        return db
+
+    def activity_partitions(self):
+        return []  # SQLite has no partitions: retention deletes in id batches
+
+    def ensure_image_archive_columns(self):
+        """Add the archive columns to a stand-in file created before they existed"""
+        with self.connection._lock:
+            existing = {row[1] for row in self.connection._connection.execute(
+                "PRAGMA table_info(disease_detections)")}
+            missing = [column for column in self.IMAGE_ARCHIVE_COLUMNS if column not in existing]
+            for column in missing:
+                self.connection._connection.execute(f"ALTER TABLE disease_detections ADD COLUMN {column}")
+        return len(missing)
+
+    def stream_query(self, query, values=None, fetch_size=1000):
+        """Unbuffered export on a separate SQLite connection"""
+        connection = sqlite3.connect(self.path)
+        cursor = connection.execute(query.replace('%s', '?'), tuple(values or ()))
+        columns = [d[0] for d in cursor.description]
+
+        def rows():
+            while True:
+                chunk = cursor.fetchmany(fetch_size)
+                if not chunk:
+                    break
+                for row in chunk:
+                    yield dict(zip(columns, row))
+
+        return database.RowStream(rows(), connection.close)
+
+
+def install(app, path=None):
+    """Connect a stand-in database and make the app and get_db() use it"""
+    db = SQLiteDatabaseManager(path)
+    db.connect()
+    database.db_manager = db
+    app.db = db
+    return db
@@ -0,0 +1,207 @@
+"""
+Response Compression
+Negotiates gzip/brotli encoding for API responses and caches the
+compressed bodies of reference endpoints by ETag
+
+Educational Purpose Only
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+from config import COMPRESSION_CONFIG
+from metrics import register_cache
+
+# Optional brotli support (with fallback to gzip only)
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+
+# ==========================================
+# ENCODING NEGOTIATION
+# ==========================================
+
+def supported_encodings():
+    """Encodings this server can produce, in order of preference"""
+    return ['br', 'gzip'] if BROTLI_AVAILABLE else ['gzip']
+
+
+def negotiate_encoding(accept_encoding, available=None):
+    """
+    Pick the best content encoding for an Accept-Encoding header
+
+    Args:
+        accept_encoding: Raw Accept-Encoding header value
+        available: Encodings the server supports, most preferred first
+
+    Returns:
+        Encoding name or None if the client accepts none of them
+    """
+    if not accept_encoding:
+        return None
+
+    available = available or supported_encodings()
+    weights = {}
+
+    for part in accept_encoding.split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+
+    return best
+
+
+def compress_body(body, encoding, cached=False):
+    """Compress a response body with the given encoding"""
+    if encoding == 'br':
+        quality = COMPRESSION_CONFIG['cached_brotli_quality' if cached else 'brotli_quality']
+        return brotli.compress(body, quality=quality)
+
+    level = COMPRESSION_CONFIG['cached_gzip_level' if cached else 'gzip_level']
+    return gzip.compress(body, compresslevel=level)
+
+
+# ==========================================
+# COMPRESSED BODY CACHE
+# ==========================================
+
+class CompressedBodyCache:
+    """Bounded LRU of compressed bodies keyed by (etag, encoding)"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, etag, encoding):
+        key = (etag, encoding)
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, etag, encoding, body):
+        with self._lock:
+            self._entries[(etag, encoding)] = body
+            self._entries.move_to_end((etag, encoding))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Cache statistics for monitoring"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRatio': round(self.hits / total, 4) if total else 0.0
+        }
+
+
+body_cache = CompressedBodyCache(COMPRESSION_CONFIG['cache_max_entries'])
+register_cache('compressed_bodies', body_cache.stats)
+
+
+def compute_etag(body):
+    """Content hash used as the ETag of a response body"""
+    return hashlib.sha1(body).hexdigest()
+
+
+# ==========================================
+# FLASK INTEGRATION
+# ==========================================
+
+def _is_compressible(response):
+    """Check whether a response is eligible for compression"""
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code != 200:
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    return response.mimetype in COMPRESSION_CONFIG['mimetypes']
+
+
+def init_compression(app):
+    """Register the response compression hook on a Flask app"""
+    if not COMPRESSION_CONFIG['enabled']:
+        return
+
+    cacheable = set(COMPRESSION_CONFIG['cacheable_endpoints'])
+
+    @app.after_request
+    def compress_response(response):
+        """Compress eligible responses according to Accept-Encoding"""
+        if not _is_compressible(response):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        body = response.get_data()
+
+        etag = None
+        if request.endpoint in cacheable and request.method == 'GET':
+            # Preserialized payloads already carry their ETag
+            etag, _ = response.get_etag()
+            if etag is None:
+                etag = compute_etag(body)
+            response.set_etag(etag, weak=True)
+            response.cache_control.public = True
+            response.cache_control.max_age = COMPRESSION_CONFIG['cache_max_age']
+
+            # Client already holds this representation
+            if request.if_none_match.contains_weak(etag):
+                response.status_code = 304
+                response.set_data(b'')
+                return response
+
+        if len(body) < COMPRESSION_CONFIG['min_size']:
+            return response
+
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+
+        if etag is not None:
+            compressed = body_cache.get(etag, encoding)
+            if compressed is None:
+                compressed = compress_body(body, encoding, cached=True)
+                body_cache.put(etag, encoding, compressed)
+        else:
+            compressed = compress_body(body, encoding)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -33,11 +33,20 @@ class Config:
     
     # API Settings
     JSON_SORT_KEYS = False
-    JSONIFY_PRETTYPRINT_REGULAR = True
+    JSONIFY_PRETTYPRINT_REGULAR = False
     
-    # Rate Limiting
-    RATELIMIT_ENABLED = True
+    # Rate Limiting (RATELIMIT_ENABLED=False for load tests against a running server)
+    RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'True') == 'True'
     RATELIMIT_DEFAULT = "200 per day, 50 per hour"
+    RATELIMIT_ROUTE_LIMITS = {
+        'detect_disease': "10 per minute, 100 per day",  # CPU-bound image analysis
+        'submit_detection_job': "10 per minute, 100 per day",
+        'get_detection_job': "120 per minute"  # polling
+    }
+    RATELIMIT_EXEMPT = ['health_check', 'metrics', 'static']
+    RATELIMIT_STORAGE = os.getenv('RATELIMIT_STORAGE', 'memory')  # 'memory' or 'file'
+    RATELIMIT_STORAGE_PATH = os.getenv('RATELIMIT_STORAGE_PATH', 'ratelimit.sqlite3')
+    RATELIMIT_TRUST_PROXY = os.getenv('RATELIMIT_TRUST_PROXY', 'False') == 'True'
     
     # Pagination
     ITEMS_PER_PAGE = 20
@@ -59,6 +68,7 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     DEBUG = True
+    RATELIMIT_ENABLED = False
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
 
 # ==========================================
@@ -77,6 +87,16 @@ DATABASES = {
     }
 }
 
+# Server-side prepared statements for the fixed queries in database.py.
+# Off by default: mysql-connector (pure Python and C extension) sends
+# COM_STMT_RESET before every execute, so a cached statement costs two
+# round trips where a plain query costs one. Turn on only where
+# benchmarks/db_statements.py shows fewer round_trips_per_op.
+STATEMENT_CACHE_CONFIG = {
+    'enabled': os.getenv('PREPARED_STATEMENTS', 'False') == 'True',
+    'max_statements': 64  # prepared cursors kept per connection (LRU)
+}
+
 # ==========================================
 # ML MODEL CONFIGURATION
 # ==========================================
@@ -94,10 +114,33 @@ MODEL_SETTINGS = {
     },
     'yield_prediction': {
         'scaler_path': 'models/yield_scaler.pkl',
+        # Model input columns; cropType may be added for a model covering both crops.
+        # The model predicts tons per hectare.
         'features': ['area', 'soilQuality', 'waterAvailability', 'sunlight']
+    },
+    'price_forecasting': {
+        'history_weeks': 104,  # weekly means used for fitting
+        'min_weeks': 8,  # shorter series are not forecast
+        'horizon_weeks': 12,
+        'alphas': [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9],
+        'betas': [0.01, 0.05, 0.1, 0.2, 0.3],
+        'damping': 0.98,
+        'max_age': 24 * 3600  # seconds before forecasts are refitted
     }
 }
 
+# Cheap checks on a thumbnail before disease detection; 'reject' limits stop
+# the request, 'warn' limits are reported alongside the diagnosis
+IMAGE_QUALITY_CONFIG = {
+    'enabled': os.getenv('IMAGE_QUALITY_GATE', 'True') == 'True',
+    'thumbnail_size': 256,  # longest side in pixels
+    'blur': {'reject': 25.0, 'warn': 80.0},  # Laplacian variance of the grayscale thumbnail
+    'dark': {'reject': 35.0, 'warn': 60.0},  # mean brightness (0-255)
+    'bright': {'reject': 225.0, 'warn': 200.0},
+    'clipped': {'reject': 0.6, 'warn': 0.3},  # share of pixels at <= 10 or >= 245
+    'green': {'reject': 0.05, 'warn': 0.2}  # share of plant-coloured pixels
+}
+
 # ==========================================
 # API CONFIGURATION
 # ==========================================
@@ -108,6 +151,32 @@ API_CONFIG = {
     'max_upload_size': 10 * 1024 * 1024  # 10MB
 }
 
+# ==========================================
+# RESPONSE COMPRESSION
+# ==========================================
+COMPRESSION_CONFIG = {
+    'enabled': os.getenv('COMPRESSION_ENABLED', 'True') == 'True',
+    'min_size': int(os.getenv('COMPRESSION_MIN_SIZE', 1024)),  # bytes
+    'mimetypes': ['application/json', 'text/plain', 'text/csv', 'text/html'],
+    'gzip_level': 6,
+    'brotli_quality': 5,
+    # Cached bodies are compressed once, so spend more CPU on them
+    'cached_gzip_level': 9,
+    'cached_brotli_quality': 11,
+    'cache_max_entries': 256,
+    'cache_max_age': 300,  # seconds
+    # Reference endpoints whose bodies are compressed once and cached by ETag
+    'cacheable_endpoints': [
+        'get_prices',
+        'get_schemes',
+        'get_scheme_details',
+        'get_supported_crops',
+        'get_disease_database',
+        'get_disease',
+        'api_info'
+    ]
+}
+
 # ==========================================
 # LOGGING CONFIGURATION
 # ==========================================
@@ -120,17 +189,20 @@ LOGGING_CONFIG = {
         },
         'detailed': {
             'format': '%(asctime)s [%(levelname)s] %(filename)s:%(lineno)d %(funcName)s(): %(message)s'
+        },
+        'json': {
+            '()': 'logging_setup.JsonFormatter'
         }
     },
     'handlers': {
         'default': {
             'level': 'INFO',
-            'formatter': 'standard',
+            'formatter': os.getenv('LOG_FORMAT', 'standard'),
             'class': 'logging.StreamHandler'
         },
         'file': {
             'level': 'DEBUG',
-            'formatter': 'detailed',
+            'formatter': 'json',
             'class': 'logging.handlers.RotatingFileHandler',
             'filename': 'logs/app.log',
             'maxBytes': 10485760,
@@ -142,17 +214,165 @@ LOGGING_CONFIG = {
             'handlers': ['default', 'file'],
             'level': 'DEBUG',
             'propagate': True
-        }
+        },
+        # Per-module levels (override at runtime with LOG_LEVELS="database=DEBUG,...")
+        'app': {'level': 'INFO'},
+        'database': {'level': 'INFO'},
+        'ml_disease_detection': {'level': 'INFO'},
+        'werkzeug': {'level': 'WARNING'},
+        'PIL': {'level': 'INFO'}
     }
 }
 
+LOGGING_OPTIONS = {
+    'queue_size': 10000,  # records buffered for the background listener
+    'debug_sample_rate': int(os.getenv('LOG_DEBUG_SAMPLE_RATE', 10))  # keep 1 in N debug lines
+}
+
+# ==========================================
+# BATCH YIELD PREDICTION
+# ==========================================
+YIELD_BATCH_CONFIG = {
+    'max_rows': 100000,  # per request
+    'chunk_size': 1000  # rows per streamed chunk
+}
+
+# What-if grid for /api/predict-yield/sensitivity
+YIELD_SENSITIVITY_CONFIG = {
+    'sunlight_hours': (4, 5, 6, 7, 8, 9, 10, 11, 12),  # sunlight axis of the grid
+    'max_area': 10000  # hectares
+}
+
+# ==========================================
+# PROFILING & SLOW QUERY LOG
+# ==========================================
+PROFILING_CONFIG = {
+    'enabled': os.getenv('PROFILING_ENABLED', 'True') == 'True',
+    # Requests sending "X-Profile: <admin_token>" are always profiled
+    'admin_token': os.getenv('PROFILE_ADMIN_TOKEN', ''),
+    'sample_rate': float(os.getenv('PROFILE_SAMPLE_RATE', 0.0)),  # fraction of requests
+    'report_dir': 'logs/profiles',
+    'max_reports': 50,
+    'top_functions': 40,
+    'top_allocations': 20,
+    'tracemalloc_frames': 1,
+    'slow_query_ms': float(os.getenv('SLOW_QUERY_MS', 200))
+}
+
+# ==========================================
+# REFERENCE DATA (market_prices.json, gov_schemes.json)
+# ==========================================
+REFERENCE_DATA_CONFIG = {
+    # Serve prices and schemes from memory instead of the database
+    'primary': os.getenv('REFERENCE_DATA_PRIMARY', 'False') == 'True',
+    'check_interval': 5.0,  # seconds between file mtime checks
+    'db_slow_ms': float(os.getenv('REFERENCE_DB_SLOW_MS', 500)),  # slower reads switch to memory...
+    'db_cooldown': 30  # ...for this many seconds
+}
+
+# ==========================================
+# PRICE HISTORY (/api/prices/history)
+# ==========================================
+PRICE_HISTORY_CONFIG = {
+    'path': os.getenv('PRICE_HISTORY_PATH', 'data/price_history'),  # built by price_history.py
+    'mmap': True,  # memory-map the .npy columns
+    'sample_if_missing': True,  # serve generated demo series when no store exists
+    'default_days': 365,
+    'default_points': 120,
+    'max_points': 1000
+}
+
+# ==========================================
+# NEAREST MARKETS
+# ==========================================
+MARKET_LOCATOR_CONFIG = {
+    'cell_degrees': 0.5,  # grid cell size of the spatial index (~55 km)
+    'default_k': 5,
+    'max_k': 50
+}
+
+# ==========================================
+# SCHEME SEARCH
+# ==========================================
+SCHEME_SEARCH_CONFIG = {
+    # BM25F field weights over gov_schemes.json
+    'field_weights': {'name': 3.0, 'description': 1.0, 'eligibility': 1.0, 'benefits': 1.5},
+    'k1': 1.2,
+    'b': 0.75,
+    'min_prefix': 3,  # query words this long also match longer terms...
+    'prefix_weight': 0.5,  # ...scored at this fraction
+    'max_prefix_expansions': 20,
+    'default_limit': 10,
+    'max_limit': 50
+}
+
+# ==========================================
+# HISTORY EXPORTS
+# ==========================================
+EXPORT_CONFIG = {
+    'fetch_size': 2000,  # rows per fetchmany from the server-side cursor
+    'chunk_size': 1000  # rows per streamed response chunk
+}
+
+# ==========================================
+# ASYNC DETECTION JOBS
+# ==========================================
+JOB_QUEUE_CONFIG = {
+    'workers': int(os.getenv('DETECTION_WORKERS', 2)),
+    'max_queue': int(os.getenv('DETECTION_QUEUE_SIZE', 100)),  # queued jobs before 503
+    'result_ttl': 600,  # seconds a finished job is kept
+    'max_wait': 30  # longest long-poll in seconds
+}
+
+# ==========================================
+# IMAGE ARCHIVE & RE-SCORING
+# ==========================================
+IMAGE_ARCHIVE_CONFIG = {
+    'enabled': os.getenv('IMAGE_ARCHIVE_ENABLED', 'False') == 'True',
+    'path': os.getenv('IMAGE_ARCHIVE_PATH', 'data/image_archive'),  # content-addressed by SHA-256
+    'max_bytes': 10 * 1024 * 1024  # larger uploads are not archived
+}
+
+RESCORE_CONFIG = {
+    'workers': int(os.getenv('RESCORE_WORKERS', os.cpu_count() or 2)),  # decode processes
+    'batch_size': 64,  # images per inference batch
+    'fetch_size': 2000,  # detection rows per fetchmany
+    'checkpoint_path': 'data/rescore_checkpoint.json'
+}
+
+# ==========================================
+# ACTIVITY STREAM (SSE)
+# ==========================================
+ACTIVITY_STREAM_CONFIG = {
+    'buffer_size': 1000,  # recent events kept for Last-Event-ID resume
+    'queue_size': 100,  # pending events per subscriber before it is dropped
+    'max_subscribers': 100,
+    'heartbeat_seconds': 15
+}
+
+# ==========================================
+# ACTIVITY LOG RETENTION
+# ==========================================
+ACTIVITY_LOG_CONFIG = {
+    # Fraction of rows stored per activity_type, e.g. {'predict_yield': 0.1};
+    # unlisted types are always stored. Sampled rows record sampleRate in details.
+    'sample_rates': {},
+    'retention_days': int(os.getenv('ACTIVITY_RETENTION_DAYS', 90)),  # whole months older than this are pruned
+    'archive_path': os.getenv('ACTIVITY_ARCHIVE_PATH', 'data/activity_archive'),  # gzip JSON lines per month
+    # Seconds between background prune runs; 0 (default) leaves pruning to
+    # `python activity_retention.py prune`. Enable in one process only.
+    'prune_interval': float(os.getenv('ACTIVITY_PRUNE_INTERVAL', 0)),
+    'delete_batch': 5000,  # ids per DELETE when no partition can be dropped
+    'partition_months_ahead': 3  # monthly partitions kept ready for new rows
+}
+
 # ==========================================
 # FEATURE FLAGS
 # ==========================================
 FEATURES = {
     'disease_detection_enabled': True,
     'yield_prediction_enabled': True,
-    'price_forecasting_enabled': False,  # Coming soon
+    'price_forecasting_enabled': True,
     'user_authentication': False,  # Coming soon
     'scheme_application': False,  # Coming soon
 }
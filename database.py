@@ -6,8 +6,167 @@ Handles all database operations for AI Agriculture Assistant
 import mysql.connector
 from mysql.connector import Error
 import json
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 
+from config import ACTIVITY_LOG_CONFIG, PROFILING_CONFIG, STATEMENT_CACHE_CONFIG
+from metrics import activity_log_sampled_out, register_cache, registry, timed_query
+from activity_stream import activity_events
+
+logger = logging.getLogger(__name__)
+
+slow_queries = registry.counter('db_slow_queries_total', 'Queries slower than the slow-query threshold')
+
+_statement_stats = {'hits': 0, 'misses': 0}
+register_cache('prepared_statements', lambda: dict(_statement_stats))
+
+
+class StatementCache:
+    """
+    Prepared cursors for the fixed queries of one connection, LRU bounded
+    
+    The server parses each statement once; later executions only send the
+    parameters in the binary protocol, though mysql-connector also sends
+    COM_STMT_RESET before each one (see STATEMENT_CACHE_CONFIG).
+    
+    Each cursor has a lock, so one thread at a time runs a given
+    statement. That does not make the connection thread-safe: different
+    statements still run on the one shared connection without a common
+    lock, exactly as with plain cursors.
+    """
+    
+    def __init__(self, connection, max_size=64):
+        self.connection = connection
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def checkout(self, query, dictionary=False):
+        """(cursor, lock) for a query, with the lock held"""
+        key = (query, dictionary)
+        evicted = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                _statement_stats['misses'] += 1
+                entry = (self.connection.cursor(prepared=True, dictionary=dictionary), threading.Lock())
+                self._entries[key] = entry
+                if len(self._entries) > self.max_size:
+                    evicted = self._entries.popitem(last=False)[1]
+            else:
+                _statement_stats['hits'] += 1
+                self._entries.move_to_end(key)
+        if evicted is not None:
+            self._close(*evicted)
+        entry[1].acquire()
+        return entry
+    
+    def discard(self, query, dictionary=False):
+        """Forget a statement after an error; the caller holds its lock"""
+        with self._lock:
+            entry = self._entries.pop((query, dictionary), None)
+        if entry is not None:
+            try:
+                entry[0].close()
+            except Error:
+                pass
+    
+    @staticmethod
+    def _close(cursor, lock):
+        with lock:
+            try:
+                cursor.close()
+            except Error:
+                pass
+
+
+class _StatementCursor:
+    """
+    Stand-in for a cursor that runs each query on its cached prepared cursor
+    
+    close() hands the prepared cursor back instead of closing it.
+    """
+    
+    def __init__(self, cache, dictionary=False):
+        self._cache = cache
+        self._dictionary = dictionary
+        self._cursor = None
+        self._lock = None
+    
+    def execute(self, query, values=None):
+        self.close()
+        self._cursor, self._lock = self._cache.checkout(query, self._dictionary)
+        try:
+            self._cursor.execute(query, values)
+        except Error:
+            self._cache.discard(query, self._dictionary)
+            self._release()
+            raise
+    
+    def fetchone(self):
+        return self._cursor.fetchone()
+    
+    def fetchall(self):
+        return self._cursor.fetchall()
+    
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+    
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+    
+    def close(self):
+        if self._cursor is None:
+            return
+        try:
+            # Unread rows would block the next statement on this connection
+            if getattr(self._cache.connection, 'unread_result', False):
+                self._cursor.fetchall()
+        finally:
+            self._release()
+    
+    def _release(self):
+        self._cursor = None
+        self._lock, lock = None, self._lock
+        lock.release()
+
+
+class RowStream:
+    """
+    Row iterator that owns the connection its rows come from
+    
+    The connection is closed when the rows run out or close() is called,
+    whichever comes first, so a stream that is never read (the client
+    went away before the first chunk) does not hold it until garbage
+    collection. close() may be called any number of times.
+    """
+    
+    def __init__(self, rows, close):
+        self._rows = rows
+        self._close = close
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        try:
+            return next(self._rows)
+        except BaseException:
+            self.close()
+            raise
+    
+    def close(self):
+        close, self._close = self._close, None
+        if close is not None:
+            self._rows.close()
+            close()
+
 class DatabaseManager:
     """Manages database connections and operations"""
     
@@ -17,6 +176,7 @@ class DatabaseManager:
         self.password = password
         self.database = database
         self.connection = None
+        self._statements = None
     
     def connect(self):
         """Establish database connection"""
@@ -27,25 +187,54 @@ class DatabaseManager:
                 password=self.password,
                 database=self.database
             )
-            print(f"[OK] Connected to MySQL database: {self.database}")
+            logger.info("Connected to MySQL database: %s", self.database)
             return True
         except Error as e:
-            print(f"[ERROR] Database connection error: {e}")
+            logger.error("Database connection error: %s", e)
             return False
     
     def disconnect(self):
         """Close database connection"""
         if self.connection and self.connection.is_connected():
             self.connection.close()
-            print("[OK] Database connection closed")
+            logger.info("Database connection closed")
+    
+    def _cursor(self, dictionary=False):
+        """
+        Cursor for one fixed query: reuses the connection's prepared
+        statement for it when STATEMENT_CACHE_CONFIG is enabled
+        """
+        if not STATEMENT_CACHE_CONFIG['enabled']:
+            return self.connection.cursor(dictionary=dictionary)
+        if self._statements is None or self._statements.connection is not self.connection:
+            self._statements = StatementCache(self.connection, STATEMENT_CACHE_CONFIG['max_statements'])
+        return _StatementCursor(self._statements, dictionary)
+    
+    def _execute(self, cursor, query, values=None):
+        """Execute a query, logging it when slower than the slow-query threshold"""
+        start = time.perf_counter()
+        try:
+            if values is None:
+                cursor.execute(query)
+            else:
+                cursor.execute(query, values)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if elapsed_ms >= PROFILING_CONFIG['slow_query_ms']:
+                slow_queries.inc()
+                sql = ' '.join(query.split())
+                param_count = len(values) if values is not None else 0
+                logger.warning("Slow query (%.1f ms, %d params): %s", elapsed_ms, param_count, sql,
+                               extra={'sql': sql, 'param_count': param_count, 'duration_ms': round(elapsed_ms, 2)})
     
     # ==================== YIELD PREDICTIONS ====================
     
+    @timed_query
     def save_yield_prediction(self, crop_type, area, soil_quality, water_availability, 
                              sunlight_hours, predicted_yield, yield_per_hectare, confidence):
         """Save yield prediction to database"""
         try:
-            cursor = self.connection.cursor()
+            cursor = self._cursor()
             query = """
             INSERT INTO yield_predictions 
             (crop_type, area, soil_quality, water_availability, sunlight_hours, 
@@ -55,85 +244,196 @@ class DatabaseManager:
             values = (crop_type, area, soil_quality, water_availability, 
                      sunlight_hours, predicted_yield, yield_per_hectare, confidence)
             
-            cursor.execute(query, values)
+            self._execute(cursor, query, values)
+            self.connection.commit()
+            
+            logger.debug("Saved yield prediction for %s", crop_type)
+            return True
+        except Error as e:
+            logger.error("Error saving yield prediction: %s", e)
+            return False
+        finally:
+            cursor.close()
+    
+    @timed_query
+    def save_yield_predictions_bulk(self, rows):
+        """
+        Save many yield predictions in one round trip
+        
+        Args:
+            rows: Sequence of (crop_type, area, soil_quality, water_availability,
+                  sunlight_hours, predicted_yield, yield_per_hectare, confidence)
+        """
+        if not rows:
+            return True
+        try:
+            cursor = self.connection.cursor()
+            query = """
+            INSERT INTO yield_predictions 
+            (crop_type, area, soil_quality, water_availability, sunlight_hours, 
+             predicted_yield, yield_per_hectare, confidence)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """
+            # mysql-connector rewrites executemany INSERTs into multi-row statements
+            cursor.executemany(query, rows)
             self.connection.commit()
             
-            print(f"[OK] Saved yield prediction for {crop_type}")
+            logger.debug("Saved %d yield predictions", len(rows))
             return True
         except Error as e:
-            print(f"[ERROR] Error saving yield prediction: {e}")
+            logger.error("Error saving yield predictions: %s", e)
             return False
         finally:
             cursor.close()
     
+    @timed_query
     def get_yield_predictions(self, crop_type=None, limit=10):
         """Get yield predictions from database"""
         try:
-            cursor = self.connection.cursor(dictionary=True)
+            cursor = self._cursor(dictionary=True)
             if crop_type:
                 query = "SELECT * FROM yield_predictions WHERE crop_type = %s ORDER BY created_at DESC LIMIT %s"
-                cursor.execute(query, (crop_type, limit))
+                self._execute(cursor, query, (crop_type, limit))
             else:
                 query = "SELECT * FROM yield_predictions ORDER BY created_at DESC LIMIT %s"
-                cursor.execute(query, (limit,))
+                self._execute(cursor, query, (limit,))
             
             results = cursor.fetchall()
             return results
         except Error as e:
-            print(f"[ERROR] Error fetching yield predictions: {e}")
+            logger.error("Error fetching yield predictions: %s", e)
             return []
         finally:
             cursor.close()
     
     # ==================== DISEASE DETECTIONS ====================
     
-    def save_disease_detection(self, crop_type, disease_name, confidence, severity, pesticide, image_filename=None):
-        """Save disease detection to database"""
+    @timed_query
+    def save_disease_detection(self, crop_type, disease_name, confidence, severity, pesticide, image_filename=None,
+                               image_sha256=None):
+        """
+        Save disease detection to database
+        
+        image_sha256 links the row to the image archive and needs the
+        columns added by ensure_image_archive_columns().
+        """
         try:
-            cursor = self.connection.cursor()
-            query = """
-            INSERT INTO disease_detections 
-            (crop_type, disease_name, confidence, severity, pesticide, image_filename)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            values = (crop_type, disease_name, confidence, severity, pesticide, image_filename)
+            cursor = self._cursor()
+            if image_sha256:
+                query = """
+                INSERT INTO disease_detections 
+                (crop_type, disease_name, confidence, severity, pesticide, image_filename, image_sha256)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """
+                values = (crop_type, disease_name, confidence, severity, pesticide, image_filename, image_sha256)
+            else:
+                query = """
+                INSERT INTO disease_detections 
+                (crop_type, disease_name, confidence, severity, pesticide, image_filename)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                """
+                values = (crop_type, disease_name, confidence, severity, pesticide, image_filename)
             
-            cursor.execute(query, values)
+            self._execute(cursor, query, values)
             self.connection.commit()
             
-            print(f"[OK] Saved disease detection: {disease_name}")
+            logger.debug("Saved disease detection: %s", disease_name)
             return True
         except Error as e:
-            print(f"[ERROR] Error saving disease detection: {e}")
+            logger.error("Error saving disease detection: %s", e)
             return False
         finally:
             cursor.close()
     
+    @timed_query
     def get_disease_detections(self, disease_name=None, limit=10):
         """Get disease detections from database"""
         try:
-            cursor = self.connection.cursor(dictionary=True)
+            cursor = self._cursor(dictionary=True)
             if disease_name:
                 query = "SELECT * FROM disease_detections WHERE disease_name = %s ORDER BY created_at DESC LIMIT %s"
-                cursor.execute(query, (disease_name, limit))
+                self._execute(cursor, query, (disease_name, limit))
             else:
                 query = "SELECT * FROM disease_detections ORDER BY created_at DESC LIMIT %s"
-                cursor.execute(query, (limit,))
+                self._execute(cursor, query, (limit,))
             
             results = cursor.fetchall()
             return results
         except Error as e:
-            print(f"[ERROR] Error fetching disease detections: {e}")
+            logger.error("Error fetching disease detections: %s", e)
             return []
         finally:
             cursor.close()
     
+    # Columns linking detections to archived images and the model that scored them
+    IMAGE_ARCHIVE_COLUMNS = {
+        'image_sha256': "ADD COLUMN image_sha256 CHAR(64) NULL, ADD INDEX idx_detection_image (image_sha256)",
+        'model_version': "ADD COLUMN model_version VARCHAR(64) NULL",
+        'rescored_at': "ADD COLUMN rescored_at TIMESTAMP NULL"
+    }
+    
+    def ensure_image_archive_columns(self):
+        """Add the image archive columns to disease_detections if missing"""
+        cursor = self.connection.cursor()
+        try:
+            self._execute(cursor, """
+            SELECT COLUMN_NAME FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'disease_detections'
+            """, (self.database,))
+            existing = {row[0] for row in cursor.fetchall()}
+            missing = [ddl for column, ddl in self.IMAGE_ARCHIVE_COLUMNS.items() if column not in existing]
+            if missing:
+                self._execute(cursor, "ALTER TABLE disease_detections " + ", ".join(missing))
+                logger.info("Added %d image archive columns to disease_detections", len(missing))
+            return len(missing)
+        finally:
+            cursor.close()
+    
+    def stream_archived_detections(self, after_id=0, fetch_size=1000):
+        """Stream (id, crop_type, image_sha256) of detections with an archived image, by id"""
+        return self.stream_query(
+            "SELECT id, crop_type, image_sha256 FROM disease_detections "
+            "WHERE image_sha256 IS NOT NULL AND id > %s ORDER BY id",
+            (after_id,), fetch_size)
+    
+    @timed_query
+    def update_disease_detections_bulk(self, rows):
+        """
+        Overwrite the predictions of many detections in one transaction
+        
+        Args:
+            rows: Sequence of (disease_name, confidence, severity, pesticide,
+                  model_version, id)
+        """
+        if not rows:
+            return True
+        try:
+            cursor = self.connection.cursor()
+            query = """
+            UPDATE disease_detections
+            SET disease_name = %s, confidence = %s, severity = %s, pesticide = %s,
+                model_version = %s, rescored_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+            """
+            cursor.executemany(query, rows)
+            self.connection.commit()
+            
+            logger.debug("Updated %d disease detections", len(rows))
+            return True
+        except Error as e:
+            logger.error("Error updating disease detections: %s", e)
+            self.connection.rollback()
+            return False
+        finally:
+            cursor.close()
+    
     # ==================== MARKET PRICES ====================
     
+    @timed_query
     def save_market_price(self, state, crop, price, unit='per quintal'):
         """Save market price to database"""
         try:
-            cursor = self.connection.cursor()
+            cursor = self._cursor()
             query = """
             INSERT INTO market_prices (state, crop, price, unit, recorded_date)
             VALUES (%s, %s, %s, %s, CURDATE())
@@ -141,150 +441,227 @@ class DatabaseManager:
             """
             values = (state, crop, price, unit, price)
             
-            cursor.execute(query, values)
+            self._execute(cursor, query, values)
             self.connection.commit()
             
             return True
         except Error as e:
-            print(f"[ERROR] Error saving market price: {e}")
+            logger.error("Error saving market price: %s", e)
             return False
         finally:
             cursor.close()
     
-    def get_market_prices(self, crop=None):
-        """Get market prices from database"""
+    @timed_query
+    def get_market_prices(self, crop=None, raise_errors=False):
+        """Get market prices from database (errors give [] unless raise_errors)"""
         try:
-            cursor = self.connection.cursor(dictionary=True)
+            cursor = self._cursor(dictionary=True)
             if crop:
                 query = "SELECT state, crop, price, unit FROM market_prices WHERE crop = %s ORDER BY state"
-                cursor.execute(query, (crop,))
+                self._execute(cursor, query, (crop,))
             else:
                 query = "SELECT state, crop, price, unit FROM market_prices ORDER BY crop, state"
-                cursor.execute(query)
+                self._execute(cursor, query)
             
             results = cursor.fetchall()
             return results
         except Error as e:
-            print(f"[ERROR] Error fetching market prices: {e}")
+            logger.error("Error fetching market prices: %s", e)
+            if raise_errors:
+                raise
             return []
         finally:
             cursor.close()
     
     # ==================== USER ACTIVITY ====================
     
+    @timed_query
     def log_activity(self, activity_type, crop_type=None, details=None):
-        """Log user activity"""
+        """
+        Log user activity
+        
+        Types listed in ACTIVITY_LOG_CONFIG['sample_rates'] are stored for
+        only that fraction of calls; stream subscribers still get every event.
+        """
+        stored_details = details
+        rate = ACTIVITY_LOG_CONFIG['sample_rates'].get(activity_type, 1.0)
+        if rate < 1.0:
+            if random.random() >= rate:
+                activity_log_sampled_out.inc(type=activity_type)
+                activity_events.publish(activity_type, crop_type=crop_type, details=details)
+                return True
+            stored_details = {**(details or {}), 'sampleRate': rate}
+        
         try:
-            cursor = self.connection.cursor()
+            cursor = self._cursor()
             query = """
             INSERT INTO user_activity (activity_type, crop_type, details)
             VALUES (%s, %s, %s)
             """
-            details_json = json.dumps(details) if details else None
+            # Compact encoding: no whitespace, no null fields
+            details_json = json.dumps({k: v for k, v in stored_details.items() if v is not None},
+                                      separators=(',', ':'), default=str) if stored_details else None
             values = (activity_type, crop_type, details_json)
             
-            cursor.execute(query, values)
+            self._execute(cursor, query, values)
             self.connection.commit()
             
+            # Push to /api/activity/stream subscribers
+            activity_events.publish(activity_type, crop_type=crop_type, details=details)
             return True
         except Error as e:
-            print(f"[ERROR] Error logging activity: {e}")
+            logger.error("Error logging activity: %s", e)
             return False
         finally:
             cursor.close()
     
+    @timed_query
     def get_activity_log(self, activity_type=None, limit=20):
         """Get activity log"""
         try:
-            cursor = self.connection.cursor(dictionary=True)
+            cursor = self._cursor(dictionary=True)
             if activity_type:
                 query = "SELECT * FROM user_activity WHERE activity_type = %s ORDER BY created_at DESC LIMIT %s"
-                cursor.execute(query, (activity_type, limit))
+                self._execute(cursor, query, (activity_type, limit))
             else:
                 query = "SELECT * FROM user_activity ORDER BY created_at DESC LIMIT %s"
-                cursor.execute(query, (limit,))
+                self._execute(cursor, query, (limit,))
             
             results = cursor.fetchall()
             return results
         except Error as e:
-            print(f"[ERROR] Error fetching activity log: {e}")
+            logger.error("Error fetching activity log: %s", e)
             return []
         finally:
             cursor.close()
     
-    # ==================== DISEASES REFERENCE ====================
+    # ==================== ACTIVITY RETENTION ====================
     
-    def get_disease_info(self, crop_type, disease_name):
-        """Get disease information from reference database"""
+    def clone(self):
+        """A separately connected manager, for background jobs that must not share this connection"""
+        manager = DatabaseManager(self.host, self.user, self.password, self.database)
+        return manager if manager.connect() else None
+    
+    def activity_partitions(self):
+        """Names of the monthly user_activity partitions (pYYYYMM), oldest first; [] if not partitioned"""
+        cursor = self.connection.cursor()
         try:
-            cursor = self.connection.cursor(dictionary=True)
-            query = """
-            SELECT * FROM diseases_reference 
-            WHERE crop_type = %s AND disease_name = %s
-            """
-            cursor.execute(query, (crop_type, disease_name))
-            
-            result = cursor.fetchone()
-            return result
-        except Error as e:
-            print(f"[ERROR] Error fetching disease info: {e}")
-            return None
+            self._execute(cursor, """
+            SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'user_activity' AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+            """, (self.database,))
+            return [row[0] for row in cursor.fetchall() if row[0] != 'pmax']
         finally:
             cursor.close()
     
-    def get_all_diseases(self, crop_type=None):
-        """Get all diseases for a crop"""
+    def add_activity_partitions(self, months):
+        """
+        Partition user_activity by month, or add partitions for new months
+        
+        Partition pYYYYMM holds rows created before the following month
+        (the first one also holds everything older) and pmax catches rows
+        beyond the last month. The first call rebuilds the table with
+        (id, created_at) as primary key, as MySQL requires the partitioning
+        column in every unique key.
+        
+        Args:
+            months: dates of month starts to cover, ascending
+        """
+        existing = self.activity_partitions()
+        months = [m for m in months if not existing or f"p{m:%Y%m}" > existing[-1]]
+        if not months:
+            return 0
+        
+        definitions = [
+            f"PARTITION p{month:%Y%m} VALUES LESS THAN "
+            f"(UNIX_TIMESTAMP('{month.year + month.month // 12}-{month.month % 12 + 1:02d}-01 00:00:00'))"
+            for month in months
+        ] + ["PARTITION pmax VALUES LESS THAN MAXVALUE"]
+        
+        if existing:
+            query = f"ALTER TABLE user_activity REORGANIZE PARTITION pmax INTO ({', '.join(definitions)})"
+        else:
+            query = (
+                "ALTER TABLE user_activity "
+                "MODIFY created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+                "DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at) "
+                f"PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) ({', '.join(definitions)})"
+            )
+        cursor = self.connection.cursor()
         try:
-            cursor = self.connection.cursor(dictionary=True)
-            if crop_type:
-                query = "SELECT * FROM diseases_reference WHERE crop_type = %s"
-                cursor.execute(query, (crop_type,))
-            else:
-                query = "SELECT * FROM diseases_reference"
-                cursor.execute(query)
-            
-            results = cursor.fetchall()
-            return results
-        except Error as e:
-            print(f"[ERROR] Error fetching diseases: {e}")
-            return []
+            self._execute(cursor, query)
+        finally:
+            cursor.close()
+        logger.info("Added %d user_activity partitions", len(months))
+        return len(months)
+    
+    def drop_activity_partitions(self, names):
+        """Drop whole monthly partitions (their rows go with them)"""
+        if not names:
+            return
+        cursor = self.connection.cursor()
+        try:
+            self._execute(cursor, f"ALTER TABLE user_activity DROP PARTITION {', '.join(names)}")
+        finally:
+            cursor.close()
+    
+    def stream_activity_before(self, cutoff, fetch_size=1000):
+        """Stream activity rows created before cutoff, by id"""
+        return self.stream_query(
+            "SELECT id, activity_type, crop_type, details, created_at FROM user_activity "
+            "WHERE created_at < %s ORDER BY id",
+            (cutoff,), fetch_size)
+    
+    def delete_activity_range(self, first_id, last_id, cutoff):
+        """Delete rows with first_id <= id <= last_id created before cutoff; returns the row count"""
+        cursor = self.connection.cursor()
+        try:
+            self._execute(cursor, "DELETE FROM user_activity WHERE id >= %s AND id <= %s AND created_at < %s",
+                          (first_id, last_id, cutoff))
+            self.connection.commit()
+            return cursor.rowcount
         finally:
             cursor.close()
     
     # ==================== GOVERNMENT SCHEMES ====================
     
-    def get_government_schemes(self, scheme_type=None, level=None):
-        """Get government schemes"""
+    @timed_query
+    def get_government_schemes(self, scheme_type=None, level=None, raise_errors=False):
+        """Get government schemes (errors give [] unless raise_errors)"""
         try:
-            cursor = self.connection.cursor(dictionary=True)
+            cursor = self._cursor(dictionary=True)
             
             if scheme_type and level:
                 query = "SELECT * FROM government_schemes WHERE scheme_type = %s AND level = %s"
-                cursor.execute(query, (scheme_type, level))
+                self._execute(cursor, query, (scheme_type, level))
             elif scheme_type:
                 query = "SELECT * FROM government_schemes WHERE scheme_type = %s"
-                cursor.execute(query, (scheme_type,))
+                self._execute(cursor, query, (scheme_type,))
             elif level:
                 query = "SELECT * FROM government_schemes WHERE level = %s"
-                cursor.execute(query, (level,))
+                self._execute(cursor, query, (level,))
             else:
                 query = "SELECT * FROM government_schemes"
-                cursor.execute(query)
+                self._execute(cursor, query)
             
             results = cursor.fetchall()
             return results
         except Error as e:
-            print(f"[ERROR] Error fetching schemes: {e}")
+            logger.error("Error fetching schemes: %s", e)
+            if raise_errors:
+                raise
             return []
         finally:
             cursor.close()
     
     # ==================== ANALYTICS ====================
     
+    @timed_query
     def get_yield_statistics(self, crop_type):
         """Get yield prediction statistics"""
         try:
-            cursor = self.connection.cursor(dictionary=True)
+            cursor = self._cursor(dictionary=True)
             query = """
             SELECT 
                 COUNT(*) as total_predictions,
@@ -295,20 +672,21 @@ class DatabaseManager:
             FROM yield_predictions
             WHERE crop_type = %s
             """
-            cursor.execute(query, (crop_type,))
+            self._execute(cursor, query, (crop_type,))
             
             result = cursor.fetchone()
             return result
         except Error as e:
-            print(f"[ERROR] Error fetching yield statistics: {e}")
+            logger.error("Error fetching yield statistics: %s", e)
             return None
         finally:
             cursor.close()
     
+    @timed_query
     def get_common_diseases(self, crop_type, limit=5):
         """Get most common detected diseases"""
         try:
-            cursor = self.connection.cursor(dictionary=True)
+            cursor = self._cursor(dictionary=True)
             query = """
             SELECT disease_name, COUNT(*) as count, AVG(confidence) as avg_confidence
             FROM disease_detections
@@ -317,15 +695,91 @@ class DatabaseManager:
             ORDER BY count DESC
             LIMIT %s
             """
-            cursor.execute(query, (crop_type, limit))
+            self._execute(cursor, query, (crop_type, limit))
             
             results = cursor.fetchall()
             return results
         except Error as e:
-            print(f"[ERROR] Error fetching common diseases: {e}")
+            logger.error("Error fetching common diseases: %s", e)
             return []
         finally:
             cursor.close()
+    
+    # ==================== EXPORTS ====================
+    
+    PREDICTION_EXPORT_COLUMNS = [
+        'id', 'crop_type', 'area', 'soil_quality', 'water_availability', 'sunlight_hours',
+        'predicted_yield', 'yield_per_hectare', 'confidence', 'created_at'
+    ]
+    DETECTION_EXPORT_COLUMNS = [
+        'id', 'crop_type', 'disease_name', 'confidence', 'severity', 'pesticide',
+        'image_filename', 'created_at'
+    ]
+    
+    def stream_query(self, query, values=None, fetch_size=1000):
+        """
+        Run a query on an unbuffered cursor and return its rows as a RowStream
+        
+        The query runs on a dedicated connection, so the shared one stays
+        usable while a long export is read. Rows arrive fetch_size at a
+        time; the caller must close() the stream if it may stop before
+        the last row (stream_rows does this when the response closes).
+        Connection and query errors are raised here, before any row is sent.
+        """
+        connection = mysql.connector.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            database=self.database
+        )
+        try:
+            cursor = connection.cursor(dictionary=True, buffered=False)
+            self._execute(cursor, query, values)
+        except Error:
+            connection.close()
+            raise
+        
+        def rows():
+            while True:
+                chunk = cursor.fetchmany(fetch_size)
+                if not chunk:
+                    break
+                yield from chunk
+        
+        # Closing the connection discards any unread rows
+        return RowStream(rows(), connection.close)
+    
+    def _export(self, table, columns, filters, since=None, until=None, fetch_size=1000):
+        """Rows with since <= created_at < until (both optional); until is exclusive"""
+        conditions = []
+        values = []
+        for column, value in filters.items():
+            if value:
+                conditions.append(f"{column} = %s")
+                values.append(value)
+        if since:
+            conditions.append("created_at >= %s")
+            values.append(since)
+        if until:
+            conditions.append("created_at < %s")
+            values.append(until)
+        
+        query = f"SELECT {', '.join(columns)} FROM {table}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY id"
+        return self.stream_query(query, tuple(values), fetch_size)
+    
+    def export_yield_predictions(self, crop_type=None, since=None, until=None, fetch_size=1000):
+        """Stream all yield predictions matching the filters, oldest first"""
+        return self._export('yield_predictions', self.PREDICTION_EXPORT_COLUMNS, {'crop_type': crop_type},
+                            since, until, fetch_size)
+    
+    def export_disease_detections(self, crop_type=None, disease_name=None, since=None, until=None,
+                                  fetch_size=1000):
+        """Stream all disease detections matching the filters, oldest first"""
+        return self._export('disease_detections', self.DETECTION_EXPORT_COLUMNS,
+                            {'crop_type': crop_type, 'disease_name': disease_name}, since, until, fetch_size)
 
 # Global database manager instance
 db_manager = None
@@ -0,0 +1,105 @@
+"""
+Disease Catalog
+The single source of disease knowledge: every disease of every supported
+crop with its treatment advice, loaded once from diseases.json
+
+Detection, /api/diseases and the stand-in database seed all read from
+it. Records are immutable and indexed by id, by (crop, key) and by crop,
+and each keeps its JSON bytes serialized at load time, so lookups and
+responses do no per-request work.
+
+Educational Purpose - Potato & Tomato Only
+"""
+
+import json
+import logging
+import os
+
+from json_provider import dumps_bytes
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FIELDS = ('id', 'crop', 'key', 'name', 'severity', 'description', 'pesticide', 'treatment', 'recommendation')
+
+
+class Disease:
+    """One disease of one crop; read-only after construction"""
+
+    __slots__ = FIELDS + ('json',)
+
+    def __init__(self, id, crop, key, name, severity, description, pesticide, treatment, recommendation):
+        values = (id, crop.lower(), key, name, severity, description, pesticide, treatment, recommendation)
+        for field, value in zip(FIELDS, values):
+            object.__setattr__(self, field, value)
+        object.__setattr__(self, 'json', dumps_bytes(self.to_dict()))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Disease records are read-only (tried to set {name!r})")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Disease records are read-only (tried to delete {name!r})")
+
+    def __repr__(self):
+        return f"Disease({self.crop}/{self.key})"
+
+    @property
+    def healthy(self):
+        return self.key == 'healthy'
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+
+class DiseaseCatalog:
+    """Immutable, indexed set of Disease records"""
+
+    def __init__(self, diseases, metadata=None):
+        self.diseases = tuple(diseases)
+        self.metadata = dict(metadata or {})
+        self.by_id = {d.id: d for d in self.diseases}
+        self.by_key = {(d.crop, d.key): d for d in self.diseases}
+        by_crop = {}
+        for d in self.diseases:
+            by_crop.setdefault(d.crop, []).append(d)
+        self.by_crop = {crop: tuple(diseases) for crop, diseases in by_crop.items()}
+        self.crops = tuple(self.by_crop)
+        # Crop -> its diseases other than 'healthy'
+        self.diseased = {crop: tuple(d for d in diseases if not d.healthy) for crop, diseases in self.by_crop.items()}
+        if len(self.by_id) != len(self.diseases) or len(self.by_key) != len(self.diseases):
+            raise ValueError("Disease ids and crop/key pairs must be unique")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        catalog = cls((Disease(**{field: row[field] for field in FIELDS}) for row in data['diseases']),
+                      data.get('metadata'))
+        logger.info("Loaded %d diseases for %s from %s", len(catalog), ', '.join(catalog.crops),
+                    os.path.basename(path))
+        return catalog
+
+    def __len__(self):
+        return len(self.diseases)
+
+    def get(self, disease_id):
+        return self.by_id.get(disease_id)
+
+    def lookup(self, crop, key):
+        return self.by_key.get((crop.lower(), key))
+
+    def for_crop(self, crop):
+        return self.by_crop.get(crop.lower(), ())
+
+    def list_json(self, crop=None, **extra):
+        """
+        JSON bytes of {"diseases": [...], "total": n, **extra}, joined
+        from the records' serialized bytes
+        """
+        diseases = self.diseases if crop is None else self.for_crop(crop)
+        body = b'{"diseases":[' + b','.join(d.json for d in diseases) + b'],"total":' + str(len(diseases)).encode()
+        return body + (b',' + dumps_bytes(extra)[1:] if extra else b'}')
+
+
+disease_catalog = DiseaseCatalog.load(os.path.join(BASE_DIR, 'diseases.json'))
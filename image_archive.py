@@ -0,0 +1,89 @@
+"""
+Image Archive
+Content-addressed local storage for uploaded leaf images, so past
+detections can be re-scored when the disease model changes
+
+Each image is stored once under its SHA-256 digest:
+    <root>/ab/cd/abcd...   (raw upload bytes, format sniffed on read)
+Uploading the same bytes again only returns the existing digest.
+
+Educational Purpose Only
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+
+from config import IMAGE_ARCHIVE_CONFIG
+from metrics import image_archive_writes
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class ImageArchive:
+    """Write-once image files keyed by SHA-256 of their content"""
+
+    def __init__(self, root, max_bytes=None):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def digest(data):
+        return hashlib.sha256(data).hexdigest()
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def put(self, data):
+        """
+        Store image bytes unless already present
+
+        Returns:
+            Hex digest, or None when the image is too large or the write failed
+        """
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            image_archive_writes.inc(result='too_large')
+            return None
+
+        digest = self.digest(data)
+        path = self.path(digest)
+        if os.path.exists(path):
+            image_archive_writes.inc(result='duplicate')
+            return digest
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename: readers never see a partial file and
+            # concurrent uploads of the same image both end up with it
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError as e:
+            logger.warning("Could not archive image %s: %s", digest, e)
+            image_archive_writes.inc(result='error')
+            return None
+
+        image_archive_writes.inc(result='stored')
+        return digest
+
+    def get(self, digest):
+        """Image bytes for a digest (raises OSError when missing)"""
+        with open(self.path(digest), 'rb') as f:
+            return f.read()
+
+
+image_archive = ImageArchive(
+    os.path.join(BASE_DIR, IMAGE_ARCHIVE_CONFIG['path']),
+    max_bytes=IMAGE_ARCHIVE_CONFIG['max_bytes']
+)
@@ -0,0 +1,196 @@
+"""
+Background Jobs
+Bounded in-process queue and worker pool for slow work such as disease
+detection: submitting returns a job id at once, clients poll (or
+long-poll) for the result, and finished jobs are kept for a TTL
+
+Jobs live in the memory of one process, so with several server
+processes the poll has to reach the process that accepted the job.
+
+Educational Purpose Only
+"""
+
+import collections
+import logging
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from config import JOB_QUEUE_CONFIG
+from metrics import job_queue_depth, job_queue_wait, job_run_latency, job_workers_busy, jobs_total
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted to a full queue"""
+
+
+class Job:
+    """One unit of work and its outcome"""
+
+    def __init__(self, func, args, kwargs):
+        self.id = uuid.uuid4().hex
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted_at = datetime.now()
+        self.enqueued = time.monotonic()
+        self.started = None
+        self.finished = None
+        self._done = threading.Event()
+
+    def wait(self, timeout):
+        """Block until the job finishes or timeout seconds pass"""
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        data = {
+            "jobId": self.id,
+            "status": self.status,
+            "submittedAt": self.submitted_at.isoformat()
+        }
+        if self.started is not None:
+            data["queueWaitMs"] = round((self.started - self.enqueued) * 1000, 1)
+        if self.finished is not None:
+            data["runMs"] = round((self.finished - self.started) * 1000, 1)
+        if self.status == DONE:
+            data["result"] = self.result
+        elif self.status == FAILED:
+            data["error"] = self.error
+        return data
+
+
+class JobQueue:
+    """
+    Fixed worker pool fed by a bounded FIFO queue
+
+    Workers are started on the first submit so that importing the module
+    (or the Flask reloader's parent process) does not spawn threads.
+    """
+
+    def __init__(self, name, workers=2, max_queue=100, result_ttl=600):
+        self.name = name
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._jobs = {}
+        self._finished = collections.deque()  # (finish time, job id) in finish order
+        self._lock = threading.Lock()
+        self._threads = []
+        self._busy = 0
+
+        job_queue_depth.set_function(self._queue.qsize, queue=name)
+        job_workers_busy.set_function(lambda: self._busy, queue=name)
+
+    # ==================== CLIENT API ====================
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue func(*args, **kwargs) and return its Job immediately
+
+        Raises:
+            QueueFullError: If max_queue jobs are already waiting
+        """
+        self._start()
+        self._expire()
+
+        job = Job(func, args, kwargs)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            jobs_total.inc(queue=self.name, outcome='rejected')
+            raise QueueFullError(f"{self.name} queue is full ({self._queue.maxsize} jobs waiting)")
+        return job
+
+    def get(self, job_id):
+        """Job by id, or None if unknown or expired"""
+        self._expire()
+        return self._jobs.get(job_id)
+
+    def depth(self):
+        return self._queue.qsize()
+
+    # ==================== WORKERS ====================
+
+    def _start(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'{self.name}-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info("Started %d %s workers", self.workers, self.name)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            self._run(job)
+
+    def _run(self, job):
+        job.started = time.monotonic()
+        job.status = RUNNING
+        job_queue_wait.observe(job.started - job.enqueued, queue=self.name)
+        with self._lock:
+            self._busy += 1
+
+        try:
+            job.result = job.func(*job.args, **job.kwargs)
+            job.status = DONE
+        except Exception as e:
+            logger.exception("Job %s failed", job.id)
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished = time.monotonic()
+            # Drop the inputs (image bytes) as soon as the job is done
+            job.func = job.args = job.kwargs = None
+            with self._lock:
+                self._busy -= 1
+                self._finished.append((job.finished, job.id))
+            job_run_latency.observe(job.finished - job.started, queue=self.name)
+            jobs_total.inc(queue=self.name, outcome=job.status)
+            job._done.set()
+
+    def _expire(self):
+        """Forget jobs that finished more than result_ttl seconds ago"""
+        cutoff = time.monotonic() - self.result_ttl
+        with self._lock:
+            while self._finished and self._finished[0][0] < cutoff:
+                _, job_id = self._finished.popleft()
+                self._jobs.pop(job_id, None)
+
+    def shutdown(self, timeout=None):
+        """Stop workers after the jobs already queued"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+
+detection_jobs = JobQueue(
+    'detection',
+    workers=JOB_QUEUE_CONFIG['workers'],
+    max_queue=JOB_QUEUE_CONFIG['max_queue'],
+    result_ttl=JOB_QUEUE_CONFIG['result_ttl']
+)
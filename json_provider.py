@@ -0,0 +1,142 @@
+"""
+Fast JSON Provider
+Pluggable orjson-backed JSON provider for Flask plus a registry of
+static payloads that are serialized once at startup
+
+Educational Purpose Only
+"""
+
+import json
+import hashlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+# Optional orjson support (with fallback to compact stdlib json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# ==========================================
+# SERIALIZATION
+# ==========================================
+
+def _default(obj):
+    """Serialize types that JSON encoders do not handle natively"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8', errors='replace')
+    if NUMPY_AVAILABLE:
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if ORJSON_AVAILABLE:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps_bytes(obj):
+        """Serialize an object to compact UTF-8 JSON bytes"""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+
+    def loads(data):
+        """Parse JSON from str or bytes"""
+        return orjson.loads(data)
+else:
+    def dumps_bytes(obj):
+        """Serialize an object to compact UTF-8 JSON bytes"""
+        return json.dumps(obj, default=_default, ensure_ascii=False,
+                          separators=(',', ':')).encode('utf-8')
+
+    def loads(data):
+        """Parse JSON from str or bytes"""
+        return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson when available
+
+    Output is always compact; keys keep their insertion order.
+    """
+
+    sort_keys = False
+    compact = True
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            kwargs.setdefault('default', _default)
+            return json.dumps(obj, **kwargs)
+        return dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
+
+
+# ==========================================
+# PRESERIALIZED STATIC PAYLOADS
+# ==========================================
+
+class StaticPayloads:
+    """Registry of JSON payloads serialized once and served as cached bytes"""
+
+    def __init__(self):
+        self._bodies = {}
+        self._etags = {}
+
+    def register(self, name, payload):
+        """Serialize a payload and store its bytes and ETag"""
+        return self.register_body(name, dumps_bytes(payload))
+
+    def register_body(self, name, body):
+        """Store already serialized JSON bytes and their ETag"""
+        self._bodies[name] = body
+        self._etags[name] = hashlib.sha1(body).hexdigest()
+        return body
+
+    def __contains__(self, name):
+        return name in self._bodies
+
+    def body(self, name):
+        return self._bodies[name]
+
+    def names(self):
+        return list(self._bodies)
+
+    def response(self, name):
+        """Build a response from the cached bytes of a payload"""
+        response = current_app.response_class(self._bodies[name], mimetype='application/json')
+        response.set_etag(self._etags[name], weak=True)
+        return response
+
+
+static_payloads = StaticPayloads()
+
+
+def init_json(app):
+    """Install the fast JSON provider on a Flask app"""
+    app.json = FastJSONProvider(app)
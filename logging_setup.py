@@ -0,0 +1,176 @@
+"""
+Logging Setup
+Applies LOGGING_CONFIG behind a QueueHandler/QueueListener pair so that
+log I/O happens on a background thread instead of the request thread
+
+Educational Purpose Only
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import logging.config
+import os
+import queue
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+from config import LOGGING_CONFIG, LOGGING_OPTIONS
+
+_listener = None
+
+
+# ==========================================
+# FILTERS & FORMATTERS
+# ==========================================
+
+class RequestIdFilter(logging.Filter):
+    """Attach the current request id to every record"""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = g.get('request_id') if has_request_context() else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only 1 in N records at or below a level
+
+    Sampling is counted per call site (logger + line), so one chatty
+    line does not starve the others.
+    """
+
+    def __init__(self, rate=1, level=logging.DEBUG):
+        super().__init__()
+        self.rate = max(1, int(rate))
+        self.level = level
+        self._counters = {}
+
+    def filter(self, record):
+        if self.rate == 1 or record.levelno > self.level:
+            return True
+        key = (record.name, record.lineno)
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters.setdefault(key, itertools.count())
+        return next(counter) % self.rate == 0
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None)
+        }
+        # Structured fields passed through `extra=`
+        for key, value in vars(record).items():
+            if key not in self.RESERVED and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+# ==========================================
+# SETUP
+# ==========================================
+
+def _parse_level_overrides(spec):
+    """Parse 'module=LEVEL,other=LEVEL' into a dict"""
+    levels = {}
+    for part in (spec or '').split(','):
+        name, _, level = part.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(config=None, options=None):
+    """
+    Apply the logging configuration and move handler I/O off-thread
+
+    Handlers declared in the config are attached to a QueueListener; the
+    root logger only gets a non-blocking QueueHandler.
+    """
+    global _listener
+
+    if _listener is not None:
+        return _listener
+
+    config = config or LOGGING_CONFIG
+    options = options or LOGGING_OPTIONS
+
+    # File handlers fail if their directory does not exist yet
+    for handler in config.get('handlers', {}).values():
+        filename = handler.get('filename')
+        if filename:
+            os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+
+    logging.config.dictConfig(config)
+
+    for name, level in _parse_level_overrides(os.getenv('LOG_LEVELS')).items():
+        logging.getLogger(name).setLevel(level)
+
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    for handler in handlers:
+        root.removeHandler(handler)
+
+    queue_handler = DroppingQueueHandler(queue.Queue(options['queue_size']))
+    queue_handler.addFilter(SamplingFilter(options['debug_sample_rate']))
+    queue_handler.addFilter(RequestIdFilter())
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background listener"""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def init_request_ids(app):
+    """Assign each request an id and echo it in the X-Request-ID header"""
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+
+    @app.after_request
+    def add_request_id_header(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+        return response
@@ -244,12 +244,22 @@ function analyzeDisease(imageName) {
         
         console.log('📊 API Response Status:', response.status);
         
+        if (response.status === 422) {
+            // Rejected by the image quality check: ask for a new photo
+            return response.json().then(data => {
+                displayImageQualityRejection(data);
+                return null;
+            });
+        }
         if (!response.ok) {
             throw new Error(`API error: ${response.status} ${response.statusText}`);
         }
         return response.json();
     })
     .then(data => {
+        if (!data) {
+            return;
+        }
         console.log('✅ Disease analysis from API:', data);
         
         // Handle response format: { success: true, analysis: {...} }
@@ -312,6 +322,24 @@ function analyzeDisease(imageName) {
     });
 }
 
+/**
+ * Show why the backend rejected a photo instead of a diagnosis
+ */
+function displayImageQualityRejection(data) {
+    const resultsArea = document.getElementById('diseaseResults');
+    const reasons = ((data.quality && data.quality.issues) || [])
+        .filter(issue => issue.action === 'reject')
+        .map(issue => `<li>${issue.message}</li>`)
+        .join('');
+    
+    resultsArea.innerHTML = `
+        <div style="padding: 20px; background-color: #fff3cd; border-left: 4px solid #f39c12; border-radius: 4px;">
+            <p style="color: #856404; margin: 0; font-weight: bold;">📷 Please retake the photo</p>
+            <ul style="color: #666; margin: 8px 0 0 18px; font-size: 14px;">${reasons}</ul>
+        </div>
+    `;
+}
+
 /**
  * Client-side ML detection using TensorFlow.js
  */
@@ -795,7 +823,7 @@ function searchMarketPrices(event) {
 
                 <div style="margin-top: 15px;">
                     <div class="result-label">Market Outlook</div>
-                    <div class="result-detail">
+                    <div class="result-detail" id="marketOutlook">
                         ${getMarketOutlook(trend)}
                     </div>
                 </div>
@@ -803,7 +831,8 @@ function searchMarketPrices(event) {
         `;
 
         resultsArea.innerHTML = html;
-        drawPriceChart(crop, basePrice, currentPrice);
+        drawPriceChart(crop, basePrice, currentPrice, state);
+        showForecastOutlook(crop, state);
     }, 1000);
 }
 
@@ -831,15 +860,62 @@ function getMarketOutlook(trend) {
     }
 }
 
-function drawPriceChart(crop, basePrice, currentPrice) {
+async function fetchPriceHistory(crop, state, points) {
+    // Server-side downsampled series: one mean price per bucket
+    try {
+        const params = new URLSearchParams({ crop, state, points });
+        const response = await fetch(`${BASE_API_URL}/prices/history?${params.toString()}`);
+        if (!response.ok) {
+            return null;
+        }
+        const data = await response.json();
+        if (!data.series || data.series.mean.length < 2) {
+            return null;
+        }
+        return {
+            labels: data.series.date.map(d => new Date(d).toLocaleString('en-IN', { month: 'short' })),
+            prices: data.series.mean
+        };
+    } catch (error) {
+        console.warn('⚠️ Price history not available, showing demo curve', error);
+        return null;
+    }
+}
+
+async function showForecastOutlook(crop, state) {
+    // Replace the trend-based outlook with the backend forecast when available
+    const outlook = document.getElementById('marketOutlook');
+    if (!outlook || !crop || !state) return;
+
+    try {
+        const params = new URLSearchParams({ crop, state, horizon: 4 });
+        const response = await fetch(`${BASE_API_URL}/prices/forecast?${params.toString()}`);
+        if (!response.ok) return;
+
+        const data = await response.json();
+        const last = data.forecast.price.length - 1;
+        const change = ((data.forecast.price[last] - data.lastObserved.weeklyMean) / data.lastObserved.weeklyMean) * 100;
+        outlook.innerHTML = `
+            ${getMarketOutlook(change)}<br>
+            4-week forecast: ₹${data.forecast.price[last].toFixed(0)}/quintal
+            (80% range ₹${data.forecast.lower80[last].toFixed(0)} - ₹${data.forecast.upper80[last].toFixed(0)})
+        `;
+    } catch (error) {
+        console.warn('⚠️ Price forecast not available', error);
+    }
+}
+
+async function drawPriceChart(crop, basePrice, currentPrice, state) {
     const canvas = document.getElementById('priceCanvas');
     if (!canvas) return;
 
     const ctx = canvas.getContext('2d');
     
-    // Generate demo data for 12 months
-    const months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'];
-    const prices = months.map((m, i) => {
+    const history = state ? await fetchPriceHistory(crop, state, 12) : null;
+    
+    // Generate demo data for 12 months when the backend has no history
+    const months = history ? history.labels : ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'];
+    const prices = history ? history.prices : months.map((m, i) => {
         const variation = Math.sin(i * 0.5) * 500 + Math.random() * 200;
         return basePrice + variation;
     });
@@ -932,10 +1008,10 @@ async function loadGovernmentSchemes() {
     displaySchemes();
 }
 
-function displaySchemes() {
+function displaySchemes(schemes) {
     const container = document.getElementById('schemesList');
 
-    if (!governmentSchemesData.schemes || governmentSchemesData.schemes.length === 0) {
+    if (!schemes && (!governmentSchemesData.schemes || governmentSchemesData.schemes.length === 0)) {
         // Demo schemes
         governmentSchemesData.schemes = [
             {
@@ -982,7 +1058,7 @@ function displaySchemes() {
     }
 
     let html = '';
-    governmentSchemesData.schemes.forEach(scheme => {
+    (schemes || governmentSchemesData.schemes).forEach(scheme => {
         html += `
             <div class="scheme-card">
                 <span class="scheme-badge badge-${scheme.level}">${scheme.level.toUpperCase()}</span>
@@ -1015,10 +1091,21 @@ function displaySchemes() {
     container.innerHTML = html || '<p class="placeholder-text">No schemes available</p>';
 }
 
+let schemeSearchTimer = null;
+
 function filterSchemes() {
+    const query = document.getElementById('schemeSearch').value.trim();
     const typeFilter = document.getElementById('schemeType').value;
     const levelFilter = document.getElementById('schemeLevel').value;
 
+    // Free text goes to the ranked search, once typing pauses
+    clearTimeout(schemeSearchTimer);
+    if (query) {
+        schemeSearchTimer = setTimeout(() => searchSchemes(query, typeFilter, levelFilter), 250);
+        return;
+    }
+    displaySchemes();
+
     const cards = document.querySelectorAll('.scheme-card');
     
     cards.forEach(card => {
@@ -1029,6 +1116,35 @@ function filterSchemes() {
     });
 }
 
+async function searchSchemes(query, typeFilter, levelFilter) {
+    const params = new URLSearchParams({ q: query });
+    if (typeFilter) params.set('type', typeFilter);
+    if (levelFilter) params.set('level', levelFilter);
+
+    let schemes;
+    try {
+        const response = await fetch(`${BASE_API_URL}/schemes/search?${params}`);
+        if (!response.ok) {
+            throw new Error(`API error: ${response.status}`);
+        }
+        schemes = (await response.json()).schemes;
+    } catch (error) {
+        // Without the API, match the words against the loaded schemes
+        console.warn('⚠️ Scheme search not available, filtering loaded schemes', error);
+        const words = query.toLowerCase().split(/\s+/);
+        schemes = (governmentSchemesData.schemes || []).filter(scheme => {
+            const text = `${scheme.name} ${scheme.description} ${scheme.eligibility}`.toLowerCase();
+            return words.some(word => text.includes(word)) &&
+                (!typeFilter || scheme.type === typeFilter) && (!levelFilter || scheme.level === levelFilter);
+        });
+    }
+
+    // Drop results for a query the user has already changed
+    if (document.getElementById('schemeSearch').value.trim() === query) {
+        displaySchemes(schemes);
+    }
+}
+
 // ==========================================
 // UTILITY FUNCTIONS
 // ==========================================
@@ -1211,47 +1327,22 @@ function capitalizeFirst(str) {
 
 function exportHistoryToCSV() {
     const cropSelect = document.getElementById('historyCrop');
-    const crop = cropSelect.value || 'All Crops';
+    const crop = cropSelect.value;
     
-    const table = document.querySelector('.history-table');
-    if (!table) {
-        showError('No data to export');
-        return;
+    // The server streams the full history, so the browser never holds it in memory
+    const params = new URLSearchParams({ format: 'csv' });
+    if (crop) {
+        params.set('crop', crop);
     }
     
-    let csv = 'Crop Yield Prediction History\n';
-    csv += `Generated: ${new Date().toLocaleString('en-IN')}\n`;
-    csv += `Crop: ${crop}\n\n`;
-    
-    const rows = table.querySelectorAll('tr');
-    
-    rows.forEach((row, index) => {
-        const cells = row.querySelectorAll('th, td');
-        const rowData = Array.from(cells).map(cell => {
-            let text = cell.textContent.trim();
-            // Remove extra whitespace and line breaks
-            text = text.replace(/\s+/g, ' ');
-            // Escape quotes and wrap in quotes if contains comma
-            if (text.includes(',')) {
-                text = `"${text.replace(/"/g, '""')}"`;
-            }
-            return text;
-        });
-        csv += rowData.join(',') + '\n';
-    });
-    
-    // Create blob and download
-    const blob = new Blob([csv], { type: 'text/csv' });
-    const url = window.URL.createObjectURL(blob);
     const a = document.createElement('a');
-    a.href = url;
-    a.download = `prediction_history_${crop}_${new Date().getTime()}.csv`;
+    a.href = `${BASE_API_URL}/export/predictions?${params.toString()}`;
+    a.download = '';
     document.body.appendChild(a);
     a.click();
-    window.URL.revokeObjectURL(url);
     document.body.removeChild(a);
     
-    showSuccess('Prediction history exported to CSV');
+    showSuccess('Prediction history export started');
 }
 
 // Load history when navigating to history section
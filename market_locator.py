@@ -0,0 +1,239 @@
+"""
+Nearest Market Locator
+k-nearest mandis with prices for a crop, answered from an in-memory
+uniform latitude/longitude grid built from the reference data store
+
+Each market in markets.json is joined with the market_prices row of its
+state for every crop it trades; markets without such a row are not
+indexed for that crop. Every crop gets its own grid, and a query scans
+rings of cells around the query cell, stopping once no unvisited cell
+can be closer than the k-th distance found (great-circle, haversine).
+The grid does not wrap at the antimeridian, which national data never
+crosses.
+
+Educational Purpose Only
+"""
+
+import logging
+import math
+import threading
+
+import numpy as np
+
+from config import MARKET_LOCATOR_CONFIG
+from reference_data import market_locations, market_prices
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+# Up to this many markets one vectorized scan beats walking grid cells
+SCAN_THRESHOLD = 1000
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distances from one point to arrays of points, in km"""
+    lat, lon = math.radians(lat), math.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat) / 2) ** 2 + math.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class MarketGrid:
+    """Positions of one crop's markets bucketed into square lat/lon cells"""
+
+    def __init__(self, lats, lons, positions, cell_degrees):
+        self.cell = cell_degrees
+        self.positions = np.asarray(positions, dtype=np.int64)
+        self.lats = lats[self.positions]
+        self.lons = lons[self.positions]
+
+        rows = np.floor(self.lats / cell_degrees).astype(np.int64)
+        cols = np.floor(self.lons / cell_degrees).astype(np.int64)
+        self.cells = {}
+        for i, key in enumerate(zip(rows.tolist(), cols.tolist())):
+            self.cells.setdefault(key, []).append(i)
+        self.cells = {key: np.asarray(members, dtype=np.int64) for key, members in self.cells.items()}
+        self.bounds = (int(rows.min()), int(rows.max()), int(cols.min()), int(cols.max())) if len(rows) else None
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _ring(self, row, col, ring):
+        """Members of the cells at Chebyshev distance `ring` from (row, col)"""
+        if ring == 0:
+            keys = [(row, col)]
+        else:
+            keys = [(row - ring, c) for c in range(col - ring, col + ring + 1)]
+            keys += [(row + ring, c) for c in range(col - ring, col + ring + 1)]
+            keys += [(r, col - ring) for r in range(row - ring + 1, row + ring)]
+            keys += [(r, col + ring) for r in range(row - ring + 1, row + ring)]
+        members = [self.cells[key] for key in keys if key in self.cells]
+        return np.concatenate(members) if members else None
+
+    def _min_distance(self, lat, ring):
+        """Lower bound in km for any point in cells `ring` or more rings away"""
+        if ring <= 1:
+            return 0.0
+        # At least ring - 1 whole cells apart in latitude or longitude. The
+        # longitude gap is the shorter one: hav(d) >= cos(lat1) cos(lat2) hav(dlon),
+        # bounded with the highest latitude the ring reaches.
+        gap = math.radians((ring - 1) * self.cell)
+        highest = math.radians(min(abs(lat) + ring * self.cell, 90.0))
+        return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.cos(highest) * math.sin(gap / 2)))
+
+    def nearest(self, lat, lon, k, max_km=None):
+        """
+        (grid member indexes, distances in km) of the k nearest markets,
+        closest first
+        """
+        if not len(self):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        if len(self) <= SCAN_THRESHOLD:
+            return self._closest(np.arange(len(self)), haversine_km(lat, lon, self.lats, self.lons), k, max_km)
+
+        row, col = math.floor(lat / self.cell), math.floor(lon / self.cell)
+        min_row, max_row, min_col, max_col = self.bounds
+        last_ring = max(row - min_row, max_row - row, col - min_col, max_col - col)
+        limit = math.inf if max_km is None else max_km
+
+        found, distances = [], []
+        count, kth = 0, math.inf
+        for ring in range(last_ring + 1):
+            bound = self._min_distance(lat, ring)
+            if bound > limit or (count >= k and bound > kth):
+                break
+            if 8 * ring > len(self.cells):
+                # Wider rings than occupied cells: check everything once
+                found = [np.arange(len(self))]
+                distances = [haversine_km(lat, lon, self.lats, self.lons)]
+                break
+            members = self._ring(row, col, ring)
+            if members is None:
+                continue
+            found.append(members)
+            distances.append(haversine_km(lat, lon, self.lats[members], self.lons[members]))
+            count += len(members)
+            if count >= k:
+                kth = float(np.partition(np.concatenate(distances), k - 1)[k - 1])
+
+        if not found:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        return self._closest(np.concatenate(found), np.concatenate(distances), k, max_km)
+
+    @staticmethod
+    def _closest(found, distances, k, max_km):
+        if max_km is not None:
+            keep = distances <= max_km
+            found, distances = found[keep], distances[keep]
+        order = np.argsort(distances, kind='stable')[:k]
+        return found[order], distances[order]
+
+
+class MarketIndex:
+    """Immutable per-crop spatial index over market locations and their prices"""
+
+    def __init__(self, markets, prices, cell_degrees=0.5):
+        self.markets = []
+        coordinates = []
+        for market in markets:
+            try:
+                lat, lon = float(market['latitude']), float(market['longitude'])
+            except (KeyError, TypeError, ValueError):
+                logger.warning("Market %s has no valid coordinates, skipped", market.get('name'))
+                continue
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                logger.warning("Market %s has out-of-range coordinates, skipped", market.get('name'))
+                continue
+            self.markets.append(market)
+            coordinates.append((lat, lon))
+        self.markets = tuple(self.markets)
+        points = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        self.lats, self.lons = points[:, 0], points[:, 1]
+
+        # (crop, state) -> price row, then the markets that have a price per crop
+        price_rows = {(str(p['crop']).lower(), str(p['state']).lower()): p for p in prices}
+        by_crop = {}
+        for position, market in enumerate(self.markets):
+            for crop in market.get('crops', ()):
+                price = price_rows.get((str(crop).lower(), str(market.get('state', '')).lower()))
+                if price is not None:
+                    positions, rows = by_crop.setdefault(str(crop).lower(), ([], []))
+                    positions.append(position)
+                    rows.append(price)
+
+        self.grids = {}
+        self.prices = {}
+        for crop, (positions, rows) in by_crop.items():
+            self.grids[crop] = MarketGrid(self.lats, self.lons, positions, cell_degrees)
+            self.prices[crop] = rows
+        self.crops = sorted({rows[0]['crop'] for rows in self.prices.values()})
+
+    def nearest(self, lat, lon, crop, k=5, max_km=None):
+        """
+        The k nearest markets trading a crop, closest first
+
+        Returns:
+            List of dicts with market, distance and price fields; None when
+            no market has a price for the crop
+        """
+        grid = self.grids.get(str(crop).lower())
+        if grid is None:
+            return None
+        members, distances = grid.nearest(lat, lon, k, max_km)
+        prices = self.prices[str(crop).lower()]
+        results = []
+        for member, distance in zip(members.tolist(), distances.tolist()):
+            market = self.markets[grid.positions[member]]
+            price = prices[member]
+            results.append({
+                'marketId': market.get('id'),
+                'market': market.get('name'),
+                'district': market.get('district'),
+                'state': market.get('state'),
+                'latitude': float(self.lats[grid.positions[member]]),
+                'longitude': float(self.lons[grid.positions[member]]),
+                'distanceKm': round(distance, 1),
+                'crop': price['crop'],
+                'currentPrice': price.get('currentPrice'),
+                'averagePrice': price.get('averagePrice'),
+                'minPrice': price.get('minPrice'),
+                'maxPrice': price.get('maxPrice'),
+                'trend': price.get('trend'),
+                'month': price.get('month'),
+                'priceLevel': 'state'
+            })
+        return results
+
+
+# ==========================================
+# FILE-BACKED INDEX
+# ==========================================
+
+class MarketLocator:
+    """Keeps a MarketIndex in sync with the market location and price files"""
+
+    def __init__(self, locations, prices, cell_degrees=0.5):
+        self.locations = locations
+        self.prices = prices
+        self.cell_degrees = cell_degrees
+        self._index = None
+        self._versions = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Current index, rebuilt when either reference snapshot has changed"""
+        locations, prices = self.locations.get(), self.prices.get()
+        versions = (locations.version, prices.version)
+        if self._index is not None and self._versions == versions:
+            return self._index
+
+        with self._lock:
+            if self._index is None or self._versions != versions:
+                self._index = MarketIndex(locations.rows, prices.rows, self.cell_degrees)
+                self._versions = versions
+                logger.info("Market locator rebuilt with %d markets", len(self._index.markets))
+        return self._index
+
+
+market_locator = MarketLocator(market_locations, market_prices, MARKET_LOCATOR_CONFIG['cell_degrees'])
@@ -0,0 +1,387 @@
+"""
+Metrics
+Low-overhead counters, gauges and histograms exposed in Prometheus
+text format
+
+Every thread records into its own shard, so the request path never
+takes a shared lock; shards are merged only when metrics are scraped.
+Shards of finished threads are folded into a base total when a new
+thread starts recording or metrics are scraped, so thread-per-request
+servers keep one shard per live thread.
+
+Educational Purpose Only
+"""
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, request
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+# ==========================================
+# METRIC TYPES
+# ==========================================
+
+class _Sharded:
+    """Base class holding one dict of values per live thread"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []  # (thread, shard)
+        self._base = {}  # totals of finished threads' shards
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = {}
+            self._local.shard = shard
+            # Only taken once per thread, never on the hot path
+            with self._shards_lock:
+                self._reap()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _reap(self):
+        """Fold the shards of finished threads into the base (lock held)"""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                for key, value in shard.items():
+                    self._fold(key, value)
+        self._shards = live
+
+    def _fold(self, key, value):
+        raise NotImplementedError
+
+    def _label_key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _snapshots(self):
+        with self._shards_lock:
+            self._reap()
+            shards = [shard for _, shard in self._shards]
+            base = dict(self._base)
+        return [base] + [dict(shard) for shard in shards]
+
+    def _format_labels(self, key, extra=None):
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ''
+        body = ','.join(f'{name}="{_escape(value)}"' for name, value in pairs)
+        return '{' + body + '}'
+
+
+class Counter(_Sharded):
+    """Monotonically increasing counter"""
+
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        shard = self._shard()
+        key = self._label_key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def _fold(self, key, value):
+        self._base[key] = self._base.get(key, 0) + value
+
+    def values(self):
+        totals = {}
+        for snapshot in self._snapshots():
+            for key, value in snapshot.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def expose(self):
+        return [f"{self.name}{self._format_labels(key)} {_format_value(value)}"
+                for key, value in sorted(self.values().items())]
+
+
+class Gauge(Counter):
+    """
+    Value that can go up and down
+
+    inc/dec are sharded like counters; set_function registers a callback
+    evaluated at scrape time for values owned elsewhere (queue depth,
+    cache sizes).
+    """
+
+    type_name = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._functions = {}
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, func, **labels):
+        self._functions[self._label_key(labels)] = func
+
+    def values(self):
+        totals = super().values()
+        for key, func in list(self._functions.items()):
+            try:
+                totals[key] = func()
+            except Exception:
+                continue
+        return totals
+
+
+class Histogram(_Sharded):
+    """Distribution of observed values over fixed buckets"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        shard = self._shard()
+        key = self._label_key(labels)
+        data = shard.get(key)
+        if data is None:
+            # Bucket counts, then +Inf, sum and count
+            data = shard[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        data[bisect_left(self.buckets, value)] += 1
+        data[-2] += value
+        data[-1] += 1
+
+    def _fold(self, key, value):
+        # A new list, so snapshots already handed out never change
+        data = self._base.get(key)
+        self._base[key] = list(value) if data is None else [a + b for a, b in zip(data, value)]
+
+    def time(self, **labels):
+        """Context manager observing the duration of a block"""
+        return _Timer(self, labels)
+
+    def values(self):
+        totals = {}
+        for snapshot in self._snapshots():
+            for key, data in snapshot.items():
+                merged = totals.get(key)
+                if merged is None:
+                    totals[key] = list(data)
+                else:
+                    for i, value in enumerate(data):
+                        merged[i] += value
+        return totals
+
+    def expose(self):
+        lines = []
+        for key, data in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), data):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _format_value(bound)
+                lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {_format_value(data[-2])}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {data[-1]}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+# ==========================================
+# REGISTRY
+# ==========================================
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, documentation, labelnames=(), **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def expose(self):
+        """Render all metrics in Prometheus text exposition format"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+# ==========================================
+# APPLICATION METRICS
+# ==========================================
+http_requests = registry.counter(
+    'http_requests_total', 'HTTP requests by route, method and status', ('method', 'route', 'status'))
+http_latency = registry.histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route', ('method', 'route'))
+http_in_flight = registry.gauge(
+    'http_requests_in_flight', 'Requests currently being processed')
+
+db_query_latency = registry.histogram(
+    'db_query_duration_seconds', 'DatabaseManager method latency', ('method',))
+db_query_errors = registry.counter(
+    'db_query_errors_total', 'DatabaseManager methods that raised', ('method',))
+
+detection_stage_latency = registry.histogram(
+    'detection_stage_duration_seconds', 'Disease detection pipeline stage latency', ('stage',))
+
+yield_inference_latency = registry.histogram(
+    'yield_inference_duration_seconds', 'Yield model inference time per call', ('model', 'mode'))
+
+job_queue_depth = registry.gauge('job_queue_depth', 'Jobs waiting for a worker', ('queue',))
+job_workers_busy = registry.gauge('job_workers_busy', 'Workers currently running a job', ('queue',))
+job_queue_wait = registry.histogram(
+    'job_queue_wait_seconds', 'Time from submit until a worker starts the job', ('queue',),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+job_run_latency = registry.histogram(
+    'job_run_duration_seconds', 'Time a worker spends running a job', ('queue',))
+jobs_total = registry.counter('jobs_total', 'Jobs by final outcome', ('queue', 'outcome'))
+
+activity_log_sampled_out = registry.counter(
+    'activity_log_sampled_out_total', 'Activity rows not stored because of sampling', ('type',))
+activity_log_retention = registry.counter(
+    'activity_log_retention_rows_total', 'Activity rows archived and removed by retention', ('action',))
+
+image_archive_writes = registry.counter(
+    'image_archive_writes_total', 'Uploaded images offered to the archive, by result', ('result',))
+image_quality_checks = registry.counter(
+    'image_quality_checks_total', 'Uploads checked by the image quality gate, by outcome', ('result',))
+image_quality_issues = registry.counter(
+    'image_quality_issues_total', 'Image quality problems found, by check and action', ('check', 'action'))
+
+sse_subscribers = registry.gauge('sse_subscribers', 'Connected Server-Sent Events subscribers', ('stream',))
+sse_dropped = registry.counter(
+    'sse_dropped_subscribers_total', 'Subscribers dropped for falling behind', ('stream',))
+
+cache_hits = registry.gauge('cache_hits', 'Cache hits since startup', ('cache',))
+cache_misses = registry.gauge('cache_misses', 'Cache misses since startup', ('cache',))
+cache_hit_ratio = registry.gauge('cache_hit_ratio', 'Cache hit ratio since startup', ('cache',))
+
+
+def register_cache(name, stats):
+    """
+    Report a cache through the cache gauges
+
+    Args:
+        name: Cache label
+        stats: Callable returning a dict with 'hits' and 'misses'
+    """
+    cache_hits.set_function(lambda: stats()['hits'], cache=name)
+    cache_misses.set_function(lambda: stats()['misses'], cache=name)
+
+    def ratio():
+        data = stats()
+        total = data['hits'] + data['misses']
+        return data['hits'] / total if total else 0.0
+
+    cache_hit_ratio.set_function(ratio, cache=name)
+
+
+def timed_query(func):
+    """Decorator recording latency of a DatabaseManager method"""
+    method = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            db_query_errors.inc(method=method)
+            raise
+        finally:
+            db_query_latency.observe(time.perf_counter() - start, method=method)
+
+    return wrapper
+
+
+def stage_timer(stage):
+    """Context manager timing one detection pipeline stage"""
+    return detection_stage_latency.time(stage=stage)
+
+
+# ==========================================
+# FLASK INTEGRATION
+# ==========================================
+
+def init_metrics(app):
+    """Record per-route request metrics and serve /api/metrics"""
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+        http_in_flight.inc()
+
+    @app.teardown_request
+    def finish_request(exc):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        http_in_flight.dec()
+
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        status = g.pop('metrics_status', 500 if exc is not None else 200)
+        http_latency.observe(time.perf_counter() - start, method=request.method, route=route)
+        http_requests.inc(method=request.method, route=route, status=status)
+
+    @app.after_request
+    def record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics():
+        """Prometheus metrics endpoint"""
+        return Response(registry.expose(), content_type=CONTENT_TYPE)
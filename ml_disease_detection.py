@@ -9,94 +9,43 @@ Educational Purpose - Potato & Tomato Only
 import numpy as np
 from PIL import Image
 import io
+import logging
 import random
 from datetime import datetime
 
+from config import IMAGE_QUALITY_CONFIG
+from disease_catalog import disease_catalog
+from metrics import image_quality_checks, image_quality_issues, stage_timer
+
+logger = logging.getLogger(__name__)
+
 # Optional ML imports (with fallbacks)
 try:
     import tensorflow as tf
     TENSORFLOW_AVAILABLE = True
-    print("✅ TensorFlow imported successfully")
+    logger.info("TensorFlow imported successfully")
 except ImportError:
     TENSORFLOW_AVAILABLE = False
-    print("⚠️  TensorFlow not available. Using mock detection.")
-
-# Disease database for Potato & Tomato
-DISEASE_DATABASE = {
-    'potato': {
-        'early_blight': {
-            'name': 'Early Blight',
-            'severity': 'High',
-            'description': 'Fungal disease causing circular spots with concentric rings on leaves',
-            'pesticide': 'Copper Fungicide, Mancozeb, Chlorothalonil',
-            'treatment': 'Remove affected leaves, improve air circulation, avoid overhead watering',
-            'recommendation': 'Apply fungicide weekly, especially during humid weather'
-        },
-        'late_blight': {
-            'name': 'Late Blight',
-            'severity': 'Critical',
-            'description': 'Severe fungal disease causing water-soaked spots and white mold on undersides',
-            'pesticide': 'Ridomil, Metalaxyl, Copper + Mancozeb combination',
-            'treatment': 'Remove infected plants, improve drainage, apply preventive sprays in wet weather',
-            'recommendation': 'This is critical - remove affected plants immediately to prevent spread'
-        },
-        'bacterial_wilt': {
-            'name': 'Bacterial Wilt',
-            'severity': 'High',
-            'description': 'Bacterial disease causing wilting, stunting, and brown discoloration',
-            'pesticide': 'Streptomycin, Copper sulfate, Bacillus-based biopesticide',
-            'treatment': 'Remove infected plants, control insect vectors, disinfect tools',
-            'recommendation': 'Control Colorado beetles as they spread this disease'
-        },
-        'healthy': {
-            'name': 'Healthy Leaf',
-            'severity': 'None',
-            'description': 'Leaf appears healthy with no visible disease symptoms',
-            'pesticide': 'No treatment needed',
-            'treatment': 'Continue regular crop maintenance and monitoring',
-            'recommendation': 'Maintain regular watering and fertilizing schedule'
-        }
-    },
-    'tomato': {
-        'early_blight': {
-            'name': 'Early Blight',
-            'severity': 'Medium',
-            'description': 'Fungal disease with brown spots with concentric rings on tomato leaves',
-            'pesticide': 'Copper Fungicide, Mancozeb, Chlorothalonil, Azoxystrobin',
-            'treatment': 'Remove lower leaves, improve air flow, stake plants for better ventilation',
-            'recommendation': 'Prune lower leaves and maintain good air circulation'
-        },
-        'septoria_leaf_spot': {
-            'name': 'Septoria Leaf Spot',
-            'severity': 'Low',
-            'description': 'Fungal disease causing small circular spots with dark borders and gray centers',
-            'pesticide': 'Mancozeb, Chlorothalonil, Copper-based fungicide',
-            'treatment': 'Remove infected leaves, improve air circulation, avoid wetting leaves',
-            'recommendation': 'Avoid overhead irrigation and remove infected leaves'
-        },
-        'fusarium_wilt': {
-            'name': 'Fusarium Wilt',
-            'severity': 'High',
-            'description': 'Vascular fungal disease causing yellowing on one side, browning of vascular tissue',
-            'pesticide': 'Trichoderma, Pseudomonas, Bacillus subtilis (biocontrol)',
-            'treatment': 'Use resistant varieties, practice crop rotation, solarize soil',
-            'recommendation': 'Use resistant varieties for next season, rotate crops'
-        },
-        'healthy': {
-            'name': 'Healthy Leaf',
-            'severity': 'None',
-            'description': 'Leaf appears healthy with no visible disease symptoms',
-            'pesticide': 'No treatment needed',
-            'treatment': 'Continue regular crop maintenance and monitoring',
-            'recommendation': 'Maintain regular watering and fertilizing schedule'
-        }
-    }
-}
+    logger.warning("TensorFlow not available. Using mock detection.")
 
 # ==========================================
 # IMAGE PROCESSING
 # ==========================================
 
+def decode_image(data, target_size=(224, 224)):
+    """
+    Decode image bytes to a resized RGB uint8 array of shape (H, W, 3)
+    
+    Kept separate from normalization so worker processes can hand
+    decoded images back at a quarter of the float32 size.
+    """
+    img = Image.open(io.BytesIO(data))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    img = img.resize(target_size, Image.Resampling.LANCZOS)
+    return np.asarray(img, dtype=np.uint8)
+
+
 def preprocess_image(image_file, target_size=(224, 224)):
     """
     Preprocess image for ML model
@@ -111,19 +60,13 @@ def preprocess_image(image_file, target_size=(224, 224)):
     try:
         # Read image
         if isinstance(image_file, str):
-            img = Image.open(image_file)
+            with open(image_file, 'rb') as f:
+                data = f.read()
         else:
-            img = Image.open(io.BytesIO(image_file.read()))
-        
-        # Convert to RGB if necessary
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-        
-        # Resize
-        img = img.resize(target_size, Image.Resampling.LANCZOS)
+            data = image_file.read()
         
-        # Convert to numpy array and normalize
-        img_array = np.array(img, dtype=np.float32) / 255.0
+        # Decode, convert to RGB and resize, then normalize
+        img_array = decode_image(data, target_size).astype(np.float32) / 255.0
         
         # Add batch dimension
         img_array = np.expand_dims(img_array, axis=0)
@@ -131,7 +74,7 @@ def preprocess_image(image_file, target_size=(224, 224)):
         return img_array
         
     except Exception as e:
-        print(f"❌ Error preprocessing image: {e}")
+        logger.error("Error preprocessing image: %s", e)
         raise
 
 
@@ -161,10 +104,104 @@ def extract_image_features(image_array):
         return features
         
     except Exception as e:
-        print(f"❌ Error extracting features: {e}")
+        logger.error("Error extracting features: %s", e)
         return None
 
 
+def extract_image_features_batch(images):
+    """
+    extract_image_features for a stack of uint8 images, shape (N, H, W, 3)
+    
+    Returns:
+        (N, 8) feature matrix
+    """
+    pixels = images.astype(np.float32)
+    mean_color = pixels.mean(axis=(1, 2))
+    std_color = pixels.std(axis=(1, 2))
+    return np.column_stack([mean_color, std_color, mean_color[:, 1], std_color[:, 1]])
+
+
+# ==========================================
+# IMAGE QUALITY GATE
+# ==========================================
+
+QUALITY_MESSAGES = {
+    'unreadable': 'The file could not be read as an image',
+    'blur': 'The photo is blurry; hold the camera steady and focus on the leaf',
+    'dark': 'The photo is too dark; take it in daylight',
+    'bright': 'The photo is overexposed; avoid direct sunlight on the leaf',
+    'clipped': 'Large parts of the photo are pure black or white',
+    'green': 'No leaf found; fill the frame with a single leaf'
+}
+
+
+def _grade(check, value, limits, below, issues):
+    """Add an issue when value passes the check's reject or warn limit"""
+    for action in ('reject', 'warn'):
+        limit = limits[action]
+        if (value < limit) if below else (value > limit):
+            issues.append({'check': check, 'action': action, 'message': QUALITY_MESSAGES[check]})
+            return
+
+
+def check_image_quality(data, config=IMAGE_QUALITY_CONFIG):
+    """
+    Blur, exposure and leaf checks on a small thumbnail of an upload
+    
+    JPEGs are decoded straight at reduced scale (draft mode), so the
+    check costs a few milliseconds even for phone photos.
+    
+    Returns:
+        dict with status ('ok', 'warn' or 'reject'), the issues found and
+        the measured values
+    """
+    size = config['thumbnail_size']
+    try:
+        img = Image.open(io.BytesIO(data))
+        img.draft('RGB', (size, size))
+        img = img.convert('RGB')
+        img.thumbnail((size, size))
+    except Exception as e:
+        logger.info("[Quality Gate] Unreadable image: %s", e)
+        issues = [{'check': 'unreadable', 'action': 'reject', 'message': QUALITY_MESSAGES['unreadable']}]
+        return {'status': 'reject', 'issues': issues}
+    
+    rgb = np.asarray(img, dtype=np.float32)
+    gray = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    # 4-neighbour Laplacian; its variance drops as edges soften
+    laplacian = gray[1:-1, :-2] + gray[1:-1, 2:] + gray[:-2, 1:-1] + gray[2:, 1:-1] - 4 * gray[1:-1, 1:-1]
+    histogram = np.bincount(gray.astype(np.uint8).ravel(), minlength=256)
+    measures = {
+        'blur': float(laplacian.var()) if laplacian.size else 0.0,
+        'brightness': float(gray.mean()),
+        'clipped': float((histogram[:11].sum() + histogram[245:].sum()) / gray.size),
+        # Excess green (2G - R - B) picks out green and yellowing leaf tissue
+        'green': float((2 * rgb[..., 1] - rgb[..., 0] - rgb[..., 2] > 20).mean())
+    }
+    
+    issues = []
+    _grade('blur', measures['blur'], config['blur'], True, issues)
+    _grade('dark', measures['brightness'], config['dark'], True, issues)
+    _grade('bright', measures['brightness'], config['bright'], False, issues)
+    _grade('clipped', measures['clipped'], config['clipped'], False, issues)
+    _grade('green', measures['green'], config['green'], True, issues)
+    
+    actions = {issue['action'] for issue in issues}
+    status = 'reject' if 'reject' in actions else 'warn' if actions else 'ok'
+    return {'status': status, 'issues': issues,
+            'measures': {name: round(value, 3) for name, value in measures.items()}}
+
+
+def _quality_gate(data):
+    """Run the quality checks and count the outcome"""
+    with stage_timer('quality'):
+        report = check_image_quality(data)
+    image_quality_checks.inc(result=report['status'])
+    for issue in report['issues']:
+        image_quality_issues.inc(check=issue['check'], action=issue['action'])
+    return report
+
+
 # ==========================================
 # ML DISEASE DETECTION
 # ==========================================
@@ -179,20 +216,40 @@ def detect_disease_ml(image_file, crop_type='potato'):
         crop_type: 'potato' or 'tomato'
         
     Returns:
-        Disease detection result dict
+        Disease detection result dict, with the quality report under
+        'quality' when the gate ran; {'rejected': True, 'quality': ...,
+        'crop': ...} when the image failed it
     """
     crop_type = crop_type.lower()
     
     # Validate crop type
-    if crop_type not in ['potato', 'tomato']:
+    if crop_type not in disease_catalog.crops:
         crop_type = 'potato'
     
-    print(f"🤖 [ML Detection] Starting detection for {crop_type}...")
+    logger.debug("[ML Detection] Starting detection for %s", crop_type)
     
+    # Cheap checks first: a blurry, dark or leafless photo is not worth inferring on
+    quality = None
+    if IMAGE_QUALITY_CONFIG['enabled']:
+        data = image_file.read()
+        quality = _quality_gate(data)
+        if quality['status'] == 'reject':
+            logger.info("[ML Detection] Image rejected: %s", [issue['check'] for issue in quality['issues']])
+            return {'rejected': True, 'quality': quality, 'crop': crop_type, 'method': 'Quality Gate'}
+        image_file = io.BytesIO(data)
+    
+    result = _detect(image_file, crop_type)
+    if quality is not None:
+        result['quality'] = quality
+    return result
+
+
+def _detect(image_file, crop_type):
+    """Preprocess and classify, falling back to features or mock detection"""
     try:
         # Preprocess image
-        print("🖼️  [ML Detection] Preprocessing image...")
-        image_array = preprocess_image(image_file)
+        with stage_timer('preprocess'):
+            image_array = preprocess_image(image_file)
         
         # If TensorFlow available, try ML detection
         if TENSORFLOW_AVAILABLE:
@@ -201,11 +258,11 @@ def detect_disease_ml(image_file, crop_type='potato'):
                 return result
         
         # Fallback to feature-based detection
-        print("📊 [ML Detection] Using feature-based detection...")
+        logger.debug("[ML Detection] Using feature-based detection")
         return _feature_based_detection(image_array, crop_type)
         
     except Exception as e:
-        print(f"⚠️  [ML Detection] Error: {e}. Using mock detection...")
+        logger.warning("[ML Detection] Error: %s. Using mock detection", e)
         return detect_disease_mock(crop_type)
 
 
@@ -214,24 +271,26 @@ def _tensorflow_detection(image_array, crop_type):
     TensorFlow-based disease detection
     """
     try:
-        print("🧠 [TensorFlow] Running model inference...")
+        logger.debug("[TensorFlow] Running model inference")
         
         # Here you would load and use a pre-trained model
         # For now, using feature extraction as proxy
-        features = extract_image_features(image_array)
+        with stage_timer('features'):
+            features = extract_image_features(image_array)
         
         if features is None:
             return None
         
         # Simple classification based on features
         # In production, this would be a trained CNN
-        result = _classify_by_features(features, crop_type)
+        with stage_timer('classify'):
+            result = _classify_by_features(features, crop_type)
         result['method'] = 'ML Model (Feature-based)'
         
         return result
         
     except Exception as e:
-        print(f"❌ [TensorFlow] Error: {e}")
+        logger.error("[TensorFlow] Error: %s", e)
         return None
 
 
@@ -240,19 +299,21 @@ def _feature_based_detection(image_array, crop_type):
     Feature-based disease detection using color and texture analysis
     """
     try:
-        features = extract_image_features(image_array)
+        with stage_timer('features'):
+            features = extract_image_features(image_array)
         
         if features is None:
             return detect_disease_mock(crop_type)
         
-        result = _classify_by_features(features, crop_type)
+        with stage_timer('classify'):
+            result = _classify_by_features(features, crop_type)
         result['method'] = 'Feature Analysis'
         result['confidence'] = max(60, result['confidence'] - 10)  # Lower confidence for feature-based
         
         return result
         
     except Exception as e:
-        print(f"⚠️  [Feature Detection] Error: {e}")
+        logger.warning("[Feature Detection] Error: %s", e)
         return detect_disease_mock(crop_type)
 
 
@@ -264,37 +325,68 @@ def _classify_by_features(features, crop_type):
     green_component = features[4] if len(features) > 4 else 100
     color_variance = features[3] if len(features) > 3 else 50
     
-    disease_database = DISEASE_DATABASE[crop_type]
-    
     # Simple heuristic-based classification
     if green_component > 120 and color_variance < 30:
         # Likely healthy - high green, low variance
-        disease_key = 'healthy'
+        disease = disease_catalog.lookup(crop_type, 'healthy')
         confidence = int(80 + (color_variance / 30) * 20)
     elif color_variance > 60:
         # High variance suggests disease spots
-        diseases = [k for k in disease_database.keys() if k != 'healthy']
-        disease_key = random.choice(diseases) if diseases else 'early_blight'
+        diseases = disease_catalog.diseased[crop_type]
+        disease = random.choice(diseases) if diseases else disease_catalog.lookup(crop_type, 'healthy')
         confidence = int(70 + (color_variance / 100) * 20)
     else:
         # Uncertain - could be early stages
-        disease_key = random.choice(list(disease_database.keys()))
+        disease = random.choice(disease_catalog.for_crop(crop_type))
         confidence = int(65 + (green_component / 255) * 20)
     
-    disease_info = disease_database[disease_key]
-    
+    return _detection_result(disease, min(95, max(50, confidence)))  # Clamp between 50-95%
+
+
+def _detection_result(disease, confidence):
+    """Detection result dict for a catalog entry"""
     return {
-        'name': disease_info['name'],
-        'confidence': min(95, max(50, confidence)),  # Clamp between 50-95%
-        'severity': disease_info['severity'],
-        'description': disease_info['description'],
-        'pesticide': disease_info['pesticide'],
-        'treatment': disease_info['treatment'],
-        'recommendation': disease_info['recommendation'],
-        'crop': crop_type
+        'name': disease.name,
+        'confidence': confidence,
+        'severity': disease.severity,
+        'description': disease.description,
+        'pesticide': disease.pesticide,
+        'treatment': disease.treatment,
+        'recommendation': disease.recommendation,
+        'crop': disease.crop
     }
 
 
+def detect_disease_batch(images, crop_types):
+    """
+    Detect diseases for a batch of decoded images
+    
+    Args:
+        images: uint8 array of shape (N, H, W, 3), e.g. stacked decode_image results
+        crop_types: N crop names
+        
+    Returns:
+        List of N detection result dicts, as detect_disease_ml returns
+    """
+    with stage_timer('features'):
+        features = extract_image_features_batch(images)
+    
+    results = []
+    with stage_timer('classify'):
+        for row, crop_type in zip(features, crop_types):
+            crop_type = crop_type.lower() if crop_type else 'potato'
+            if crop_type not in disease_catalog.crops:
+                crop_type = 'potato'
+            result = _classify_by_features(row, crop_type)
+            if TENSORFLOW_AVAILABLE:
+                result['method'] = 'ML Model (Feature-based)'
+            else:
+                result['method'] = 'Feature Analysis'
+                result['confidence'] = max(60, result['confidence'] - 10)
+            results.append(result)
+    return results
+
+
 # ==========================================
 # MOCK DISEASE DETECTION (FALLBACK)
 # ==========================================
@@ -305,34 +397,22 @@ def detect_disease_mock(crop_type='potato'):
     """
     crop_type = crop_type.lower()
     
-    if crop_type not in ['potato', 'tomato']:
+    if crop_type not in disease_catalog.crops:
         crop_type = 'potato'
     
-    print(f"📌 [Mock Detection] Generating mock analysis for {crop_type}...")
-    
-    disease_database = DISEASE_DATABASE[crop_type]
+    logger.debug("[Mock Detection] Generating mock analysis for %s", crop_type)
     
     # Weighted random selection
     rand = random.random()
     if rand > 0.6:  # 40% chance of disease, 60% healthy
-        selected_disease = 'healthy'
+        disease = disease_catalog.lookup(crop_type, 'healthy')
         confidence = random.randint(80, 98)
     else:
-        diseases = [k for k in disease_database.keys() if k != 'healthy']
-        selected_disease = random.choice(diseases)
+        disease = random.choice(disease_catalog.diseased[crop_type])
         confidence = random.randint(70, 95)
     
-    disease_info = disease_database[selected_disease]
-    
     return {
-        'name': disease_info['name'],
-        'confidence': confidence,
-        'severity': disease_info['severity'],
-        'description': disease_info['description'],
-        'pesticide': disease_info['pesticide'],
-        'treatment': disease_info['treatment'],
-        'recommendation': disease_info['recommendation'],
-        'crop': crop_type,
+        **_detection_result(disease, confidence),
         'method': 'Mock Detection (Educational)',
         'note': 'This is a simulated analysis for demonstration purposes'
     }
@@ -385,5 +465,6 @@ def format_result(detection_result, filename=''):
         'cropType': detection_result['crop'],
         'method': detection_result.get('method', 'Unknown'),
         'timestamp': datetime.now().isoformat(),
-        'note': detection_result.get('note', '')
+        'note': detection_result.get('note', ''),
+        'quality': detection_result.get('quality')
     }
@@ -0,0 +1,324 @@
+"""
+Price Forecasting
+Damped Holt (double exponential smoothing) forecasts with confidence
+bands for every crop x state price series, fitted in one vectorized
+batch and served from a precomputed cache
+
+The batch job resamples the daily history to weekly means, evaluates a
+grid of smoothing parameters for all series at once (arrays of shape
+series x grid), keeps the best one-step-ahead fit per series and stores
+the forecasts in MODEL_PATHS['price_forecasting']. Requests only look
+forecasts up.
+
+Usage:
+    python price_forecast.py    # refit and save
+
+Educational Purpose Only
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from config import MODEL_PATHS, MODEL_SETTINGS
+from price_history import day_strings, price_history
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SETTINGS = MODEL_SETTINGS['price_forecasting']
+
+# Two-sided normal quantiles for the bands
+Z_80 = 1.2816
+Z_95 = 1.96
+
+
+# ==========================================
+# BATCH FIT
+# ==========================================
+
+def weekly_matrix(series_list, weeks, min_weeks):
+    """
+    Resample daily series to the last `weeks` weekly means
+
+    Returns:
+        (kept series, matrix of shape (len(kept), weeks)); gaps are
+        filled with the previous week's price
+    """
+    kept, rows = [], []
+    for series in series_list:
+        if len(series.dates) == 0:
+            continue
+        dates = np.asarray(series.dates, dtype=np.int64)
+        prices = np.asarray(series.prices, dtype=np.float64)
+        age = (dates[-1] - dates) // 7
+        recent = age < weeks
+        bucket = weeks - 1 - age[recent]
+        counts = np.bincount(bucket, minlength=weeks)
+        if np.count_nonzero(counts) < min_weeks:
+            continue
+        sums = np.bincount(bucket, weights=prices[recent], minlength=weeks)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            row = sums / counts
+        kept.append(series)
+        rows.append(row)
+
+    if not rows:
+        return kept, np.empty((0, weeks))
+
+    matrix = np.vstack(rows)
+    # Forward fill along time, then back fill leading gaps
+    valid = ~np.isnan(matrix)
+    index = np.where(valid, np.arange(weeks), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    matrix = matrix[np.arange(len(rows))[:, None], index]
+    first = np.argmax(valid, axis=1)
+    leading = np.arange(weeks) < first[:, None]
+    matrix[leading] = np.broadcast_to(matrix[np.arange(len(rows)), first][:, None], matrix.shape)[leading]
+    return kept, matrix
+
+
+def fit_holt(matrix, alphas, betas, phi):
+    """
+    Fit damped Holt smoothing for every series and parameter pair at once
+
+    Args:
+        matrix: (S, T) observations
+        alphas, betas: candidate level and trend smoothing factors
+        phi: trend damping factor
+
+    Returns:
+        dict of (S,) arrays: alpha, beta, level, trend, sigma (RMSE of
+        one-step-ahead errors)
+    """
+    alpha_grid, beta_grid = (g.ravel() for g in np.meshgrid(alphas, betas, indexing='ij'))
+    series_count, steps = matrix.shape
+
+    level = np.repeat(matrix[:, :1], alpha_grid.size, axis=1)
+    trend = np.repeat((matrix[:, 1:2] - matrix[:, :1]), alpha_grid.size, axis=1)
+    sse = np.zeros_like(level)
+
+    for t in range(1, steps):
+        predicted = level + phi * trend
+        error = matrix[:, t:t + 1] - predicted
+        sse += error * error
+        level = predicted + alpha_grid * error
+        trend = phi * trend + alpha_grid * beta_grid * error
+
+    best = np.argmin(sse, axis=1)
+    rows = np.arange(series_count)
+    return {
+        'alpha': alpha_grid[best],
+        'beta': beta_grid[best],
+        'level': level[rows, best],
+        'trend': trend[rows, best],
+        'sigma': np.sqrt(sse[rows, best] / max(steps - 1, 1))
+    }
+
+
+def forecast_paths(fit, horizon, phi):
+    """
+    Point forecasts and prediction standard deviations, shape (S, horizon)
+
+    Uses the damped-trend state space variance, which the bands treat
+    as normal.
+    """
+    h = np.arange(1, horizon + 1)
+    damp = np.cumsum(phi ** h)  # phi + phi^2 + ... + phi^h
+    point = fit['level'][:, None] + damp[None, :] * fit['trend'][:, None]
+
+    # c_j = alpha * (1 + beta * (phi + ... + phi^j)) for j = 1..h-1
+    c = fit['alpha'][:, None] * (1 + fit['beta'][:, None] * damp[None, :-1])
+    variance = np.concatenate([np.zeros((len(point), 1)), np.cumsum(c * c, axis=1)], axis=1) + 1
+    return point, fit['sigma'][:, None] * np.sqrt(variance)
+
+
+def change_pct(last_price, price):
+    """Percent change from the last weekly mean to a forecast price (None without a last price)"""
+    return round(float((price - last_price) / last_price * 100), 2) if last_price else None
+
+
+def truncate(forecast, horizon):
+    """A forecast cut to its first `horizon` weeks, with expectedChangePct for that week"""
+    points = {key: values[:horizon] for key, values in forecast['forecast'].items()}
+    return {
+        **forecast,
+        'forecast': points,
+        'expectedChangePct': change_pct(forecast['lastObserved']['weeklyMean'], points['price'][-1])
+    }
+
+
+def history_fingerprint(store):
+    """Cheap identity of a store's contents: each series' key, length and last point"""
+    summary = sorted(
+        (key, len(s.dates), int(s.dates[-1]), float(s.prices[-1])) if len(s.dates) else (key, 0)
+        for key, s in store.series.items())
+    return hashlib.sha1(repr(summary).encode('utf-8')).hexdigest()
+
+
+def run_batch(store, settings=SETTINGS):
+    """
+    Fit all series of a price history store
+
+    Returns:
+        dict with 'generatedAt', 'sample', 'history' (fingerprint of the
+        store) and 'forecasts' keyed by (crop, state) lowercased
+    """
+    start = time.perf_counter()
+    series_list, matrix = weekly_matrix(
+        list(store.series.values()), settings['history_weeks'], settings['min_weeks'])
+
+    forecasts = {}
+    if len(series_list):
+        phi = settings['damping']
+        fit = fit_holt(matrix, np.asarray(settings['alphas']), np.asarray(settings['betas']), phi)
+        point, std = forecast_paths(fit, settings['horizon_weeks'], phi)
+        point = np.maximum(point, 0)
+
+        for i, series in enumerate(series_list):
+            last_day = int(series.dates[-1])
+            weeks = last_day + 7 * np.arange(1, settings['horizon_weeks'] + 1)
+            last_price = float(matrix[i, -1])
+            forecasts[(series.crop.lower(), series.state.lower())] = {
+                'crop': series.crop,
+                'state': series.state,
+                'lastObserved': {'date': day_strings([last_day])[0], 'weeklyMean': round(last_price, 2)},
+                'model': {
+                    'method': 'damped_holt',
+                    'alpha': float(fit['alpha'][i]),
+                    'beta': float(fit['beta'][i]),
+                    'phi': phi,
+                    'rmse': round(float(fit['sigma'][i]), 2)
+                },
+                'forecast': {
+                    'date': day_strings(weeks),
+                    'price': np.round(point[i], 2).tolist(),
+                    'lower80': np.round(np.maximum(point[i] - Z_80 * std[i], 0), 2).tolist(),
+                    'upper80': np.round(point[i] + Z_80 * std[i], 2).tolist(),
+                    'lower95': np.round(np.maximum(point[i] - Z_95 * std[i], 0), 2).tolist(),
+                    'upper95': np.round(point[i] + Z_95 * std[i], 2).tolist()
+                },
+                'expectedChangePct': change_pct(last_price, point[i, -1])
+            }
+
+    logger.info("Fitted %d price forecasts in %.1f ms", len(forecasts), (time.perf_counter() - start) * 1000)
+    return {
+        'generatedAt': datetime.now().isoformat(),
+        'horizonWeeks': settings['horizon_weeks'],
+        'sample': store.sample,
+        'history': history_fingerprint(store),
+        'forecasts': forecasts
+    }
+
+
+# ==========================================
+# CACHE
+# ==========================================
+
+class ForecastCache:
+    """
+    Precomputed forecasts, refitted in a background thread when the price
+    history store changes or the forecasts are older than max_age
+    """
+
+    def __init__(self, history, path, max_age):
+        self.history = history
+        self.path = path
+        self.max_age = max_age
+        self._data = None
+        self._fitted_at = 0.0
+        self._store = None
+        self._refitting = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Load saved forecasts if present; forecasts fitted on other history
+        than the current store are served only until a refit replaces them
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            logger.info("No saved price forecasts (%s)", e)
+            return False
+        store = self.history.get()
+        self._data = data
+        self._store = store
+        if data.get('history') == history_fingerprint(store):
+            self._fitted_at = time.monotonic() - max(0.0, time.time() - os.path.getmtime(self.path))
+        else:
+            # Stale: get() refits right away
+            self._fitted_at = -float('inf')
+            logger.info("Saved price forecasts were fitted on other price history, refitting")
+        logger.info("Loaded %d saved price forecasts", len(data['forecasts']))
+        return True
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(self._data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+
+    def refit(self, save=True):
+        """Run the batch job now (blocking)"""
+        store = self.history.get()
+        data = run_batch(store)
+        self._data, self._store, self._fitted_at = data, store, time.monotonic()
+        if save and not store.sample:
+            try:
+                self.save()
+            except OSError as e:
+                logger.warning("Could not save price forecasts: %s", e)
+        return data
+
+    def _refit_in_background(self):
+        with self._lock:
+            if self._refitting:
+                return
+            self._refitting = True
+
+        def work():
+            try:
+                self.refit()
+            except Exception:
+                logger.exception("Price forecast refit failed")
+            finally:
+                self._refitting = False
+
+        threading.Thread(target=work, name='price-forecast-refit', daemon=True).start()
+
+    def get(self):
+        """Current forecasts (None until the first fit finishes)"""
+        if self._data is None and not self._refitting:
+            self.load()
+        stale = time.monotonic() - self._fitted_at > self.max_age
+        if self._data is None or stale or (self._store is not None and self.history.get() is not self._store):
+            self._refit_in_background()
+        return self._data
+
+
+forecast_cache = ForecastCache(
+    price_history,
+    os.path.join(BASE_DIR, MODEL_PATHS['price_forecasting']),
+    max_age=SETTINGS['max_age']
+)
+
+
+def main():
+    data = forecast_cache.refit(save=False)
+    forecast_cache.save()
+    print(f"Saved {len(data['forecasts'])} forecasts to {forecast_cache.path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,303 @@
+"""
+Price History Store
+Daily mandi price time series per crop x state held in columnar NumPy
+arrays, with time-range queries and min/max/mean downsampling for charts
+
+On disk a store is a directory with one concatenated column per file:
+    series.json   crop, state and [start, end) offsets of each series
+    dates.npy     int32 days since 1970-01-01, sorted within a series
+    prices.npy    float32 modal price per quintal
+The .npy columns can be memory-mapped, so only queried ranges are read.
+Saving writes every file under a temporary name and renames it into
+place, so stores mapped by a running server keep their old files.
+
+Usage:
+    python price_history.py import prices.csv [--out data/price_history]
+    python price_history.py sample [--days 730] [--out data/price_history]
+
+Educational Purpose Only
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import date
+
+import numpy as np
+
+from config import PRICE_HISTORY_CONFIG
+from reference_data import market_prices
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+EPOCH = date(1970, 1, 1)
+
+
+def to_day(value):
+    """date or ISO string -> days since 1970-01-01"""
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return (value - EPOCH).days
+
+
+def _replace(path, write):
+    """Write a file through a temporary name in its directory, then rename it over path"""
+    temp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp, 'wb') as f:
+            write(f)
+        os.replace(temp, path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+def day_strings(days):
+    return np.asarray(days, dtype='int64').astype('datetime64[D]').astype(str).tolist()
+
+
+class PriceSeries:
+    """One crop x state series (views into the store's columns)"""
+
+    __slots__ = ('crop', 'state', 'dates', 'prices')
+
+    def __init__(self, crop, state, dates, prices):
+        self.crop = crop
+        self.state = state
+        self.dates = dates
+        self.prices = prices
+
+    def range(self, start=None, end=None):
+        """(dates, prices) with start <= date <= end (days), by binary search"""
+        lo = 0 if start is None else int(np.searchsorted(self.dates, start, side='left'))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, end, side='right'))
+        return self.dates[lo:hi], self.prices[lo:hi]
+
+
+def downsample(dates, prices, points):
+    """
+    Reduce a series to at most `points` equal-width time buckets
+
+    Returns:
+        dict of lists: date (first day in the bucket), min, max, mean and
+        count per non-empty bucket; the raw points when already small
+    """
+    dates = np.asarray(dates)
+    prices = np.asarray(prices, dtype=np.float64)
+    if len(dates) <= points:
+        values = np.round(prices, 2).tolist()
+        return {
+            'date': day_strings(dates),
+            'min': values,
+            'max': values,
+            'mean': values,
+            'count': [1] * len(values)
+        }
+
+    # Bucket edges over the covered span, then the first row of each bucket
+    edges = np.linspace(dates[0], dates[-1] + 1, points + 1)
+    starts = np.searchsorted(dates, edges[:-1], side='left')
+    starts = np.unique(starts[starts < len(dates)])
+    counts = np.diff(np.append(starts, len(dates)))
+
+    return {
+        'date': day_strings(dates[starts]),
+        'min': np.round(np.minimum.reduceat(prices, starts), 2).tolist(),
+        'max': np.round(np.maximum.reduceat(prices, starts), 2).tolist(),
+        'mean': np.round(np.add.reduceat(prices, starts) / counts, 2).tolist(),
+        'count': counts.tolist()
+    }
+
+
+class PriceHistoryStore:
+    """All series of one store directory, keyed by (crop, state) lowercased"""
+
+    def __init__(self, series, unit='per quintal', sample=False):
+        self.series = {(s.crop.lower(), s.state.lower()): s for s in series}
+        self.unit = unit
+        self.sample = sample
+
+    def get(self, crop, state):
+        return self.series.get((str(crop).lower(), str(state).lower()))
+
+    def available(self):
+        return [{'crop': s.crop, 'state': s.state, 'points': len(s.dates),
+                 'from': day_strings(s.dates[:1])[0] if len(s.dates) else None,
+                 'to': day_strings(s.dates[-1:])[0] if len(s.dates) else None}
+                for s in self.series.values()]
+
+    # ==================== FILES ====================
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(os.path.join(path, 'series.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        mode = 'r' if mmap else None
+        dates = np.load(os.path.join(path, 'dates.npy'), mmap_mode=mode)
+        prices = np.load(os.path.join(path, 'prices.npy'), mmap_mode=mode)
+        series = [PriceSeries(s['crop'], s['state'], dates[s['start']:s['end']], prices[s['start']:s['end']])
+                  for s in meta['series']]
+        return cls(series, unit=meta.get('unit', 'per quintal'))
+
+    @staticmethod
+    def save(path, rows, unit='per quintal'):
+        """
+        Write (crop, state, day, price) rows as a store directory
+
+        Rows may come in any order; duplicates of a day keep the last price.
+        Existing files are replaced by rename, never rewritten in place:
+        truncating a column another process has memory-mapped would crash
+        that process on its next read.
+        """
+        os.makedirs(path, exist_ok=True)
+        by_series = {}
+        for crop, state, day, price in rows:
+            by_series.setdefault((crop, state), {})[day] = price
+
+        meta, dates, prices, offset = [], [], [], 0
+        for (crop, state), values in sorted(by_series.items()):
+            days = sorted(values)
+            dates.append(np.asarray(days, dtype=np.int32))
+            prices.append(np.asarray([values[d] for d in days], dtype=np.float32))
+            meta.append({'crop': crop, 'state': state, 'start': offset, 'end': offset + len(days)})
+            offset += len(days)
+
+        dates = np.concatenate(dates) if dates else np.empty(0, np.int32)
+        prices = np.concatenate(prices) if prices else np.empty(0, np.float32)
+        _replace(os.path.join(path, 'dates.npy'), lambda f: np.save(f, dates))
+        _replace(os.path.join(path, 'prices.npy'), lambda f: np.save(f, prices))
+        # series.json last: its mtime triggers reloads
+        body = json.dumps({'unit': unit, 'series': meta}, indent=2).encode('utf-8')
+        _replace(os.path.join(path, 'series.json'), lambda f: f.write(body))
+        return offset
+
+
+# ==========================================
+# SAMPLE DATA
+# ==========================================
+
+def sample_rows(reference_rows, days=730, end=None, seed=2026):
+    """
+    Deterministic demo history for each reference price row: a yearly
+    cycle plus a random walk between the row's min and max, ending at
+    its current price
+    """
+    end = to_day(end or date.today())
+    day_numbers = np.arange(end - days + 1, end + 1, dtype=np.int32)
+    phase = 2 * np.pi * day_numbers / 365.25
+
+    for row in reference_rows:
+        rng = np.random.default_rng(seed + int(row.get('id', 0)))
+        low, high = float(row['minPrice']), float(row['maxPrice'])
+        mid, amplitude = float(row['averagePrice']), (high - low) / 3
+        walk = np.cumsum(rng.normal(0, amplitude / 40, days))
+        curve = mid + amplitude * np.sin(phase + rng.uniform(0, 2 * np.pi)) + walk - walk.mean()
+        curve += (float(row['currentPrice']) - curve[-1]) * np.linspace(0, 1, days) ** 4
+        curve = np.clip(curve, low * 0.8, high * 1.2)
+        for day, price in zip(day_numbers.tolist(), np.round(curve).tolist()):
+            yield row['crop'], row['state'], day, price
+
+
+def sample_store(reference_rows, days=730):
+    """In-memory store built from sample_rows (no files)"""
+    by_series = {}
+    for crop, state, day, price in sample_rows(reference_rows, days):
+        by_series.setdefault((crop, state), ([], []))
+        by_series[(crop, state)][0].append(day)
+        by_series[(crop, state)][1].append(price)
+    series = [PriceSeries(crop, state, np.asarray(d, dtype=np.int32), np.asarray(p, dtype=np.float32))
+              for (crop, state), (d, p) in by_series.items()]
+    return PriceHistoryStore(series, sample=True)
+
+
+# ==========================================
+# FILE-BACKED STORE
+# ==========================================
+
+class PriceHistoryManager:
+    """Keeps a PriceHistoryStore in sync with its directory"""
+
+    def __init__(self, path, mmap=True, sample_if_missing=True, check_interval=5.0):
+        self.path = path
+        self.mmap = mmap
+        self.sample_if_missing = sample_if_missing
+        self.check_interval = check_interval
+        self._store = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _build(self, mtime):
+        if mtime is not None:
+            store = PriceHistoryStore.load(self.path, self.mmap)
+            logger.info("Loaded %d price series from %s", len(store.series), self.path)
+            return store
+        if not self.sample_if_missing:
+            return PriceHistoryStore([])
+        logger.info("No price history at %s, using generated sample series", self.path)
+        return sample_store(market_prices.get().rows)
+
+    def get(self):
+        """Current store, reloaded when series.json has changed"""
+        now = time.monotonic()
+        if self._store is not None and now - self._checked_at < self.check_interval:
+            return self._store
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(os.path.join(self.path, 'series.json')).st_mtime
+            except OSError:
+                mtime = None
+            if self._store is None or mtime != self._mtime:
+                self._store = self._build(mtime)
+                self._mtime = mtime
+        return self._store
+
+
+price_history = PriceHistoryManager(
+    os.path.join(BASE_DIR, PRICE_HISTORY_CONFIG['path']),
+    mmap=PRICE_HISTORY_CONFIG['mmap'],
+    sample_if_missing=PRICE_HISTORY_CONFIG['sample_if_missing']
+)
+
+
+# ==========================================
+# COMMAND LINE
+# ==========================================
+
+def _read_csv(path):
+    """Rows of date,crop,state,price (header required)"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for record in csv.DictReader(f):
+            yield record['crop'].strip(), record['state'].strip(), to_day(record['date']), float(record['price'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build a price history store')
+    sub = parser.add_subparsers(dest='command', required=True)
+    importer = sub.add_parser('import', help='import a date,crop,state,price CSV')
+    importer.add_argument('csv')
+    sampler = sub.add_parser('sample', help='generate demo series from market_prices.json')
+    sampler.add_argument('--days', type=int, default=730)
+    for command in (importer, sampler):
+        command.add_argument('--out', default=os.path.join(BASE_DIR, PRICE_HISTORY_CONFIG['path']))
+    args = parser.parse_args(argv)
+
+    if args.command == 'import':
+        count = PriceHistoryStore.save(args.out, _read_csv(args.csv))
+    else:
+        count = PriceHistoryStore.save(args.out, sample_rows(market_prices.get().rows, args.days))
+    print(f"Wrote {count} price points to {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
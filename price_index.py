@@ -0,0 +1,304 @@
+"""
+Market Price Index
+In-memory columnar index over mandi price rows for multi-attribute
+search: sorted NumPy arrays per numeric field plus hash indexes on
+crop, state and month, built from the reference data store
+
+Sorting is a total order: rows with equal keys keep their position
+order in both directions, so pages of one query never overlap or skip.
+
+Educational Purpose Only
+"""
+
+import logging
+import threading
+
+import numpy as np
+
+from reference_data import market_prices
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_FIELDS = ('currentPrice', 'averagePrice', 'minPrice', 'maxPrice', 'trend')
+KEYWORD_FIELDS = ('crop', 'state', 'month')
+SORTABLE_FIELDS = NUMERIC_FIELDS + ('crop', 'state')
+
+
+class PriceIndex:
+    """Immutable columnar index over a list of price rows"""
+
+    def __init__(self, rows):
+        self.rows = tuple(rows)
+        self.size = len(self.rows)
+
+        # Numeric columns and their sort orders for range scans
+        self.columns = {}
+        self.sort_orders = {}
+        self.descending_orders = {}
+        self.sorted_values = {}
+        for field in NUMERIC_FIELDS:
+            column = np.fromiter(
+                (_to_float(row.get(field)) for row in self.rows), dtype=np.float64, count=self.size)
+            order = np.argsort(column, kind='stable')
+            self.columns[field] = column
+            self.sort_orders[field] = order
+            # Ties by position here too (NaN stays last)
+            self.descending_orders[field] = np.lexsort((np.arange(self.size), -column))
+            self.sorted_values[field] = column[order]
+
+        # Hash indexes: lowercased value -> sorted row positions
+        self.keyword_indexes = {}
+        self.keyword_ranks = {}
+        self.keyword_codes = {}
+        for field in KEYWORD_FIELDS:
+            positions = {}
+            for i, row in enumerate(self.rows):
+                positions.setdefault(str(row.get(field, '')).lower(), []).append(i)
+            self.keyword_indexes[field] = {
+                key: np.asarray(value, dtype=np.int64) for key, value in positions.items()
+            }
+            # Rank codes let text fields sort as integers
+            ranks = {key: rank for rank, key in enumerate(sorted(positions))}
+            codes = np.empty(self.size, dtype=np.int64)
+            for key, value in positions.items():
+                codes[value] = ranks[key]
+            self.keyword_ranks[field] = ranks
+            self.keyword_codes[field] = codes
+
+    # ==================== FILTERING ====================
+
+    def _keyword_candidates(self, field, values):
+        index = self.keyword_indexes[field]
+        matches = [index[v.lower()] for v in values if v.lower() in index]
+        if not matches:
+            return np.empty(0, dtype=np.int64)
+        if len(matches) == 1:
+            return matches[0]
+        return np.unique(np.concatenate(matches))
+
+    def _range_positions(self, field, low, high):
+        """Row positions with low <= value <= high, via binary search"""
+        values = self.sorted_values[field]
+        start = 0 if low is None else np.searchsorted(values, low, side='left')
+        end = self.size if high is None else np.searchsorted(values, high, side='right')
+        return np.sort(self.sort_orders[field][start:end])
+
+    def filter(self, keywords=None, ranges=None):
+        """
+        Find row positions matching all filters
+
+        Args:
+            keywords: {field: [values]} for crop/state/month (OR within a field)
+            ranges: {field: (low, high)} for numeric fields, bounds inclusive
+
+        Returns:
+            Sorted NumPy array of matching positions
+        """
+        candidates = None
+
+        # Hash lookups: start from the smallest posting list, then narrow
+        # it with the rank codes of the other keyword fields
+        lookups = sorted(
+            ((field, self._keyword_candidates(field, values), values)
+             for field, values in (keywords or {}).items()),
+            key=lambda lookup: lookup[1].size
+        )
+        for field, positions, values in lookups:
+            if candidates is None:
+                candidates = positions
+            else:
+                ranks = self.keyword_ranks[field]
+                wanted = [ranks[v.lower()] for v in values if v.lower() in ranks]
+                candidates = candidates[np.isin(self.keyword_codes[field][candidates], wanted)]
+            if candidates.size == 0:
+                return candidates
+
+        for field, (low, high) in (ranges or {}).items():
+            if candidates is None:
+                candidates = self._range_positions(field, low, high)
+            else:
+                column = self.columns[field][candidates]
+                mask = np.ones(candidates.size, dtype=bool)
+                if low is not None:
+                    mask &= column >= low
+                if high is not None:
+                    mask &= column <= high
+                candidates = candidates[mask]
+            if candidates.size == 0:
+                return candidates
+
+        if candidates is None:
+            candidates = np.arange(self.size, dtype=np.int64)
+        return candidates
+
+    # ==================== ORDERING ====================
+
+    def _sort_key(self, field):
+        if field in self.columns:
+            return self.columns[field]
+        return self.keyword_codes[field]
+
+    def order(self, positions, sort_by=None, descending=False, limit=None, offset=0):
+        """
+        Sort matching positions and slice one page
+
+        Rows are ordered by key, then by position. When only a small page
+        of a large result is requested, argpartition finds the key of the
+        last wanted row first and only rows up to that key (ties included)
+        are sorted.
+        """
+        if sort_by is None:
+            end = None if limit is None else offset + limit
+            return positions[offset:end]
+
+        keys = self._sort_key(sort_by)[positions]
+        if descending:
+            keys = -keys
+
+        wanted = positions.size if limit is None else min(positions.size, offset + limit)
+        if wanted == 0:
+            return positions[:0]
+        if wanted < positions.size // 2:
+            last = keys[np.argpartition(keys, wanted - 1)[wanted - 1]]
+            # NaN sorts last, so a NaN cut-off means every row is needed
+            candidates = np.arange(keys.size) if np.isnan(last) else np.flatnonzero(keys <= last)
+            top = candidates[np.lexsort((positions[candidates], keys[candidates]))][:wanted]
+        else:
+            top = np.lexsort((positions, keys))[:wanted]
+
+        return positions[top[offset:]]
+
+    def _presorted_page(self, sort_by, descending, limit, offset):
+        """Page straight from a precomputed sort order (no filters)"""
+        order = self.descending_orders[sort_by] if descending else self.sort_orders[sort_by]
+        end = None if limit is None else offset + limit
+        return order[offset:end]
+
+    def search(self, keywords=None, ranges=None, sort_by=None, descending=False, limit=None, offset=0):
+        """Filter, sort and paginate; returns (total_matches, rows)"""
+        if not keywords and not ranges and sort_by in self.sort_orders:
+            page = self._presorted_page(sort_by, descending, limit, offset)
+            return self.size, [self.rows[i] for i in page]
+
+        positions = self.filter(keywords, ranges)
+        page = self.order(positions, sort_by, descending, limit, offset)
+        return int(positions.size), [self.rows[i] for i in page]
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+# ==========================================
+# REQUEST PARSING
+# ==========================================
+
+def parse_search_request(data, default_page_size=20, max_page_size=100):
+    """
+    Translate a search request body into index arguments
+
+    Raises:
+        ValueError: If a filter, sort field or page value is invalid
+    """
+    keywords = {}
+    for field in KEYWORD_FIELDS:
+        value = data.get(field)
+        if value in (None, '', []):
+            continue
+        values = value if isinstance(value, list) else [value]
+        keywords[field] = [str(v) for v in values]
+
+    ranges = {}
+    for field in NUMERIC_FIELDS:
+        value = data.get(field)
+        if value is None:
+            continue
+        if field == 'trend' and isinstance(value, str):
+            direction = value.lower()
+            if direction not in ('rising', 'falling', 'stable'):
+                raise ValueError("trend must be 'rising', 'falling', 'stable' or a {min, max} range")
+            ranges[field] = {
+                'rising': (np.nextafter(0, 1), None),
+                'falling': (None, np.nextafter(0, -1)),
+                'stable': (0.0, 0.0)
+            }[direction]
+            continue
+        if isinstance(value, dict):
+            low, high = value.get('min'), value.get('max')
+        elif isinstance(value, (int, float)):
+            low = high = value
+        else:
+            raise ValueError(f"{field} must be a number or a {{min, max}} range")
+        try:
+            ranges[field] = (None if low is None else float(low), None if high is None else float(high))
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} range bounds must be numbers")
+
+    sort_by = data.get('sortBy')
+    if sort_by is not None and sort_by not in SORTABLE_FIELDS:
+        raise ValueError(f"sortBy must be one of {', '.join(SORTABLE_FIELDS)}")
+    descending = str(data.get('order', 'asc')).lower() == 'desc'
+
+    try:
+        if data.get('limit') is not None:
+            # Top-k query
+            limit = int(data['limit'])
+            offset = int(data.get('offset', 0))
+            page = None
+        else:
+            page = max(1, int(data.get('page', 1)))
+            limit = int(data.get('pageSize', default_page_size))
+            offset = (page - 1) * limit
+    except (TypeError, ValueError):
+        raise ValueError("limit, offset, page and pageSize must be integers")
+
+    if limit < 1 or limit > max_page_size or offset < 0:
+        raise ValueError(f"limit/pageSize must be between 1 and {max_page_size}")
+
+    return {
+        'keywords': keywords,
+        'ranges': ranges,
+        'sort_by': sort_by,
+        'descending': descending,
+        'limit': limit,
+        'offset': offset
+    }, page
+
+
+# ==========================================
+# FILE-BACKED INDEX
+# ==========================================
+
+class PriceIndexManager:
+    """Keeps a PriceIndex in sync with a reference data file"""
+
+    def __init__(self, reference):
+        self.reference = reference
+        self._index = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def rebuild(self, rows=None):
+        """Build a new index (from rows or the reference snapshot) and swap it in"""
+        table = self.reference.get()
+        index = PriceIndex(rows if rows is not None else table.rows)
+        self._index, self._version = index, table.version
+        logger.info("Price index rebuilt with %d rows", index.size)
+        return index
+
+    def get(self):
+        """Current index, rebuilt when the reference snapshot has changed"""
+        table = self.reference.get()
+        if self._index is not None and self._version == table.version:
+            return self._index
+
+        with self._lock:
+            if self._index is None or self._version != table.version:
+                self.rebuild()
+        return self._index
+
+
+price_index = PriceIndexManager(market_prices)
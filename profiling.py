@@ -0,0 +1,188 @@
+"""
+Request Profiling
+Opt-in cProfile + tracemalloc capture for individual requests,
+triggered by an admin header or a sampling rate, with reports stored
+on disk for download
+
+Educational Purpose Only
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import abort, g, jsonify, request, send_file
+
+from config import PROFILING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+
+
+class RequestProfiler:
+    """Captures and stores per-request profiles"""
+
+    def __init__(self, settings=PROFILING_CONFIG):
+        self.settings = settings
+        self.report_dir = settings['report_dir']
+        self.reports = OrderedDict()
+        self._reports_lock = threading.Lock()
+        # cProfile and tracemalloc are process-wide, so one capture at a time
+        self._capture_lock = threading.Lock()
+
+    def is_admin(self):
+        token = self.settings['admin_token']
+        return bool(token) and request.headers.get(PROFILE_HEADER) == token
+
+    def should_profile(self):
+        if not self.settings['enabled'] or request.endpoint in ('list_profiles', 'download_profile'):
+            return False
+        if self.is_admin():
+            return True
+        rate = self.settings['sample_rate']
+        return rate > 0 and random.random() < rate
+
+    def start(self):
+        """Begin profiling the current request if requested and idle"""
+        if not self.should_profile() or not self._capture_lock.acquire(blocking=False):
+            return
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(self.settings['tracemalloc_frames'])
+
+        profile = cProfile.Profile()
+        g.profile = {
+            'profiler': profile,
+            'snapshot': tracemalloc.take_snapshot(),
+            'started_tracing': started_tracing,
+            'start': time.perf_counter()
+        }
+        profile.enable()
+
+    def finish(self, status):
+        """Stop profiling and store the report; returns the report id"""
+        capture = g.pop('profile', None)
+        if capture is None:
+            return None
+
+        try:
+            capture['profiler'].disable()
+            duration = time.perf_counter() - capture['start']
+            snapshot = tracemalloc.take_snapshot()
+            if capture['started_tracing']:
+                tracemalloc.stop()
+
+            report_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+            report = self._render(capture['profiler'], capture['snapshot'], snapshot, duration, status)
+            self._store(report_id, report, duration)
+            return report_id
+        finally:
+            self._capture_lock.release()
+
+    def _render(self, profiler, before, after, duration, status):
+        out = io.StringIO()
+        out.write(f"Request:   {request.method} {request.full_path}\n")
+        out.write(f"Endpoint:  {request.endpoint}\n")
+        out.write(f"Status:    {status}\n")
+        out.write(f"Duration:  {duration * 1000:.2f} ms\n")
+        out.write(f"Captured:  {datetime.now().isoformat()}\n\n")
+
+        out.write("=== CPU profile (cumulative) ===\n")
+        stats = pstats.Stats(profiler, stream=out)
+        stats.sort_stats('cumulative').print_stats(self.settings['top_functions'])
+
+        out.write("\n=== Allocation deltas (tracemalloc) ===\n")
+        diffs = after.compare_to(before, 'lineno')
+        total = sum(diff.size_diff for diff in diffs)
+        out.write(f"Net allocated: {total / 1024:.1f} KiB\n")
+        for diff in diffs[:self.settings['top_allocations']]:
+            out.write(f"{diff}\n")
+
+        return out.getvalue()
+
+    def _store(self, report_id, report, duration):
+        os.makedirs(self.report_dir, exist_ok=True)
+        path = os.path.join(self.report_dir, f"{report_id}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(report)
+
+        with self._reports_lock:
+            self.reports[report_id] = {
+                'id': report_id,
+                'endpoint': request.endpoint,
+                'path': request.path,
+                'durationMs': round(duration * 1000, 2),
+                'createdAt': datetime.now().isoformat(),
+                'file': path
+            }
+            while len(self.reports) > self.settings['max_reports']:
+                _, old = self.reports.popitem(last=False)
+                try:
+                    os.remove(old['file'])
+                except OSError:
+                    pass
+
+        logger.info("Stored profile %s for %s (%.1f ms)", report_id, request.path, duration * 1000)
+
+
+def init_profiling(app, settings=PROFILING_CONFIG):
+    """Register profiling hooks and report endpoints on a Flask app"""
+    profiler = RequestProfiler(settings)
+    app.extensions['profiler'] = profiler
+
+    @app.before_request
+    def start_profile():
+        profiler.start()
+
+    @app.after_request
+    def finish_profile(response):
+        report_id = profiler.finish(response.status_code)
+        if report_id:
+            response.headers['X-Profile-Id'] = report_id
+        return response
+
+    @app.teardown_request
+    def release_profile(exc):
+        # Requests that raised never reach after_request
+        if 'profile' in g:
+            profiler.finish(500)
+
+    @app.route('/api/profiles', methods=['GET'])
+    def list_profiles():
+        """List stored request profiles (admin only)"""
+        if not profiler.is_admin():
+            abort(404)
+        with profiler._reports_lock:
+            reports = [
+                {key: value for key, value in report.items() if key != 'file'}
+                for report in reversed(profiler.reports.values())
+            ]
+        return jsonify({
+            "success": True,
+            "profiles": reports,
+            "total": len(reports)
+        }), 200
+
+    @app.route('/api/profiles/<report_id>', methods=['GET'])
+    def download_profile(report_id):
+        """Download a stored request profile (admin only)"""
+        if not profiler.is_admin():
+            abort(404)
+        report = profiler.reports.get(report_id)
+        if report is None or not os.path.exists(report['file']):
+            abort(404)
+        return send_file(os.path.abspath(report['file']), mimetype='text/plain',
+                         as_attachment=True, download_name=f"profile-{report_id}.txt")
+
+    return profiler
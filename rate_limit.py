@@ -0,0 +1,289 @@
+"""
+Rate Limiting
+Enforces RATELIMIT_DEFAULT and per-route overrides with a token bucket
+(GCRA) keyed by client, stored in memory or in a local SQLite file that
+is shared between worker processes
+
+Educational Purpose Only
+"""
+
+import math
+import re
+import sqlite3
+import threading
+import time
+
+from flask import jsonify, request
+
+from config import CURRENT_CONFIG
+
+_PERIODS = {
+    'second': 1,
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400,
+    'month': 30 * 86400,
+    'year': 365 * 86400
+}
+
+_LIMIT_PATTERN = re.compile(
+    r'^\s*(\d+)\s*(?:per|/)\s*(\d+)?\s*(second|minute|hour|day|month|year)s?\s*$',
+    re.IGNORECASE
+)
+
+
+# ==========================================
+# LIMIT PARSING
+# ==========================================
+
+class RateLimitItem:
+    """One 'N per period' limit expressed as a token bucket"""
+
+    __slots__ = ('amount', 'period', 'text', 'emission_interval')
+
+    def __init__(self, amount, period, text=''):
+        self.amount = amount
+        self.period = period
+        self.text = text or f"{amount} per {period} seconds"
+        # Time it takes to refill one token
+        self.emission_interval = period / amount
+
+    def __repr__(self):
+        return f"RateLimitItem({self.text!r})"
+
+
+def parse_limits(spec):
+    """
+    Parse a limit string such as "200 per day, 50 per hour"
+
+    Limits are separated by ',' or ';' and accept the forms
+    "N per unit", "N/unit" and "N per M units".
+
+    Raises:
+        ValueError: If any part of the string is not a valid limit
+    """
+    items = []
+    for part in re.split(r'[,;]', spec or ''):
+        if not part.strip():
+            continue
+        match = _LIMIT_PATTERN.match(part)
+        if not match:
+            raise ValueError(f"Invalid rate limit: {part.strip()!r}")
+        amount, multiple, unit = match.groups()
+        period = int(multiple or 1) * _PERIODS[unit.lower()]
+        items.append(RateLimitItem(int(amount), period, part.strip()))
+    return items
+
+
+# ==========================================
+# TOKEN BUCKET (GCRA)
+# ==========================================
+
+def _gcra(tats, items, now):
+    """
+    Apply the generic cell rate algorithm to all limits of one key
+
+    Args:
+        tats: Theoretical arrival times per limit (None for unseen)
+        items: RateLimitItem list, aligned with tats
+        now: Current time in seconds
+
+    Returns:
+        (allowed, new_tats, state) where state lists
+        (limit, remaining, reset_after, retry_after) per limit.
+        A request is only counted when every limit allows it.
+    """
+    tats = [max(tat or now, now) for tat in tats]
+    new_tats = [tat + item.emission_interval for tat, item in zip(tats, items)]
+    allowed = all(new_tat - item.period <= now for new_tat, item in zip(new_tats, items))
+
+    state = []
+    for tat, new_tat, item in zip(tats, new_tats, items):
+        if allowed:
+            remaining = int((now + item.period - new_tat) / item.emission_interval)
+            state.append((item, remaining, new_tat - now, 0.0))
+        else:
+            remaining = int((now + item.period - tat) / item.emission_interval)
+            retry_after = max(0.0, new_tat - item.period - now)
+            state.append((item, remaining, tat - now, retry_after))
+
+    return allowed, (new_tats if allowed else tats), state
+
+
+class MemoryStorage:
+    """
+    Per-process bucket store
+
+    Keys are spread across lock stripes so concurrent requests from
+    different clients never contend on one global lock.
+    """
+
+    def __init__(self, stripes=64, max_keys=100000):
+        self._tats = {}
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self.max_keys = max_keys
+
+    def hit(self, key, items, now):
+        with self._locks[hash(key) % len(self._locks)]:
+            tats = self._tats.get(key) or [None] * len(items)
+            allowed, new_tats, state = _gcra(tats, items, now)
+            if allowed:
+                self._tats[key] = new_tats
+
+        if len(self._tats) > self.max_keys:
+            self._sweep(now)
+        return allowed, state
+
+    def _sweep(self, now):
+        """Drop buckets that have refilled completely"""
+        for key, tats in list(self._tats.items()):
+            if all(tat <= now for tat in tats):
+                self._tats.pop(key, None)
+
+    def reset(self):
+        self._tats.clear()
+
+
+class FileStorage:
+    """
+    Bucket store in a local SQLite file
+
+    Every worker process opens the same file; BEGIN IMMEDIATE serializes
+    the read-modify-write of a bucket across processes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tats TEXT NOT NULL)")
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key, items, now):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tats FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            tats = [float(t) for t in row[0].split(',')] if row else [None] * len(items)
+            if len(tats) != len(items):
+                tats = [None] * len(items)
+
+            allowed, new_tats, state = _gcra(tats, items, now)
+            if allowed:
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits (key, tats) VALUES (?, ?)",
+                    (key, ','.join(repr(t) for t in new_tats))
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, state
+
+    def reset(self):
+        self._connection().execute("DELETE FROM rate_limits")
+
+
+# ==========================================
+# FLASK INTEGRATION
+# ==========================================
+
+class RateLimiter:
+    """Applies the default and per-route limits to incoming requests"""
+
+    def __init__(self, settings=CURRENT_CONFIG):
+        self.enabled = bool(settings.RATELIMIT_ENABLED)
+        self.default_limits = parse_limits(settings.RATELIMIT_DEFAULT)
+        self.route_limits = {
+            endpoint: parse_limits(spec)
+            for endpoint, spec in settings.RATELIMIT_ROUTE_LIMITS.items()
+        }
+        self.exempt = set(settings.RATELIMIT_EXEMPT)
+        self.trust_proxy = settings.RATELIMIT_TRUST_PROXY
+
+        if settings.RATELIMIT_STORAGE == 'file':
+            self.storage = FileStorage(settings.RATELIMIT_STORAGE_PATH)
+        else:
+            self.storage = MemoryStorage()
+
+    def client_key(self):
+        """Identify the client making the current request"""
+        if self.trust_proxy:
+            forwarded = request.headers.get('X-Forwarded-For', '')
+            if forwarded:
+                return forwarded.split(',')[0].strip()
+        return request.remote_addr or 'unknown'
+
+    def limits_for(self, endpoint):
+        """Return (scope, limits) for an endpoint"""
+        if endpoint in self.route_limits:
+            return endpoint, self.route_limits[endpoint]
+        return 'default', self.default_limits
+
+    def check(self):
+        """Count the current request; returns (allowed, state) or None if not limited"""
+        endpoint = request.endpoint
+        if not self.enabled or endpoint is None or endpoint in self.exempt:
+            return None
+        if request.method == 'OPTIONS':
+            return None
+
+        scope, items = self.limits_for(endpoint)
+        if not items:
+            return None
+
+        key = f"{self.client_key()}|{scope}"
+        return self.storage.hit(key, items, time.time())
+
+
+def _tightest(state):
+    """Limit state with the fewest remaining requests"""
+    return min(state, key=lambda entry: (entry[1], -entry[3]))
+
+
+def init_rate_limiting(app, settings=CURRENT_CONFIG):
+    """Register the rate limiter on a Flask app"""
+    limiter = RateLimiter(settings)
+    app.extensions['rate_limiter'] = limiter
+
+    @app.before_request
+    def enforce_rate_limit():
+        result = limiter.check()
+        if result is None:
+            return None
+
+        allowed, state = result
+        request.environ['ratelimit.state'] = state
+        if allowed:
+            return None
+
+        item, _, _, retry_after = max(state, key=lambda entry: entry[3])
+        response = jsonify({
+            "error": "Rate limit exceeded",
+            "limit": item.text,
+            "retryAfter": math.ceil(retry_after),
+            "status": 429
+        })
+        response.status_code = 429
+        response.headers['Retry-After'] = str(math.ceil(retry_after))
+        return response
+
+    @app.after_request
+    def add_rate_limit_headers(response):
+        state = request.environ.get('ratelimit.state')
+        if state:
+            item, remaining, reset_after, _ = _tightest(state)
+            response.headers['X-RateLimit-Limit'] = str(item.amount)
+            response.headers['X-RateLimit-Remaining'] = str(remaining)
+            response.headers['X-RateLimit-Reset'] = str(math.ceil(reset_after))
+        return response
+
+    return limiter
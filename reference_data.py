@@ -0,0 +1,230 @@
+"""
+Reference Data Store
+Market prices, market locations and government schemes loaded from the
+bundled JSON files into immutable, indexed snapshots, reloaded when a
+file changes
+
+Serves /api/prices and /api/schemes when the database is down or slow,
+or as the primary read path (REFERENCE_DATA_CONFIG['primary']). Rows
+read from the database are reshaped to the file rows' fields, so
+clients see one schema whichever source answered.
+
+Educational Purpose Only
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+
+from config import REFERENCE_DATA_CONFIG
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class ReferenceTable:
+    """
+    Immutable snapshot of one reference file
+
+    Rows are shared between requests and must be treated as read-only.
+    Hash indexes map the lowercased value of each indexed field to a
+    tuple of rows in file order.
+    """
+
+    def __init__(self, rows, index_fields=(), version=0):
+        self.rows = tuple(rows)
+        self.version = version
+        # Every field used by any row, in first-seen order
+        self.fields = tuple(dict.fromkeys(field for row in self.rows for field in row))
+        self.by_id = {row['id']: row for row in self.rows if 'id' in row}
+
+        self.indexes = {}
+        for field in index_fields:
+            index = {}
+            for row in self.rows:
+                index.setdefault(str(row.get(field, '')).lower(), []).append(row)
+            self.indexes[field] = {key: tuple(value) for key, value in index.items()}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, row_id):
+        return self.by_id.get(row_id)
+
+    def find(self, **filters):
+        """
+        Rows whose indexed fields equal the given values (case-insensitive)
+
+        None values are ignored; with no filters all rows are returned.
+        """
+        matches = None
+        for field, value in filters.items():
+            if value is None:
+                continue
+            rows = self.indexes[field].get(str(value).lower(), ())
+            if matches is None:
+                matches = rows
+            else:
+                # Filter the smaller result by membership in the larger
+                if len(rows) < len(matches):
+                    matches, rows = rows, matches
+                ids = {id(row) for row in rows}
+                matches = tuple(row for row in matches if id(row) in ids)
+            if not matches:
+                return []
+        return list(self.rows if matches is None else matches)
+
+
+class ReferenceFile:
+    """Keeps a ReferenceTable in sync with a JSON file"""
+
+    def __init__(self, path, key, index_fields=(), check_interval=5.0):
+        self.path = path
+        self.key = key
+        self.index_fields = tuple(index_fields)
+        self.check_interval = check_interval
+        self._table = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with open(self.path, encoding='utf-8') as f:
+            return json.load(f).get(self.key, [])
+
+    def reload(self):
+        """Read the file and swap in a new snapshot"""
+        self._version += 1
+        table = ReferenceTable(self._load(), self.index_fields, self._version)
+        self._table = table
+        logger.info("Loaded %d %s from %s", len(table), self.key, os.path.basename(self.path))
+        return table
+
+    def get(self):
+        """Current snapshot, reloaded when the file's mtime has changed"""
+        now = time.monotonic()
+        if self._table is not None and now - self._checked_at < self.check_interval:
+            return self._table
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                mtime = None
+            if self._table is None or (mtime is not None and mtime != self._mtime):
+                self._mtime = mtime
+                try:
+                    self.reload()
+                except (OSError, ValueError) as e:
+                    if self._table is None:
+                        raise
+                    # Keep serving the last good snapshot
+                    logger.error("Could not reload %s: %s", self.path, e)
+        return self._table
+
+
+class SlowDatabaseGuard:
+    """
+    Routes reads away from the database for a cooldown period after a
+    failure or a call slower than threshold_ms
+    """
+
+    def __init__(self, threshold_ms, cooldown):
+        self.threshold = threshold_ms / 1000
+        self.cooldown = cooldown
+        self._bypass_until = 0.0
+
+    @property
+    def bypassed(self):
+        return time.monotonic() < self._bypass_until
+
+    def call(self, func, *args, **kwargs):
+        """Run func, tripping the guard if it raises or is slow"""
+        start = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.trip()
+            raise
+        if time.monotonic() - start > self.threshold:
+            logger.warning("Database read took %.0f ms, serving reference data for %ss",
+                           (time.monotonic() - start) * 1000, self.cooldown)
+            self.trip()
+        return result
+
+    def trip(self):
+        self._bypass_until = time.monotonic() + self.cooldown
+
+
+market_prices = ReferenceFile(
+    os.path.join(BASE_DIR, 'market_prices.json'), 'prices', ('crop', 'state', 'month'),
+    check_interval=REFERENCE_DATA_CONFIG['check_interval'])
+market_locations = ReferenceFile(
+    os.path.join(BASE_DIR, 'markets.json'), 'markets', ('state',),
+    check_interval=REFERENCE_DATA_CONFIG['check_interval'])
+gov_schemes = ReferenceFile(
+    os.path.join(BASE_DIR, 'gov_schemes.json'), 'schemes', ('type', 'level'),
+    check_interval=REFERENCE_DATA_CONFIG['check_interval'])
+
+db_guard = SlowDatabaseGuard(REFERENCE_DATA_CONFIG['db_slow_ms'], REFERENCE_DATA_CONFIG['db_cooldown'])
+
+
+# ==========================================
+# DATABASE ROWS
+# ==========================================
+
+# Database column -> reference field
+PRICE_COLUMNS = {'crop': 'crop', 'state': 'state', 'price': 'currentPrice'}
+SCHEME_COLUMNS = {
+    'id': 'id', 'name': 'name', 'scheme_type': 'type', 'level': 'level', 'description': 'description',
+    'eligibility': 'eligibility', 'benefit': 'benefit', 'deadline': 'deadline', 'website': 'website'
+}
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _reshape(table, base, row, columns):
+    """
+    A database row with the reference table's fields: the matching
+    reference row (or all None) overlaid with the database's values
+    """
+    shaped = dict(base) if base is not None else dict.fromkeys(table.fields)
+    for column, field in columns.items():
+        if column in row:
+            shaped[field] = _plain(row[column])
+    return shaped
+
+
+def prices_from_database(rows):
+    """market_prices table rows in the market_prices.json shape"""
+    table = market_prices.get()
+    return [_reshape(table, (table.find(crop=row['crop'], state=row['state']) or [None])[0], row, PRICE_COLUMNS)
+            for row in rows]
+
+
+def schemes_from_database(rows):
+    """government_schemes table rows in the gov_schemes.json shape"""
+    table = gov_schemes.get()
+    return [_reshape(table, table.get(row['id']), row, SCHEME_COLUMNS) for row in rows]
+
+
+def preload():
+    """Load all reference files (call at startup)"""
+    for reference in (market_prices, market_locations, gov_schemes):
+        try:
+            reference.get()
+        except (OSError, ValueError) as e:
+            logger.error("Could not load %s: %s", reference.path, e)
@@ -0,0 +1,244 @@
+"""
+Detection Re-scoring
+Re-runs disease detection over archived upload images and overwrites the
+stored predictions in disease_detections, e.g. after a model update
+
+Rows with an image_sha256 are streamed from the database in id order.
+Each window of batch_size rows is decoded by a process pool (every
+distinct image once) while the previous window is scored as one batch
+and written back in one transaction, so decoding, inference and writes
+overlap. The last written id is checkpointed after every window: an
+interrupted run continues where it stopped, and a run with a different
+model version starts over.
+
+Usage:
+    python rescore_detections.py migrate    # add the archive columns
+    python rescore_detections.py run [--workers 4] [--batch-size 64] [--restart] [--limit N]
+
+Educational Purpose Only
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from itertools import islice
+
+import numpy as np
+from dotenv import load_dotenv
+
+from config import MODEL_PATHS, MODEL_SETTINGS, RESCORE_CONFIG
+from database import get_db, init_database
+from image_archive import image_archive
+from ml_disease_detection import TENSORFLOW_AVAILABLE, decode_image, detect_disease_batch
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_SIZE = MODEL_SETTINGS['disease_detection']['input_size']
+
+
+def model_version():
+    """Short hash of the disease model file, or the name of the built-in method"""
+    path = os.path.join(BASE_DIR, MODEL_PATHS['disease_detection'])
+    try:
+        with open(path, 'rb') as f:
+            return 'model-' + hashlib.sha256(f.read()).hexdigest()[:12]
+    except OSError:
+        return 'features-tf' if TENSORFLOW_AVAILABLE else 'features'
+
+
+# ==========================================
+# CHECKPOINT
+# ==========================================
+
+class Checkpoint:
+    """Last rescored detection id per model version, saved as JSON"""
+
+    def __init__(self, path, version):
+        self.path = path
+        self.version = version
+        self.last_id = 0
+        self.rescored = 0
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return self
+        if state.get('model_version') == self.version:
+            self.last_id = state.get('last_id', 0)
+            self.rescored = state.get('rescored', 0)
+        return self
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'model_version': self.version, 'last_id': self.last_id, 'rescored': self.rescored}, f)
+        os.replace(tmp, self.path)
+
+
+# ==========================================
+# PIPELINE
+# ==========================================
+
+def _decode(digest):
+    """Worker: archived image -> (digest, uint8 array or None)"""
+    try:
+        return digest, decode_image(image_archive.get(digest), (INPUT_SIZE, INPUT_SIZE))
+    except Exception as e:
+        logger.warning("Could not decode archived image %s: %s", digest, e)
+        return digest, None
+
+
+def _windows(rows, size):
+    while True:
+        window = list(islice(rows, size))
+        if not window:
+            return
+        yield window
+
+
+def rescore(db, checkpoint, workers=RESCORE_CONFIG['workers'], batch_size=RESCORE_CONFIG['batch_size'],
+            fetch_size=RESCORE_CONFIG['fetch_size'], limit=None):
+    """
+    Re-score archived detections after checkpoint.last_id
+
+    Args:
+        workers: decode processes (0 decodes in this process)
+        limit: stop after this many rows
+
+    Returns:
+        Throughput report dict
+    """
+    stats = {'rows': 0, 'updated': 0, 'missing': 0, 'images_decoded': 0,
+             'decode_wait_s': 0.0, 'inference_s': 0.0, 'write_s': 0.0}
+    source = db.stream_archived_detections(checkpoint.last_id, fetch_size)
+    rows = source if limit is None else islice(source, limit)
+
+    pool = multiprocessing.Pool(workers) if workers > 0 else None
+
+    def submit(window):
+        digests = list(dict.fromkeys(row['image_sha256'] for row in window))
+        if pool is None:
+            return window, [_decode(digest) for digest in digests]
+        chunk = max(1, len(digests) // (workers * 4))
+        return window, pool.map_async(_decode, digests, chunksize=chunk)
+
+    start = last_report = time.perf_counter()
+    try:
+        # Keep one window decoding ahead of the one being scored
+        pending = None
+        for window in _windows(rows, batch_size):
+            ahead = submit(window)
+            if pending is not None:
+                _score(db, checkpoint, pending, stats)
+            pending = ahead
+            if time.perf_counter() - last_report >= 10:
+                last_report = time.perf_counter()
+                logger.info("Rescored %d rows (%.0f rows/s)", stats['rows'], stats['rows'] / (last_report - start))
+        if pending is not None:
+            _score(db, checkpoint, pending, stats)
+    finally:
+        source.close()
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'model_version': checkpoint.version,
+        'last_id': checkpoint.last_id,
+        'elapsed_s': round(elapsed, 2),
+        'rows_per_s': round(stats['rows'] / elapsed, 1) if elapsed else 0.0,
+        'images_per_s': round(stats['images_decoded'] / elapsed, 1) if elapsed else 0.0,
+        **{key: round(value, 2) if isinstance(value, float) else value for key, value in stats.items()}
+    }
+
+
+def _score(db, checkpoint, pending, stats):
+    """Wait for a window's decodes, score it as one batch and write it back"""
+    window, decoded = pending
+    wait_start = time.perf_counter()
+    if not isinstance(decoded, list):
+        decoded = decoded.get()
+    stats['decode_wait_s'] += time.perf_counter() - wait_start
+
+    images = {digest: array for digest, array in decoded if array is not None}
+    stats['images_decoded'] += len(images)
+    scored = [row for row in window if row['image_sha256'] in images]
+    stats['missing'] += len(window) - len(scored)
+
+    updates = []
+    if scored:
+        inference_start = time.perf_counter()
+        results = detect_disease_batch(
+            np.stack([images[row['image_sha256']] for row in scored]),
+            [row['crop_type'] for row in scored])
+        stats['inference_s'] += time.perf_counter() - inference_start
+        updates = [(result['name'], result['confidence'], result['severity'], result['pesticide'],
+                    checkpoint.version, row['id']) for row, result in zip(scored, results)]
+
+    write_start = time.perf_counter()
+    if not db.update_disease_detections_bulk(updates):
+        raise RuntimeError(f"Writing rescored detections after id {checkpoint.last_id} failed")
+    stats['write_s'] += time.perf_counter() - write_start
+
+    stats['rows'] += len(window)
+    stats['updated'] += len(updates)
+    checkpoint.last_id = window[-1]['id']
+    checkpoint.rescored += len(updates)
+    checkpoint.save()
+
+
+# ==========================================
+# COMMAND LINE
+# ==========================================
+
+def _connect():
+    load_dotenv()
+    if not init_database(host=os.getenv('DB_HOST', 'localhost'), user=os.getenv('DB_USER', 'root'),
+                         password=os.getenv('DB_PASSWORD', ''),
+                         database=os.getenv('DB_NAME', 'ai_agriculture_assistant')):
+        raise SystemExit("Could not connect to the database")
+    return get_db()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Re-score archived disease detections')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('migrate', help='add the image archive columns to disease_detections')
+    runner = sub.add_parser('run', help='re-score detections with the current model')
+    runner.add_argument('--workers', type=int, default=RESCORE_CONFIG['workers'], help='decode processes')
+    runner.add_argument('--batch-size', type=int, default=RESCORE_CONFIG['batch_size'])
+    runner.add_argument('--limit', type=int, help='stop after this many rows')
+    runner.add_argument('--restart', action='store_true', help='ignore the checkpoint')
+    runner.add_argument('--model-version', help='version recorded on rescored rows')
+    runner.add_argument('--checkpoint', default=os.path.join(BASE_DIR, RESCORE_CONFIG['checkpoint_path']))
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+    db = _connect()
+
+    if args.command == 'migrate':
+        print(f"Added {db.ensure_image_archive_columns()} columns")
+        return 0
+
+    checkpoint = Checkpoint(args.checkpoint, args.model_version or model_version())
+    if not args.restart:
+        checkpoint.load()
+    logger.info("Re-scoring with %s from id %d", checkpoint.version, checkpoint.last_id)
+
+    report = rescore(db, checkpoint, workers=args.workers, batch_size=args.batch_size, limit=args.limit)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
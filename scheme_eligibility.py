@@ -0,0 +1,221 @@
+"""
+Scheme Eligibility
+Matches a farmer profile against the structured eligibilityCriteria of
+every scheme in gov_schemes.json
+
+Criteria are compiled once per reference snapshot into bitsets with one
+bit per scheme, packed into uint64 words:
+- per list criterion (states, crops, irrigation, categories,
+  landOwnership, farmerTypes), the schemes that do not restrict it and,
+  for every value listed anywhere, the schemes that allow it
+- per elementary interval between the distinct landHectares bounds, the
+  schemes whose land range covers it
+A profile is answered with dictionary lookups and one AND over
+(criteria x words), with no per-scheme Python.
+
+A scheme without eligibilityCriteria, or without one of its keys, has no
+restriction there. A profile field that is left out excludes nothing;
+schemes restricting it come back with the field listed in `unverified`.
+
+Educational Purpose Only
+"""
+
+import logging
+import math
+import threading
+
+import numpy as np
+
+from reference_data import gov_schemes
+
+logger = logging.getLogger(__name__)
+
+# Profile field -> criteria key, for the list criteria
+LIST_CRITERIA = {
+    'state': 'states',
+    'crops': 'crops',
+    'irrigation': 'irrigation',
+    'category': 'categories',
+    'landOwnership': 'landOwnership',
+    'farmerType': 'farmerTypes'
+}
+
+# Profile fields with a closed set of values
+CHOICES = {
+    'irrigation': ('irrigated', 'rainfed'),
+    'category': ('general', 'obc', 'sc', 'st'),
+    'landOwnership': ('owner', 'tenant', 'landless'),
+    'farmerType': ('individual', 'group')
+}
+
+
+def parse_profile(data):
+    """
+    Validate a farmer profile from a request body
+
+    Returns:
+        dict of the given fields: list fields lowercased (crops as a
+        list), landHectares as float
+
+    Raises:
+        ValueError: with a message for the client
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Profile must be a JSON object")
+    unknown = sorted(set(data) - set(LIST_CRITERIA) - {'landHectares'})
+    if unknown:
+        raise ValueError(f"Unknown profile fields: {', '.join(unknown)}")
+
+    profile = {}
+    for field in LIST_CRITERIA:
+        value = data.get(field)
+        if value is None or value == '' or value == []:
+            continue
+        values = value if isinstance(value, list) and field == 'crops' else [value]
+        if not all(isinstance(v, str) and v.strip() for v in values):
+            raise ValueError(f"{field} must be {'a string or a list of strings' if field == 'crops' else 'a string'}")
+        values = [v.strip().lower() for v in values]
+        if field in CHOICES and values[0] not in CHOICES[field]:
+            raise ValueError(f"{field} must be one of: {', '.join(CHOICES[field])}")
+        profile[field] = values if field == 'crops' else values[0]
+
+    land = data.get('landHectares')
+    if land is not None and land != '':
+        try:
+            land = float(land)
+        except (TypeError, ValueError):
+            raise ValueError("landHectares must be a number")
+        if not (math.isfinite(land) and land >= 0):
+            raise ValueError("landHectares must be zero or more")
+        profile['landHectares'] = land
+    return profile
+
+
+def pack(flags):
+    """Boolean array -> bitset of uint64 words, bit i for flags[i]"""
+    padded = np.zeros(-(-len(flags) // 64) * 64, dtype=bool)
+    padded[:len(flags)] = flags
+    return np.packbits(padded, bitorder='little').view(np.uint64)
+
+
+def unpack(bits, count):
+    """Bitset -> boolean array of its first count bits"""
+    return np.unpackbits(bits.view(np.uint8), bitorder='little', count=count).view(bool)
+
+
+class EligibilityIndex:
+    """Immutable bitset index over the eligibility criteria of a scheme list"""
+
+    def __init__(self, schemes):
+        self.schemes = tuple(schemes)
+        count = len(self.schemes)
+        criteria = [row.get('eligibilityCriteria') or {} for row in self.schemes]
+        self.all = pack(np.ones(count, dtype=bool))
+
+        self.unrestricted = {}  # field -> schemes without the criterion
+        self.allowed = {}  # field -> {value: schemes listing it}
+        for field, key in LIST_CRITERIA.items():
+            by_value = {}
+            for i, c in enumerate(criteria):
+                for value in c.get(key) or ():
+                    by_value.setdefault(str(value).strip().lower(), np.zeros(count, dtype=bool))[i] = True
+            self.unrestricted[field] = pack(np.array([not c.get(key) for c in criteria], dtype=bool))
+            self.allowed[field] = {value: pack(flags) for value, flags in by_value.items()}
+
+        # Land: bounds split the line into points and open intervals
+        # (-inf, b0), b0, (b0, b1), b1, ..., (bk, inf); every scheme either
+        # covers a whole segment or none of it
+        lows = np.array([float((c.get('landHectares') or {}).get('min', -math.inf)) for c in criteria])
+        highs = np.array([float((c.get('landHectares') or {}).get('max', math.inf)) for c in criteria])
+        self.land_bounds = np.unique(np.concatenate([lows[np.isfinite(lows)], highs[np.isfinite(highs)]]))
+        bounds = self.land_bounds
+        if len(bounds):
+            gaps = np.concatenate([[bounds[0] - 1], (bounds[:-1] + bounds[1:]) / 2, [bounds[-1] + 1]])
+            samples = np.empty(2 * len(bounds) + 1)
+            samples[0::2], samples[1::2] = gaps, bounds
+        else:
+            samples = np.zeros(1)
+        self.land_segments = np.stack([pack((lows <= x) & (x <= highs)) for x in samples])
+        self.land_restricted = pack(np.isfinite(lows) | np.isfinite(highs))
+
+    def __len__(self):
+        return len(self.schemes)
+
+    def _land_segment(self, hectares):
+        i = int(np.searchsorted(self.land_bounds, hectares))
+        on_bound = i < len(self.land_bounds) and self.land_bounds[i] == hectares
+        return 2 * i + 1 if on_bound else 2 * i
+
+    def match_bits(self, profile):
+        """
+        Returns:
+            (bitset of matching schemes, {field: bitset of schemes restricting
+            a field the profile leaves out})
+        """
+        masks = [self.all]
+        unverified = {}
+        for field in LIST_CRITERIA:
+            if field not in profile:
+                unverified[field] = ~self.unrestricted[field]
+                continue
+            mask = self.unrestricted[field]
+            values = profile[field] if field == 'crops' else (profile[field],)
+            for value in values:
+                allowed = self.allowed[field].get(value)
+                if allowed is not None:
+                    mask = mask | allowed
+            masks.append(mask)
+        if 'landHectares' in profile:
+            masks.append(self.land_segments[self._land_segment(profile['landHectares'])])
+        else:
+            unverified['landHectares'] = self.land_restricted
+        return np.bitwise_and.reduce(np.stack(masks)), unverified
+
+    def match(self, profile):
+        """
+        Schemes a parsed profile is eligible for, fully verified ones first
+
+        Returns:
+            List of (scheme row, fields it restricts that the profile left out)
+        """
+        matched, unverified = self.match_bits(profile)
+        indexes = np.flatnonzero(unpack(matched, len(self)))
+        fields = [field for field, bits in unverified.items() if (matched & bits).any()]
+        if not fields:
+            return [(self.schemes[i], []) for i in indexes.tolist()]
+
+        # (fields x matches) flags, then verified matches first in file order
+        flags = np.stack([unpack(unverified[field], len(self))[indexes] for field in fields])
+        order = np.argsort(flags.any(axis=0), kind='stable')
+        return [(self.schemes[i], [fields[f] for f in np.flatnonzero(flags[:, j])])
+                for i, j in zip(indexes[order].tolist(), order.tolist())]
+
+
+# ==========================================
+# FILE-BACKED INDEX
+# ==========================================
+
+class SchemeEligibility:
+    """Keeps an EligibilityIndex in sync with the gov_schemes reference snapshot"""
+
+    def __init__(self, reference):
+        self.reference = reference
+        self._index = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Current index, recompiled when the snapshot has changed"""
+        table = self.reference.get()
+        if self._index is not None and self._version == table.version:
+            return self._index
+
+        with self._lock:
+            if self._index is None or self._version != table.version:
+                self._index = EligibilityIndex(table.rows)
+                self._version = table.version
+                logger.info("Compiled eligibility criteria for %d schemes", len(self._index))
+        return self._index
+
+
+scheme_eligibility = SchemeEligibility(gov_schemes)
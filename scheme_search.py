@@ -0,0 +1,335 @@
+"""
+Government Scheme Search
+Free-text search over gov_schemes.json ("drip irrigation subsidy",
+"kisan bima", "రైతు బీమా") with an in-memory inverted index
+
+Name, description, eligibility and the benefits list are tokenized into
+one posting list per term, with per-field weights (BM25F-style: weighted
+term frequencies and lengths, ranked with BM25). Devanagari and Telugu
+words are transliterated to Latin, and all words are folded to a loose
+spelling key (ee -> i, kh -> k, double letters collapsed, ...), so the
+common romanizations of a Hindi or Telugu word meet. A small lexicon
+adds the English term for well-known words (sinchai -> irrigation).
+Query words of min_prefix letters or more also match longer indexed
+terms, at a reduced weight.
+
+The index follows the gov_schemes reference snapshot and is updated
+per scheme: when the file changes only added, edited or removed schemes
+are re-indexed.
+
+Educational Purpose Only
+"""
+
+import logging
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+
+from config import SCHEME_SEARCH_CONFIG
+from reference_data import gov_schemes
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# TOKENIZER
+# ==========================================
+
+WORD_RE = re.compile(r'[a-z0-9]+|[\u0900-\u0963\u0971-\u097f]+|[\u0c00-\u0c63\u0c78-\u0c7f]+')
+
+STOPWORDS = frozenset("""
+a an and are as at be by can for from how i in is it me my of on or the to under what which with
+aur hai hain ka ke ki ko liye mein se kaise kya
+""".split())
+
+# Devanagari and Telugu share the ISCII layout: the same letter sits at
+# the same offset from the start of each block
+_CONSONANTS = {
+    0x15: 'k', 0x16: 'kh', 0x17: 'g', 0x18: 'gh', 0x19: 'n', 0x1a: 'ch', 0x1b: 'chh', 0x1c: 'j', 0x1d: 'jh',
+    0x1e: 'n', 0x1f: 't', 0x20: 'th', 0x21: 'd', 0x22: 'dh', 0x23: 'n', 0x24: 't', 0x25: 'th', 0x26: 'd',
+    0x27: 'dh', 0x28: 'n', 0x29: 'n', 0x2a: 'p', 0x2b: 'ph', 0x2c: 'b', 0x2d: 'bh', 0x2e: 'm', 0x2f: 'y',
+    0x30: 'r', 0x31: 'r', 0x32: 'l', 0x33: 'l', 0x34: 'l', 0x35: 'v', 0x36: 'sh', 0x37: 'sh', 0x38: 's',
+    0x39: 'h'
+}
+_VOWELS = {
+    0x05: 'a', 0x06: 'aa', 0x07: 'i', 0x08: 'ii', 0x09: 'u', 0x0a: 'uu', 0x0b: 'ri', 0x0c: 'li', 0x0d: 'e',
+    0x0e: 'e', 0x0f: 'e', 0x10: 'ai', 0x11: 'o', 0x12: 'o', 0x13: 'o', 0x14: 'au'
+}
+_VOWEL_SIGNS = {
+    0x3e: 'aa', 0x3f: 'i', 0x40: 'ii', 0x41: 'u', 0x42: 'uu', 0x43: 'ri', 0x44: 'ri', 0x45: 'e', 0x46: 'e',
+    0x47: 'e', 0x48: 'ai', 0x49: 'o', 0x4a: 'o', 0x4b: 'o', 0x4c: 'au'
+}
+_NASALS = {0x01: 'n', 0x02: 'n', 0x03: 'h'}
+_VIRAMA = 0x4d
+
+
+def transliterate(word):
+    """Devanagari or Telugu word -> rough Latin spelling"""
+    block = ord(word[0]) & ~0x7f
+    out = []
+    pending = False  # last consonant still carries its inherent 'a'
+    for ch in word:
+        offset = ord(ch) - block
+        if offset in _CONSONANTS:
+            if pending:
+                out.append('a')
+            out.append(_CONSONANTS[offset])
+            pending = True
+        elif offset in _VOWEL_SIGNS:
+            out.append(_VOWEL_SIGNS[offset])
+            pending = False
+        elif offset == _VIRAMA:
+            pending = False
+        else:
+            if pending:
+                out.append('a')
+                pending = False
+            out.append(_VOWELS.get(offset) or _NASALS.get(offset, ''))
+    # Hindi drops a word-final inherent 'a' (kisan, not kisana); Telugu keeps it
+    if pending and block == 0x0c00:
+        out.append('a')
+    return ''.join(out)
+
+
+def stem(word):
+    """Strip English plural and -ing endings"""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 5 and word.endswith('ing'):
+        return word[:-3]
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def fold(word):
+    """Loose spelling key shared by the romanizations of a word"""
+    word = word.replace('ph', 'f').replace('ee', 'i').replace('oo', 'u')
+    word = re.sub(r'([bcdfgjklmnpqrstvwxz])h', r'\1', word)
+    word = word.translate(str.maketrans('wzq', 'vjk'))
+    word = re.sub(r'(.)\1+', r'\1', word)
+    return re.sub(r'(?<=[aeiou])y(?=[aeiou]|$)', '', word)
+
+
+def split_words(text):
+    """Lowercased words of text with Latin accents removed (kisān -> kisan)"""
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(ch for ch in text if not '\u0300' <= ch <= '\u036f')
+    # Recompose, or Telugu vowel signs stay split into two code points
+    return WORD_RE.findall(unicodedata.normalize('NFC', text))
+
+
+def latin(word):
+    """A word from split_words in Latin script, '' for stopwords"""
+    if word[0] >= '\u0900':
+        word = transliterate(word)
+    return '' if word in STOPWORDS else word
+
+
+def tokenize(text):
+    """Index terms of text"""
+    return [fold(stem(word)) for word in map(latin, split_words(text)) if word]
+
+
+# Hindi and Telugu words farmers type in Latin script, with the English
+# term they should also match
+LEXICON = {
+    'agriculture': ['krishi', 'krushi', 'kheti', 'vyavasayam', 'vyavasaya'],
+    'crop': ['fasal', 'fasl', 'panta', 'pantalu'],
+    'drip': ['tapak', 'bindu', 'binduseedya'],
+    'farmer': ['kisan', 'kissan', 'krishak', 'rythu', 'raitu', 'raithu', 'ryot', 'rythulu', 'raitulu'],
+    'fertilizer': ['khad', 'urvarak', 'eruvu', 'eruvulu'],
+    'insurance': ['bima', 'beema'],
+    'irrigation': ['sinchai', 'sinchayee', 'sichai', 'paarudala', 'parudala'],
+    'land': ['zameen', 'jameen', 'bhoomi', 'bhumi'],
+    'loan': ['rin', 'karz', 'karj', 'runam', 'appu'],
+    'machinery': ['yantra', 'yantralu', 'upkaran'],
+    'market': ['mandi', 'bazaar', 'bazar', 'santha'],
+    'organic': ['jaivik', 'sendriya'],
+    'pension': ['pinchan', 'pinchanu'],
+    'scheme': ['yojana', 'yojna', 'pathakam', 'padhakam'],
+    'seed': ['beej', 'bij', 'beeja', 'vittanalu', 'vithanalu', 'vittanam'],
+    'soil': ['mitti', 'matti', 'nela'],
+    'solar': ['saur', 'sour'],
+    'subsidy': ['anudan', 'anudaan', 'sabsidi', 'rayiti', 'raayiti'],
+    'support': ['sahayata', 'sahayta', 'madad', 'sahayam'],
+    'training': ['prashikshan', 'shikshana', 'shikshan'],
+    'water': ['pani', 'paani', 'jal', 'jala', 'neeru', 'neeti', 'neellu']
+}
+SYNONYMS = {}
+for _term, _variants in LEXICON.items():
+    for _variant in _variants:
+        SYNONYMS.setdefault(fold(stem(_variant)), []).append(fold(stem(_term)))
+
+
+# ==========================================
+# INVERTED INDEX
+# ==========================================
+
+class SchemeIndex:
+    """
+    Inverted index over scheme rows, updated one scheme at a time
+
+    postings maps a term to {scheme id: weighted term frequency}; not
+    thread-safe, SchemeSearch serializes access.
+    """
+
+    def __init__(self, field_weights, k1=1.2, b=0.75):
+        self.field_weights = dict(field_weights)
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.docs = {}  # id -> (row, weighted length, indexed text)
+        self.total_length = 0.0
+        self._vocabulary = None  # sorted terms for prefix lookups, rebuilt after changes
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _text(self, row):
+        """Indexed fields of a row, as (field, text) pairs"""
+        pairs = []
+        for field in self.field_weights:
+            value = row.get(field) or ''
+            pairs.append((field, ' '.join(map(str, value)) if isinstance(value, (list, tuple)) else str(value)))
+        return tuple(pairs)
+
+    def add(self, row):
+        text = self._text(row)
+        frequencies = {}
+        length = 0.0
+        for field, value in text:
+            weight = self.field_weights[field]
+            for term in tokenize(value):
+                frequencies[term] = frequencies.get(term, 0.0) + weight
+                length += weight
+        for term, tf in frequencies.items():
+            self.postings.setdefault(term, {})[row['id']] = tf
+        self.docs[row['id']] = (row, length, text)
+        self.total_length += length
+        self._vocabulary = None
+
+    def remove(self, doc_id):
+        row, length, text = self.docs.pop(doc_id)
+        for field, value in text:
+            for term in set(tokenize(value)):
+                docs = self.postings.get(term)
+                if docs is not None:
+                    docs.pop(doc_id, None)
+                    if not docs:
+                        del self.postings[term]
+        self.total_length -= length
+        self._vocabulary = None
+
+    def sync(self, rows):
+        """
+        Re-index only the schemes that differ from rows
+
+        Returns:
+            (added, updated, removed) counts
+        """
+        current = {row['id']: row for row in rows if 'id' in row}
+        removed = [doc_id for doc_id in self.docs if doc_id not in current]
+        for doc_id in removed:
+            self.remove(doc_id)
+        added = updated = 0
+        for doc_id, row in current.items():
+            indexed = self.docs.get(doc_id)
+            if indexed is None:
+                added += 1
+            elif indexed[2] != self._text(row):
+                self.remove(doc_id)
+                updated += 1
+            else:
+                # Unchanged text: keep the postings, serve the new row
+                self.docs[doc_id] = (row,) + indexed[1:]
+                continue
+            self.add(row)
+        return added, updated, len(removed)
+
+    def _expand(self, word):
+        """(term, weight) alternatives for one query word"""
+        term = fold(stem(latin(word)))
+        alternatives = {term: 1.0}
+        for synonym in SYNONYMS.get(term, ()):
+            alternatives.setdefault(synonym, 1.0)
+        if len(term) >= SCHEME_SEARCH_CONFIG['min_prefix']:
+            if self._vocabulary is None:
+                self._vocabulary = sorted(self.postings)
+            i = bisect_left(self._vocabulary, term)
+            for candidate in self._vocabulary[i:i + SCHEME_SEARCH_CONFIG['max_prefix_expansions']]:
+                if not candidate.startswith(term):
+                    break
+                alternatives.setdefault(candidate, SCHEME_SEARCH_CONFIG['prefix_weight'])
+        return alternatives
+
+    def search(self, query, scheme_type=None, level=None):
+        """
+        Schemes matching any query word, best first
+
+        Returns:
+            List of (row, score, matched query words)
+        """
+        if not self.docs:
+            return []
+        n = len(self.docs)
+        average_length = self.total_length / n or 1.0
+        scores, matched = {}, {}
+        for word in dict.fromkeys(split_words(query)):
+            if not latin(word):
+                continue
+            # A word scores the best of its alternatives in each scheme
+            best = {}
+            for term, weight in self._expand(word).items():
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+                for doc_id, tf in docs.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.docs[doc_id][1] / average_length)
+                    score = weight * idf * tf * (self.k1 + 1) / (tf + norm)
+                    if score > best.get(doc_id, 0.0):
+                        best[doc_id] = score
+            for doc_id, score in best.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+                matched.setdefault(doc_id, []).append(word)
+
+        results = []
+        for doc_id, score in scores.items():
+            row = self.docs[doc_id][0]
+            if scheme_type and str(row.get('type', '')).lower() != scheme_type.lower():
+                continue
+            if level and str(row.get('level', '')).lower() != level.lower():
+                continue
+            results.append((row, score, matched[doc_id]))
+        results.sort(key=lambda result: (-result[1], result[0]['id']))
+        return results
+
+
+# ==========================================
+# FILE-BACKED INDEX
+# ==========================================
+
+class SchemeSearch:
+    """Keeps a SchemeIndex in sync with the gov_schemes reference snapshot"""
+
+    def __init__(self, reference, field_weights, k1=1.2, b=0.75):
+        self.reference = reference
+        self.index = SchemeIndex(field_weights, k1, b)
+        self._version = None
+        self._lock = threading.Lock()
+
+    def search(self, query, scheme_type=None, level=None):
+        table = self.reference.get()
+        with self._lock:
+            if table.version != self._version:
+                added, updated, removed = self.index.sync(table.rows)
+                self._version = table.version
+                logger.info("Scheme search index: %d added, %d updated, %d removed (%d schemes, %d terms)",
+                            added, updated, removed, len(self.index), len(self.index.postings))
+            return self.index.search(query, scheme_type, level)
+
+
+scheme_search = SchemeSearch(gov_schemes, SCHEME_SEARCH_CONFIG['field_weights'],
+                             SCHEME_SEARCH_CONFIG['k1'], SCHEME_SEARCH_CONFIG['b'])
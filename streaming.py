@@ -0,0 +1,81 @@
+"""
+Streaming Responses
+Chunked NDJSON and CSV generators for large result sets
+
+Educational Purpose Only
+"""
+
+import csv
+import io
+
+from flask import Response, request
+
+from json_provider import dumps_bytes
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+
+def requested_format(default='ndjson'):
+    """Output format from ?format= or the Accept header"""
+    fmt = request.args.get('format', '').lower()
+    if fmt in FORMATS:
+        return fmt
+    if request.accept_mimetypes.best_match(list(FORMATS.values())) == 'text/csv':
+        return 'csv'
+    return default
+
+
+def ndjson_chunks(rows, chunk_size=1000):
+    """Yield newline-delimited JSON in chunks of chunk_size rows"""
+    buffer = []
+    for row in rows:
+        buffer.append(dumps_bytes(row))
+        if len(buffer) >= chunk_size:
+            yield b'\n'.join(buffer) + b'\n'
+            buffer = []
+    if buffer:
+        yield b'\n'.join(buffer) + b'\n'
+
+
+def csv_chunks(rows, fieldnames, chunk_size=1000):
+    """Yield CSV (header first) in chunks of chunk_size rows"""
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=fieldnames, extrasaction='ignore', lineterminator='\n')
+    writer.writeheader()
+
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count >= chunk_size:
+            yield out.getvalue().encode('utf-8')
+            out.seek(0)
+            out.truncate()
+            count = 0
+
+    remaining = out.getvalue()
+    if remaining:
+        yield remaining.encode('utf-8')
+
+
+def stream_rows(rows, fmt, fieldnames, chunk_size=1000, filename=None, headers=None):
+    """
+    Build a streamed response of rows in the given format
+
+    rows.close(), when rows has one, runs when the response is closed,
+    even if the body was never iterated.
+    """
+    if fmt == 'csv':
+        body = csv_chunks(rows, fieldnames, chunk_size)
+    else:
+        body = ndjson_chunks(rows, chunk_size)
+
+    response = Response(body, mimetype=FORMATS[fmt], headers=headers or {})
+    if hasattr(rows, 'close'):
+        response.call_on_close(rows.close)
+    if filename:
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
@@ -79,6 +79,8 @@ const translations = {
         discoverSchemes: 'Discover schemes you\'re eligible for',
         filterByCriteria: 'Filter by Criteria',
         
+        searchSchemes: 'Search',
+        searchSchemesPlaceholder: 'e.g., drip irrigation subsidy',
         schemeType: 'Scheme Type',
         allTypes: 'All Types',
         subsidy: 'Subsidy',
@@ -195,6 +197,8 @@ const translations = {
         discoverSchemes: 'आप किन योजनाओं के लिए पात्र हैं',
         filterByCriteria: 'मानदंड के अनुसार फ़िल्टर करें',
         
+        searchSchemes: 'खोजें',
+        searchSchemesPlaceholder: 'जैसे, सिंचाई सब्सिडी',
         schemeType: 'योजना प्रकार',
         allTypes: 'सभी प्रकार',
         subsidy: 'सब्सिडी',
@@ -311,6 +315,8 @@ const translations = {
         discoverSchemes: 'మీరు అర్హతలో ఉన్న పథకాలను కనుగొనండి',
         filterByCriteria: 'ప్రమాణం ద్వారా ఫిల్టర్ చేయండి',
         
+        searchSchemes: 'వెతకండి',
+        searchSchemesPlaceholder: 'ఉదా., రైతు బీమా',
         schemeType: 'పథక రకం',
         allTypes: 'అన్ని రకాలు',
         subsidy: 'సబ్సిడీ',
@@ -617,6 +623,16 @@ function updateSpecificElements() {
         schemesSubtitle.textContent = t('discoverSchemes');
     }
     
+    const searchLabel = document.querySelector('label[for="schemeSearch"]');
+    if (searchLabel) {
+        searchLabel.textContent = t('searchSchemes');
+    }
+    
+    const searchInput = document.getElementById('schemeSearch');
+    if (searchInput) {
+        searchInput.placeholder = t('searchSchemesPlaceholder');
+    }
+    
     const filterLabel = document.querySelector('label[for="schemeType"]');
     if (filterLabel) {
         filterLabel.textContent = t('schemeType');
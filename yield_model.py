@@ -0,0 +1,436 @@
+"""
+Yield Prediction Model
+Vectorized form of the educational yield formula used by
+/api/predict-yield, shared by the single and batch endpoints, and the
+optional trained model described by MODEL_SETTINGS['yield_prediction']
+
+Educational Purpose Only - Potato & Tomato Only
+"""
+
+import functools
+import logging
+import math
+import os
+import pickle
+import time
+
+import numpy as np
+
+from config import MODEL_PATHS, MODEL_SETTINGS
+from metrics import register_cache, yield_inference_latency
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Simple prediction model (educational purposes)
+BASE_YIELD = {
+    'potato': 20,
+    'tomato': 15
+}
+
+SOIL_MULTIPLIERS = {'poor': 0.7, 'moderate': 1.0, 'good': 1.3}
+WATER_MULTIPLIERS = {'low': 0.8, 'moderate': 1.0, 'high': 1.2}
+
+OPTIMAL_SUNLIGHT_HOURS = 8
+MAX_SUNLIGHT_MULTIPLIER = 1.2
+
+SUPPORTED_CROPS = tuple(BASE_YIELD)
+
+
+def _lookup(values, table, default=1.0):
+    """Map category strings to multipliers (unknown values use default)"""
+    return np.fromiter(
+        (table.get(str(v).lower(), default) for v in values), dtype=np.float64, count=len(values))
+
+
+def sunlight_multiplier(sunlight_hours):
+    """Optimal at 8 hours, capped at 1.2"""
+    return np.minimum(np.asarray(sunlight_hours, dtype=np.float64) / OPTIMAL_SUNLIGHT_HOURS,
+                      MAX_SUNLIGHT_MULTIPLIER)
+
+
+def confidence_for(sunlight_hours):
+    """Confidence score derived from sunlight hours"""
+    return np.minimum(85 + np.trunc(np.asarray(sunlight_hours, dtype=np.float64) * 2), 95).astype(np.int64)
+
+
+def round2(values):
+    """
+    Round an array to 2 decimals exactly as Python's round() does
+
+    np.round scales by 100 first and can land 0.01 away from round() when
+    the scaled value is within rounding error of a half-way point, and
+    only then; those elements are rounded again with round(). The array
+    paths use this to match predict_one.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    with np.errstate(invalid='ignore'):
+        near_half = np.abs(scaled - np.floor(scaled) - 0.5) <= 1e-9 + 1e-12 * np.abs(scaled)
+    for i in np.flatnonzero(near_half).tolist():
+        rounded.flat[i] = round(float(values.flat[i]), 2)
+    return rounded
+
+
+def predict_arrays(base_yield, area, soil_multiplier, water_multiplier, sunlight_hours):
+    """
+    Evaluate the yield formula on NumPy arrays (broadcasting allowed)
+
+    Returns:
+        dict of arrays: predicted_yield, yield_per_hectare, confidence,
+        sunlight_multiplier (yields equal to predict_one's, element by element)
+    """
+    area = np.asarray(area, dtype=np.float64)
+    sun_multiplier = sunlight_multiplier(sunlight_hours)
+
+    predicted = round2(base_yield * area * soil_multiplier * water_multiplier * sun_multiplier)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_hectare = np.where(area > 0, round2(predicted / area), 0.0)
+
+    return {
+        'predicted_yield': predicted,
+        'yield_per_hectare': per_hectare,
+        'confidence': confidence_for(sunlight_hours),
+        'sunlight_multiplier': sun_multiplier
+    }
+
+
+def predict_batch(crops, areas, soil_qualities, water_availabilities, sunlight_hours):
+    """
+    Predict yields for many fields at once
+
+    Args:
+        crops: Sequence of supported crop names (lowercase)
+        areas: Sequence of areas in hectares
+        soil_qualities: Sequence of 'poor' / 'moderate' / 'good'
+        water_availabilities: Sequence of 'low' / 'moderate' / 'high'
+        sunlight_hours: Sequence of daily sunlight hours
+
+    Returns:
+        dict of arrays aligned with the inputs, including the per-row
+        soil/water/sunlight multipliers
+    """
+    base = _lookup(crops, BASE_YIELD, default=np.nan)
+    soil = _lookup(soil_qualities, SOIL_MULTIPLIERS)
+    water = _lookup(water_availabilities, WATER_MULTIPLIERS)
+
+    result = predict_arrays(base, areas, soil, water, sunlight_hours)
+    result['soil_multiplier'] = soil
+    result['water_multiplier'] = water
+    return result
+
+
+def predict_one(crop, area, soil_quality, water_availability, sunlight_hours):
+    """
+    Predict yield for a single field; returns plain Python values
+
+    Scalar twin of predict_arrays, which multiplies in the same order and
+    rounds with the same round() (see round2), so both give equal results.
+    """
+    soil_multiplier = SOIL_MULTIPLIERS.get(str(soil_quality).lower(), 1.0)
+    water_multiplier = WATER_MULTIPLIERS.get(str(water_availability).lower(), 1.0)
+    sun_multiplier = min(sunlight_hours / OPTIMAL_SUNLIGHT_HOURS, MAX_SUNLIGHT_MULTIPLIER)
+
+    predicted_yield = round(BASE_YIELD[crop] * area * soil_multiplier * water_multiplier * sun_multiplier, 2)
+    return {
+        'predicted_yield': predicted_yield,
+        'yield_per_hectare': round(predicted_yield / area, 2) if area > 0 else 0,
+        'confidence': min(85 + int(sunlight_hours * 2), 95),
+        'soil_multiplier': soil_multiplier,
+        'water_multiplier': water_multiplier,
+        'sunlight_multiplier': sun_multiplier
+    }
+
+
+# ==========================================
+# BATCH INPUT
+# ==========================================
+
+REQUIRED_FIELDS = ('cropType', 'area', 'soilQuality', 'waterAvailability', 'sunlight')
+
+
+def columns_from_records(records):
+    """
+    Validate batch records and split them into input columns
+
+    Args:
+        records: Iterable of dicts (JSON objects or CSV rows)
+
+    Returns:
+        (columns, errors) where columns maps 'row', 'crop', 'area', 'soil',
+        'water', 'sunlight' to lists of valid rows, and errors lists
+        {'row', 'error'} for rejected ones
+    """
+    columns = {'row': [], 'crop': [], 'area': [], 'soil': [], 'water': [], 'sunlight': []}
+    errors = []
+
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            errors.append({'row': i, 'error': 'Row must be an object'})
+            continue
+
+        missing = [field for field in REQUIRED_FIELDS if record.get(field) in (None, '')]
+        if missing:
+            errors.append({'row': i, 'error': f"Missing required fields: {', '.join(missing)}"})
+            continue
+
+        crop = str(record['cropType']).strip().lower()
+        if crop not in BASE_YIELD:
+            errors.append({'row': i, 'error': f"Crop not supported: {record['cropType']}"})
+            continue
+
+        try:
+            area = float(record['area'])
+            sunlight = float(record['sunlight'])
+        except (TypeError, ValueError):
+            errors.append({'row': i, 'error': 'area and sunlight must be numbers'})
+            continue
+        if not (math.isfinite(area) and math.isfinite(sunlight) and area > 0 and sunlight > 0):
+            errors.append({'row': i, 'error': 'area and sunlight must be finite numbers greater than 0'})
+            continue
+
+        columns['row'].append(i)
+        columns['crop'].append(crop)
+        columns['area'].append(area)
+        columns['soil'].append(str(record['soilQuality']).strip())
+        columns['water'].append(str(record['waterAvailability']).strip())
+        columns['sunlight'].append(sunlight)
+
+    return columns, errors
+
+
+# ==========================================
+# SENSITIVITY GRID
+# ==========================================
+
+SOIL_LEVELS = tuple(SOIL_MULTIPLIERS)
+WATER_LEVELS = tuple(WATER_MULTIPLIERS)
+
+
+@functools.lru_cache(maxsize=32)
+def yield_grid(sunlight_hours):
+    """
+    Multiplier axes of the soil x water x sunlight grid
+
+    The axes do not depend on the farmer, so they are cached per
+    sunlight axis. They are kept apart rather than as one product, and
+    not cached per crop: the yield must be multiplied in predict_one's
+    order (base * area * soil * water * sunlight) to round to the same
+    cents, so the crop's base yield and the area are applied first on
+    every request.
+
+    Args:
+        sunlight_hours: Tuple of sunlight hours for the third axis
+
+    Returns:
+        (soil, water, sunlight, confidence): multipliers shaped to
+        broadcast to (len(SOIL_LEVELS), len(WATER_LEVELS),
+        len(sunlight_hours)), and the confidence per sunlight value
+    """
+    soil = np.array([SOIL_MULTIPLIERS[level] for level in SOIL_LEVELS])[:, None, None]
+    water = np.array([WATER_MULTIPLIERS[level] for level in WATER_LEVELS])[None, :, None]
+    sunlight = np.asarray(sunlight_hours, dtype=np.float64)
+    sun = sunlight_multiplier(sunlight)[None, None, :]
+    confidence = confidence_for(sunlight)
+    for array in (soil, water, sun, confidence):
+        array.setflags(write=False)
+    return soil, water, sun, confidence
+
+
+def sensitivity(crop, area, sunlight_hours):
+    """
+    What-if grid for one field: yields over soil x water x sunlight
+
+    Every cell equals predict_one for the same inputs: same
+    multiplication order, rounded with Python's round().
+
+    Returns:
+        dict with the grid axes, predictedYield as nested lists
+        [soil][water][sunlight] rounded to 2 decimals, and the confidence
+        for each sunlight value
+    """
+    soil, water, sun, confidence = yield_grid(tuple(sunlight_hours))
+    yields = round2(BASE_YIELD[crop] * float(area) * soil * water * sun)
+    return {
+        'soilQuality': list(SOIL_LEVELS),
+        'waterAvailability': list(WATER_LEVELS),
+        'sunlight': list(sunlight_hours),
+        'predictedYield': yields.tolist(),
+        'confidence': confidence.tolist()
+    }
+
+
+def _grid_cache_stats():
+    info = yield_grid.cache_info()
+    return {'hits': info.hits, 'misses': info.misses}
+
+
+register_cache('yield_grid', _grid_cache_stats)
+
+
+# ==========================================
+# TRAINED MODEL
+# ==========================================
+
+# Categorical encodings shared by training and inference
+ENCODINGS = {
+    'cropType': {crop: code for code, crop in enumerate(SUPPORTED_CROPS)},
+    'soilQuality': {'poor': 0, 'moderate': 1, 'good': 2},
+    'waterAvailability': {'low': 0, 'moderate': 1, 'high': 2}
+}
+
+
+class TrainedYieldModel:
+    """
+    Pickled regressor and scaler predicting yield per hectare
+
+    Any objects with scikit-learn's transform()/predict() interface work.
+    Categorical features are encoded with ENCODINGS; unknown values map
+    to the middle level, like the formula's default multiplier of 1.0.
+    """
+
+    def __init__(self, model, scaler, features):
+        self.model = model
+        self.scaler = scaler
+        self.features = tuple(features)
+        unknown = [f for f in self.features if f not in ENCODINGS and f not in ('area', 'sunlight')]
+        if unknown:
+            raise ValueError(f"Unsupported yield model features: {', '.join(unknown)}")
+
+    @classmethod
+    def load(cls, model_path, scaler_path, features):
+        with open(model_path, 'rb') as f:
+            model = pickle.load(f)
+        scaler = None
+        if scaler_path and os.path.exists(scaler_path):
+            with open(scaler_path, 'rb') as f:
+                scaler = pickle.load(f)
+        return cls(model, scaler, features)
+
+    def encode(self, crops, areas, soil_qualities, water_availabilities, sunlight_hours):
+        """Feature matrix of shape (rows, len(features))"""
+        inputs = {
+            'cropType': crops,
+            'area': areas,
+            'soilQuality': soil_qualities,
+            'waterAvailability': water_availabilities,
+            'sunlight': sunlight_hours
+        }
+        columns = []
+        for feature in self.features:
+            table = ENCODINGS.get(feature)
+            if table is None:
+                columns.append(np.asarray(inputs[feature], dtype=np.float64))
+            else:
+                columns.append(_lookup(inputs[feature], table, default=1))
+        return np.column_stack(columns)
+
+    def predict_per_hectare(self, *inputs):
+        features = self.encode(*inputs)
+        if self.scaler is not None:
+            features = self.scaler.transform(features)
+        return np.maximum(np.asarray(self.model.predict(features), dtype=np.float64).ravel(), 0.0)
+
+
+class YieldPredictor:
+    """
+    Yield predictions from the trained model when one is loaded,
+    otherwise from the educational formula
+
+    Every call records its inference time in the yield_inference
+    histogram and returns it as 'inference_ms'.
+    """
+
+    def __init__(self, trained=None):
+        self.trained = trained
+
+    @property
+    def name(self):
+        return 'trained' if self.trained is not None else 'formula'
+
+    @classmethod
+    def from_config(cls):
+        model_path = os.path.join(BASE_DIR, MODEL_PATHS['yield_prediction'])
+        settings = MODEL_SETTINGS['yield_prediction']
+        if not os.path.exists(model_path):
+            logger.info("No trained yield model at %s, using the formula", model_path)
+            return cls()
+        try:
+            trained = TrainedYieldModel.load(
+                model_path, os.path.join(BASE_DIR, settings['scaler_path']), settings['features'])
+            # Fail at startup, not on the first request
+            trained.predict_per_hectare(['potato'], [1.0], ['moderate'], ['moderate'], [8.0])
+        except Exception as e:
+            logger.warning("Could not load yield model %s, using the formula: %s", model_path, e)
+            return cls()
+        logger.info("Loaded trained yield model from %s", model_path)
+        return cls(trained)
+
+    def _trained_batch(self, crops, areas, soil_qualities, water_availabilities, sunlight_hours):
+        areas = np.asarray(areas, dtype=np.float64)
+        per_hectare = self.trained.predict_per_hectare(
+            crops, areas, soil_qualities, water_availabilities, sunlight_hours)
+        predicted = round2(per_hectare * areas)
+        return {
+            'predicted_yield': predicted,
+            'yield_per_hectare': np.where(areas > 0, round2(per_hectare), 0.0),
+            'confidence': confidence_for(sunlight_hours)
+        }
+
+    def predict_batch(self, crops, areas, soil_qualities, water_availabilities, sunlight_hours):
+        """Batch prediction; the arrays of predict_arrays plus 'model' and 'inference_ms'"""
+        start = time.perf_counter()
+        if self.trained is not None:
+            result = self._trained_batch(crops, areas, soil_qualities, water_availabilities, sunlight_hours)
+        else:
+            result = predict_batch(crops, areas, soil_qualities, water_availabilities, sunlight_hours)
+        return self._timed(result, start, 'batch')
+
+    def predict_one(self, crop, area, soil_quality, water_availability, sunlight_hours):
+        """Single prediction with plain Python values (multipliers are None for the trained model)"""
+        start = time.perf_counter()
+        if self.trained is None:
+            result = predict_one(crop, area, soil_quality, water_availability, sunlight_hours)
+        else:
+            batch = self._trained_batch([crop], [area], [soil_quality], [water_availability], [sunlight_hours])
+            result = {
+                'predicted_yield': float(batch['predicted_yield'][0]),
+                'yield_per_hectare': float(batch['yield_per_hectare'][0]) if area > 0 else 0,
+                'confidence': int(batch['confidence'][0]),
+                'soil_multiplier': None,
+                'water_multiplier': None,
+                'sunlight_multiplier': None
+            }
+        return self._timed(result, start, 'single')
+
+    def sensitivity(self, crop, area, sunlight_hours):
+        """What-if grid (see sensitivity); the trained model scores all cells in one batch"""
+        start = time.perf_counter()
+        if self.trained is None:
+            result = sensitivity(crop, area, sunlight_hours)
+        else:
+            shape = (len(SOIL_LEVELS), len(WATER_LEVELS), len(sunlight_hours))
+            soil, water, sun = (a.ravel() for a in np.meshgrid(
+                SOIL_LEVELS, WATER_LEVELS, np.asarray(sunlight_hours, dtype=np.float64), indexing='ij'))
+            cells = soil.size
+            batch = self._trained_batch([crop] * cells, np.full(cells, float(area)), soil, water, sun)
+            result = {
+                'soilQuality': list(SOIL_LEVELS),
+                'waterAvailability': list(WATER_LEVELS),
+                'sunlight': list(sunlight_hours),
+                'predictedYield': batch['predicted_yield'].reshape(shape).tolist(),
+                'confidence': confidence_for(sunlight_hours).tolist()
+            }
+        return self._timed(result, start, 'grid')
+
+    def _timed(self, result, start, mode):
+        elapsed = time.perf_counter() - start
+        yield_inference_latency.observe(elapsed, model=self.name, mode=mode)
+        result['model'] = self.name
+        result['inference_ms'] = round(elapsed * 1000, 3)
+        return result
+
+
+yield_predictor = YieldPredictor.from_config()